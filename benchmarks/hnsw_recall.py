@@ -0,0 +1,67 @@
+"""Recall and latency of the HNSW index against exact search.
+
+    python -m benchmarks.hnsw_recall [--vectors 5000] [--queries 100] [--m 16]
+
+Vectors are synthetic 1536-dimensional embeddings drawn around a few hundred
+cluster centres, which is closer to real text embeddings than uniform noise.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.infrastructure.vector_db.hnsw import HnswIndex
+
+DIMENSION = 1536
+
+
+def synthetic_embeddings(count: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(count // 20, 1), DIMENSION))
+    points = centres[rng.integers(len(centres), size=count)]
+    points += 3 * rng.standard_normal((count, DIMENSION))
+    return (points / np.linalg.norm(points, axis=1, keepdims=True)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.vectors + args.queries, seed=0)
+    data, queries = vectors[: args.vectors], vectors[args.vectors :]
+
+    index = HnswIndex(DIMENSION, args.m, args.ef_construction, seed=0)
+    started = time.perf_counter()
+    for i, vector in enumerate(data):
+        index.add(str(i), vector, {})
+    print(
+        f"{args.vectors} vectors, built in {time.perf_counter() - started:.1f}s "
+        f"(m={args.m}, ef_construction={args.ef_construction})"
+    )
+
+    started = time.perf_counter()
+    truth = []
+    for query in queries:
+        scores = data @ query
+        top = np.argpartition(scores, -args.k)[-args.k :]
+        truth.append({str(row) for row in top})
+    exact_ms = (time.perf_counter() - started) / len(queries) * 1000
+    print(f"{'method':<14} {'recall@' + str(args.k):>10} {'ms/query':>10}")
+    print(f"{'exact':<14} {1:>10.3f} {exact_ms:>10.2f}")
+
+    for ef in (16, 32, 64, 128, 256):
+        started = time.perf_counter()
+        found = [{label for label, _, _ in index.search(q, args.k, ef=ef)} for q in queries]
+        latency_ms = (time.perf_counter() - started) / len(queries) * 1000
+        recall = np.mean([len(f & t) / args.k for f, t in zip(found, truth)])
+        print(f"{'hnsw ef=' + str(ef):<14} {recall:>10.3f} {latency_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Compression ratio and decode overhead of memo text records.
+
+    python -m benchmarks.text_compression [--db data/db.json] [--memos 500]
+
+Without ``--db`` a synthetic corpus of transcript-like text is used. Sizes are
+measured on the records as the JSON store writes them (``indent=4``).
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src.infrastructure.db.compression import (DictionaryStore, TextCodec,
+                                               train_dictionary)
+
+WORDS = (
+    "the a to and I we need remember call meeting tomorrow project about "
+    "with for on at next week idea buy groceries email team review budget "
+    "doctor appointment friday monday client follow up notes book flight "
+    "should could think maybe really also just then after before morning"
+).split()
+
+
+def synthetic_corpus(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    # Zipf-like word frequencies, roughly what speech transcripts look like
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    texts = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(2, 12)):
+            words = rng.choices(WORDS, weights, k=rng.randint(6, 18))
+            sentences.append(" ".join(words).capitalize() + ".")
+        texts.append(" ".join(sentences))
+    return texts
+
+
+def load_corpus(db_file: Path) -> list[str]:
+    with open(db_file) as f:
+        db = json.load(f)
+    codec = TextCodec(DictionaryStore(db_file.parent / "dictionaries"))
+    return [codec.decode(memo) for memos in db.values() for memo in memos.values()]
+
+
+def stored_size(records: list[dict]) -> int:
+    return len(json.dumps(records, indent=4, ensure_ascii=False).encode())
+
+
+def measure(name: str, texts: list[str], encode, codec: TextCodec, baseline: int):
+    started = time.perf_counter()
+    records = [encode(text) for text in texts]
+    encode_us = (time.perf_counter() - started) / len(texts) * 1e6
+
+    started = time.perf_counter()
+    for record in records:
+        codec.decode(record)
+    decode_us = (time.perf_counter() - started) / len(texts) * 1e6
+
+    size = stored_size(records)
+    print(
+        f"{name:<12} {size:>12,} {baseline / size:>7.2f}x "
+        f"{encode_us:>10.1f} {decode_us:>10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, help="db.json to take memo texts from")
+    parser.add_argument("--memos", type=int, default=500)
+    args = parser.parse_args()
+
+    texts = load_corpus(args.db) if args.db else synthetic_corpus(args.memos)
+    with tempfile.TemporaryDirectory() as folder:
+        codec = TextCodec(DictionaryStore(Path(folder)))
+        # Train on the first half, as a user's dictionary would be
+        dictionary_id = codec.dictionaries.add(
+            train_dictionary(texts[: max(len(texts) // 2, 1)])
+        )
+
+        baseline = stored_size([{"text": text} for text in texts])
+        print(f"{len(texts)} memos, {sum(map(len, texts)) / len(texts):.0f} chars avg")
+        print(f"{'codec':<12} {'bytes':>12} {'ratio':>8} {'enc us':>10} {'dec us':>10}")
+        measure("none", texts, lambda text: {"text": text}, codec, baseline)
+        measure("zlib", texts, codec.encode, codec, baseline)
+        measure(
+            "zlib+dict",
+            texts,
+            lambda text: codec.encode(text, dictionary_id),
+            codec,
+            baseline,
+        )
+
+
+if __name__ == "__main__":
+    main()
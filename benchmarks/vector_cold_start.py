@@ -0,0 +1,60 @@
+"""Time from opening LocalVectorStorage to its first search result.
+
+    python -m benchmarks.vector_cold_start [--vectors 20000] [--users 100]
+
+Writes one merged segment of random 1536-dimensional vectors, then opens it
+in a fresh storage instance and searches one user, next to the time it takes
+to ``np.load`` the same matrix the way the previous ``.npz`` layout did.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.infrastructure.vector_db.local_vector_storage import LocalVectorStorage
+from src.infrastructure.vector_db.segments import Segment, segment_name
+
+DIMENSION = 1536
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, DIMENSION)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    rows = [
+        (f"user-{i % args.users}", str(i), vector, {"user_id": f"user-{i % args.users}"})
+        for i, vector in enumerate(vectors)
+    ]
+
+    with tempfile.TemporaryDirectory() as folder:
+        (Path(folder) / "vectors").mkdir()
+        Segment.write(Path(folder) / "vectors" / segment_name(1, 1), DIMENSION, rows)
+        np.savez(Path(folder) / "matrix.npz", vectors=vectors)
+
+        started = time.perf_counter()
+        storage = LocalVectorStorage(Path(folder))
+        opened = time.perf_counter()
+        asyncio.run(storage.search(vectors[0].tolist(), "user-0", limit=10))
+        searched = time.perf_counter()
+
+        with np.load(Path(folder) / "matrix.npz") as data:
+            data["vectors"]
+        loaded = time.perf_counter()
+
+    print(f"{args.vectors} vectors, {vectors.nbytes / 2**20:.0f} MiB")
+    print(f"open segments       {1000 * (opened - started):8.2f} ms")
+    print(f"first search        {1000 * (searched - opened):8.2f} ms")
+    print(f"np.load for compare {1000 * (loaded - searched):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
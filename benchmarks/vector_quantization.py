@@ -0,0 +1,95 @@
+"""Memory per vector and recall@10 of quantized local vector search.
+
+    python -m benchmarks.vector_quantization [--vectors 20000] [--queries 100]
+
+Builds clustered 1536-dimensional unit vectors (embeddings of related memos
+sit close together, unlike uniform noise), writes them to one merged segment
+per mode and compares each mode's top 10 with exact float32 search, both
+ranked by the codes alone and after re-ranking the shortlist exactly.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.infrastructure.vector_db.local_vector_storage import LocalVectorStorage
+from src.infrastructure.vector_db.segments import Segment, segment_name
+
+DIMENSION = 1536
+LIMIT = 10
+
+
+def clustered_vectors(rng: np.random.Generator, count: int, clusters: int = 200) -> np.ndarray:
+    centres = rng.standard_normal((clusters, DIMENSION))
+    vectors = centres[rng.integers(clusters, size=count)] + rng.standard_normal((count, DIMENSION))
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def recall(storage: LocalVectorStorage, queries: np.ndarray, truth: list[set]) -> tuple[float, float]:
+    started = time.perf_counter()
+    found = [
+        {r["id"] for r in asyncio.run(storage.search(query.tolist(), "user", limit=LIMIT))}
+        for query in queries
+    ]
+    elapsed = (time.perf_counter() - started) / len(queries)
+    return np.mean([len(f & t) / LIMIT for f, t in zip(found, truth)]), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--pq-subspaces", type=int, default=96)
+    parser.add_argument("--rerank", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(rng, args.vectors)
+    queries = vectors[rng.choice(args.vectors, args.queries, replace=False)]
+    queries = queries + 0.5 * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(DIMENSION)
+    exact = queries @ vectors.T
+    truth = [{str(i) for i in np.argsort(-row)[:LIMIT]} for row in exact]
+    rows = [("user", str(i), vector, {"user_id": "user"}) for i, vector in enumerate(vectors)]
+
+    # A Python list of floats, as the JSON-era storage held each embedding
+    list_bytes = 56 + 8 * DIMENSION + 24 * DIMENSION
+    print(f"{args.vectors} vectors, {DIMENSION} dimensions")
+    print(f"{'mode':6} {'bytes/vector':>12} {'vs list':>8} {'recall@10 codes':>16} "
+          f"{'recall@10 rerank':>17} {'ms/query':>9}")
+    print(f"{'list':6} {list_bytes:12d} {1:7.0f}x")
+    for mode in ("none", "int8", "pq"):
+        with tempfile.TemporaryDirectory() as folder:
+            (Path(folder) / "vectors").mkdir()
+            segment = Segment.write(
+                Path(folder) / "vectors" / segment_name(1, 1),
+                DIMENSION,
+                rows,
+                quantization=mode,
+                pq_subspaces=args.pq_subspaces,
+            )
+            if mode == "pq":
+                per_vector = segment.pq_codes.shape[1]
+            elif mode == "int8":
+                per_vector = segment.int8_codes.shape[1]
+            else:
+                per_vector = 4 * DIMENSION
+            # A shortlist of exactly LIMIT rows is the order of the codes alone
+            codes_only, _ = recall(
+                LocalVectorStorage(folder, quantization=mode, rerank_candidates=LIMIT), queries, truth
+            )
+            reranked, elapsed = recall(
+                LocalVectorStorage(folder, quantization=mode, rerank_candidates=args.rerank),
+                queries,
+                truth,
+            )
+        print(f"{mode:6} {per_vector:12d} {list_bytes / per_vector:7.0f}x {codes_only:16.3f} "
+              f"{reranked:17.3f} {1000 * elapsed:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
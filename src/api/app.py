@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from anthropic import AnthropicError
 from anthropic._exceptions import BadRequestError as AnthropicBadRequestError
@@ -11,7 +12,10 @@ from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import ValidationError
 from starlette.responses import JSONResponse
 
+from src.api.container import ProviderContainer
+from src.api.dependencies import get_settings
 from src.api.middleware import RequestContextMiddleware
+from src.api.routes.jobs import router as jobs_router
 from src.api.routes.memos import router as memos_router
 from src.api.routes.search import router as search_router
 from src.core.log import setup_logging
@@ -19,8 +23,16 @@ from src.core.log import setup_logging
 setup_logging()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    container = ProviderContainer(get_settings())
+    await container.start()
+    yield
+    await container.close()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     @app.middleware("http")
     async def exception_handling_middleware(request: Request, call_next):
@@ -84,6 +96,7 @@ def create_app() -> FastAPI:
     )
 
     app.include_router(memos_router)
+    app.include_router(jobs_router)
     app.include_router(search_router)
 
     Instrumentator().instrument(app).expose(app)
@@ -0,0 +1,105 @@
+"""Lifecycle of the process-wide providers.
+
+The providers themselves are the cached ``get_*`` functions in
+``dependencies``: each builds its singleton on first use, so tests and
+scripts work without a lifespan, and ``dependency_overrides`` replaces them
+per route as before. The app's lifespan uses a ``ProviderContainer`` to
+build them before the first request, open provider connections, and close
+everything again on shutdown.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from src.api import dependencies
+from src.config.settings import Settings
+from src.core.services.ingestion import IngestionService
+from src.infrastructure.db.executor import run_io, shutdown_io_executor
+
+# Cleared on shutdown so an app started again in this process rebuilds them
+CACHED_PROVIDERS = (
+    dependencies.get_settings,
+    dependencies.get_local_vector_storage,
+    dependencies.get_hnsw_vector_storage,
+    dependencies.get_openai_client,
+    dependencies.get_anthropic_client,
+    dependencies.get_provider_limiter,
+    dependencies.get_pinecone_vector_storage,
+    dependencies.get_bm25_index,
+    dependencies.get_search_cache,
+    dependencies.get_shared_vectorizer,
+    dependencies.get_id_generator,
+    dependencies.get_memo_store,
+    dependencies.get_job_store,
+    dependencies.get_memo_deduplicator,
+    dependencies.get_ingestion_service,
+)
+
+
+def _built(provider) -> bool:
+    return provider.cache_info().currsize > 0
+
+
+class ProviderContainer:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.ingestion: Optional[IngestionService] = None
+
+    async def start(self):
+        """Build the providers the settings select, then warm their connections"""
+        settings = self.settings
+        dependencies.get_openai_client()
+        dependencies.get_anthropic_client()
+        # Opens or migrates the memo files, and maps the local vector segments
+        dependencies.get_memo_store()
+        dependencies.get_vector_storage(settings)
+        dependencies.get_lexical_index(settings)
+        dependencies.get_search_cache()
+        if settings.embedding_cache or settings.embedding_batching:
+            dependencies.get_shared_vectorizer()
+        if settings.provider_warmup_timeout_seconds > 0:
+            await self.warm()
+        if settings.ingestion_workers > 0:
+            self.ingestion = dependencies.get_ingestion_service()
+            self.ingestion.start()
+
+    async def warm(self):
+        """One cheap call per provider opens its connection pool and TLS session"""
+        calls = {
+            "openai": dependencies.get_openai_client().models.list(),
+            "anthropic": dependencies.get_anthropic_client().models.list(),
+        }
+        if self.settings.vector_backend == "pinecone":
+            index = dependencies.get_pinecone_vector_storage().index
+            calls["pinecone"] = run_io(index.describe_index_stats)
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(call, self.settings.provider_warmup_timeout_seconds)
+                for call in calls.values()
+            ),
+            return_exceptions=True,
+        )
+        for provider, result in zip(calls, results):
+            if isinstance(result, BaseException):
+                # The first request retries the connection, so start anyway
+                logging.warning(
+                    "provider warmup failed",
+                    extra={"provider": provider, "error": repr(result)},
+                )
+
+    async def close(self):
+        """Stop background work, then release connections, files and threads"""
+        if self.ingestion is not None:
+            await self.ingestion.stop()
+        if _built(dependencies.get_openai_client):
+            await dependencies.get_openai_client().close()
+        if _built(dependencies.get_anthropic_client):
+            await dependencies.get_anthropic_client().close()
+        if _built(dependencies.get_pinecone_vector_storage):
+            dependencies.get_pinecone_vector_storage().close()
+        if _built(dependencies.get_memo_store):
+            dependencies.get_memo_store().close()
+        shutdown_io_executor()
+        for provider in CACHED_PROVIDERS:
+            provider.cache_clear()
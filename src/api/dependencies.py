@@ -1,23 +1,50 @@
 from functools import lru_cache
+from typing import Optional
 
-from fastapi import Depends
+from anthropic import AsyncAnthropic
+from fastapi import Depends, Header
+from openai import AsyncOpenAI
 
 from src.config.settings import Settings
 from src.core.processors.audio import AudioProcessor
 from src.core.processors.text import TextProcessor
+from src.core.services.deduplication import MemoDeduplicator
+from src.core.services.ingestion import IngestionService
 from src.core.services.memo import MemoService
 from src.core.services.search import SearchEngine
+from src.core.services.search_cache import SearchCache
 from src.infrastructure.db.base import Storage
+from src.infrastructure.db.executor import configure_io_executor
+from src.infrastructure.db.group_commit import GroupCommitStorage
+from src.infrastructure.db.ids import (IdGenerator, SnowflakeIdGenerator,
+                                       default_id_generator)
 from src.infrastructure.db.local_storage import LocalStorage
+from src.infrastructure.db.log_storage import LogStorage
+from src.infrastructure.db.sqlite_storage import SqliteStorage
+from src.infrastructure.jobs.idempotency_store import IdempotencyStore
+from src.infrastructure.jobs.job_store import JobStore
+from src.infrastructure.lexical.base import LexicalIndex
+from src.infrastructure.lexical.bm25_index import Bm25Index
+from src.infrastructure.rate_limit.limited_providers import (
+    RateLimitedSummarizer, RateLimitedTranscriber, RateLimitedVectorizer)
+from src.infrastructure.rate_limit.provider_limiter import ProviderLimiter
 from src.infrastructure.summarization.base import Summarizer
 from src.infrastructure.summarization.claude_summarizer import ClaudeSummarizer
 from src.infrastructure.transcription.base import Transcriber
 from src.infrastructure.transcription.openai_transcriber import \
     OpenAITranscriber
 from src.infrastructure.vector_db.base import VectorStorage
+from src.infrastructure.vector_db.hnsw_vector_storage import \
+    HnswVectorStorage
+from src.infrastructure.vector_db.local_vector_storage import \
+    LocalVectorStorage
 from src.infrastructure.vector_db.pinecone_vector_storage import \
     PineconeVectorStorage
 from src.infrastructure.vectorization.base import Vectorizer
+from src.infrastructure.vectorization.batching_vectorizer import \
+    BatchingVectorizer
+from src.infrastructure.vectorization.caching_vectorizer import (
+    CachingVectorizer, EmbeddingDiskCache)
 from src.infrastructure.vectorization.open_ai_vectorizer import \
     OpenAIVectorizer
 
@@ -27,26 +54,210 @@ def get_settings() -> Settings:
     return Settings()
 
 
+@lru_cache
+def get_local_vector_storage() -> LocalVectorStorage:
+    settings = get_settings()
+    return LocalVectorStorage(
+        settings.data_folder,
+        quantization=settings.vector_quantization,
+        pq_subspaces=settings.vector_pq_subspaces,
+        rerank_candidates=settings.vector_rerank_candidates,
+    )
+
+
+@lru_cache
+def get_hnsw_vector_storage() -> HnswVectorStorage:
+    settings = get_settings()
+    return HnswVectorStorage(
+        settings.data_folder,
+        m=settings.hnsw_m,
+        ef_construction=settings.hnsw_ef_construction,
+        ef_search=settings.hnsw_ef_search,
+    )
+
+
+def _client_retries(settings: Settings) -> dict:
+    # The rate limiter retries itself, and has to see every 429 to adapt
+    return {"max_retries": 0} if settings.provider_rate_limiting else {}
+
+
+@lru_cache
+def get_openai_client() -> AsyncOpenAI:
+    """One client per process, so its connection pool is shared by all adapters"""
+    settings = get_settings()
+    return AsyncOpenAI(api_key=settings.openai_api_key, **_client_retries(settings))
+
+
+@lru_cache
+def get_anthropic_client() -> AsyncAnthropic:
+    settings = get_settings()
+    return AsyncAnthropic(api_key=settings.claude_api_key, **_client_retries(settings))
+
+
+@lru_cache
+def get_provider_limiter(provider: str) -> Optional[ProviderLimiter]:
+    """One limiter per provider endpoint and process, or None when limiting is off"""
+    settings = get_settings()
+    if not settings.provider_rate_limiting:
+        return None
+    latency_target = settings.provider_latency_target_ms / 1000 or None
+    budgets = {
+        # Whisper latency follows the audio length, so it is no congestion signal
+        "transcription": (settings.transcription_requests_per_minute, 0, None),
+        "embedding": (
+            settings.embedding_requests_per_minute,
+            settings.embedding_tokens_per_minute,
+            latency_target,
+        ),
+        "summary": (
+            settings.summary_requests_per_minute,
+            settings.summary_tokens_per_minute,
+            latency_target,
+        ),
+    }
+    requests_per_minute, tokens_per_minute, latency_target = budgets[provider]
+    return ProviderLimiter(
+        provider,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        max_concurrency=settings.provider_max_concurrency,
+        latency_target=latency_target,
+    )
+
+
+@lru_cache
+def get_pinecone_vector_storage() -> PineconeVectorStorage:
+    settings = get_settings()
+    return PineconeVectorStorage(api_key=settings.pinecone_api_key, host=settings.pinecone_host)
+
+
+@lru_cache
+def get_bm25_index() -> Bm25Index:
+    return Bm25Index(get_settings().data_folder)
+
+
+def get_lexical_index(
+    settings: Settings = Depends(get_settings),
+) -> Optional[LexicalIndex]:
+    if settings.search_mode == "hybrid":
+        return get_bm25_index()
+    return None
+
+
+@lru_cache
+def get_search_cache() -> Optional[SearchCache]:
+    settings = get_settings()
+    if settings.search_cache_max_entries <= 0:
+        return None
+    return SearchCache(
+        max_entries=settings.search_cache_max_entries,
+        ttl_seconds=settings.search_cache_ttl_seconds,
+    )
+
+
 def get_vector_storage(
     settings: Settings = Depends(get_settings),
-) -> PineconeVectorStorage:
-    return PineconeVectorStorage(api_key=settings.pinecone_api_key, host=settings.pinecone_host)
+) -> VectorStorage:
+    if settings.vector_backend == "local":
+        return get_local_vector_storage()
+    if settings.vector_backend == "hnsw":
+        return get_hnsw_vector_storage()
+    return get_pinecone_vector_storage()
+
+
+def get_transcriber(settings: Settings = Depends(get_settings)) -> Transcriber:
+    transcriber = OpenAITranscriber(api_key=settings.openai_api_key, client=get_openai_client())
+    limiter = get_provider_limiter("transcription")
+    return transcriber if limiter is None else RateLimitedTranscriber(transcriber, limiter)
 
 
-def get_transcriber(settings: Settings = Depends(get_settings)) -> OpenAITranscriber:
-    return OpenAITranscriber(api_key=settings.openai_api_key)
+def _rate_limited(vectorizer: Vectorizer) -> Vectorizer:
+    limiter = get_provider_limiter("embedding")
+    return vectorizer if limiter is None else RateLimitedVectorizer(vectorizer, limiter)
 
 
-def get_vectorizer(settings: Settings = Depends(get_settings)) -> OpenAIVectorizer:
-    return OpenAIVectorizer(api_key=settings.openai_api_key)
+@lru_cache
+def get_shared_vectorizer() -> Vectorizer:
+    """One vectorizer per process, so its cache and batches span requests"""
+    settings = get_settings()
+    openai_vectorizer = OpenAIVectorizer(
+        api_key=settings.openai_api_key, client=get_openai_client()
+    )
+    # The limiter sits under the batcher, so it budgets actual requests
+    vectorizer = _rate_limited(openai_vectorizer)
+    if settings.embedding_batching:
+        vectorizer = BatchingVectorizer(
+            vectorizer,
+            max_batch_size=settings.embedding_batch_max_size,
+            max_wait_ms=settings.embedding_batch_max_wait_ms,
+        )
+    if settings.embedding_cache:
+        disk_cache = None
+        if settings.embedding_cache_max_mb > 0:
+            disk_cache = EmbeddingDiskCache(
+                settings.data_folder / "embeddings.sqlite3",
+                max_bytes=int(settings.embedding_cache_max_mb * 2**20),
+            )
+        # Only cache misses reach the batcher
+        vectorizer = CachingVectorizer(
+            vectorizer,
+            model=openai_vectorizer.model,
+            memory_entries=settings.embedding_cache_memory_entries,
+            disk_cache=disk_cache,
+        )
+    return vectorizer
+
+
+def get_vectorizer(settings: Settings = Depends(get_settings)) -> Vectorizer:
+    if settings.embedding_cache or settings.embedding_batching:
+        return get_shared_vectorizer()
+    return _rate_limited(
+        OpenAIVectorizer(api_key=settings.openai_api_key, client=get_openai_client())
+    )
 
 
 def get_summarizer(settings: Settings = Depends(get_settings)) -> Summarizer:
-    return ClaudeSummarizer(api_key=settings.claude_api_key)
+    summarizer = ClaudeSummarizer(api_key=settings.claude_api_key, client=get_anthropic_client())
+    limiter = get_provider_limiter("summary")
+    return summarizer if limiter is None else RateLimitedSummarizer(summarizer, limiter)
 
 
-def get_memo_store(settings: Settings = Depends(get_settings)) -> LocalStorage:
-    return LocalStorage(settings)
+STORAGE_BACKENDS: dict[str, type[Storage]] = {
+    "json": LocalStorage,
+    "log": LogStorage,
+    "sqlite": SqliteStorage,
+}
+
+
+@lru_cache
+def get_id_generator() -> IdGenerator:
+    settings = get_settings()
+    if settings.storage_worker_id is None:
+        return default_id_generator
+    return SnowflakeIdGenerator(settings.storage_worker_id)
+
+
+@lru_cache
+def get_memo_store() -> Storage:
+    """The process-wide memo storage.
+
+    It is built once from ``get_settings()`` rather than the request's
+    settings, because every request has to share its files, caches and group
+    commit queue. Overriding ``get_settings`` therefore does not reach it;
+    override ``get_memo_store`` itself to swap the storage.
+    """
+    settings = get_settings()
+    configure_io_executor(settings.storage_io_threads)
+    storage = STORAGE_BACKENDS[settings.storage_backend](
+        settings, id_generator=get_id_generator()
+    )
+    if settings.storage_group_commit:
+        storage = GroupCommitStorage(
+            storage,
+            max_batch_size=settings.storage_commit_max_batch,
+            max_wait_ms=settings.storage_commit_max_wait_ms,
+        )
+    return storage
 
 
 def get_audio_processor(
@@ -65,8 +276,17 @@ def get_search_engine(
     text_processor: TextProcessor = Depends(get_text_processor),
     vector_storage: VectorStorage = Depends(get_vector_storage),
     storage: Storage = Depends(get_memo_store),
+    lexical_index: Optional[LexicalIndex] = Depends(get_lexical_index),
+    settings: Settings = Depends(get_settings),
 ) -> SearchEngine:
-    return SearchEngine(text_processor=text_processor, vector_storage=vector_storage, storage=storage)
+    return SearchEngine(
+        text_processor=text_processor,
+        vector_storage=vector_storage,
+        storage=storage,
+        lexical_index=lexical_index,
+        vector_timeout=settings.search_vector_timeout_ms / 1000,
+        cache=get_search_cache(),
+    )
 
 
 def get_memo_service(
@@ -75,6 +295,7 @@ def get_memo_service(
     vector_storage: VectorStorage = Depends(get_vector_storage),
     storage: Storage = Depends(get_memo_store),
     summarizer: Summarizer = Depends(get_summarizer),
+    lexical_index: Optional[LexicalIndex] = Depends(get_lexical_index),
 ) -> MemoService:
     return MemoService(
         audio_processor=audio_processor,
@@ -82,4 +303,74 @@ def get_memo_service(
         vector_storage=vector_storage,
         storage=storage,
         summarizer=summarizer,
+        lexical_index=lexical_index,
+        search_cache=get_search_cache(),
     )
+
+
+@lru_cache
+def get_job_store() -> JobStore:
+    settings = get_settings()
+    return JobStore(
+        settings.data_folder,
+        id_generator=get_id_generator(),
+        visibility_timeout=settings.ingestion_visibility_timeout_seconds,
+        max_attempts=settings.ingestion_max_attempts,
+        retry_base=settings.ingestion_retry_base_seconds,
+        retry_max=settings.ingestion_retry_max_seconds,
+    )
+
+
+@lru_cache
+def get_memo_deduplicator() -> Optional[MemoDeduplicator]:
+    settings = get_settings()
+    if not settings.memo_deduplication:
+        return None
+    store = IdempotencyStore(
+        settings.data_folder,
+        ttl=settings.memo_deduplication_ttl_hours * 3600,
+        pending_timeout=settings.memo_deduplication_pending_timeout_seconds,
+    )
+    return MemoDeduplicator(
+        store, get_job_store(), job_wait=settings.memo_deduplication_wait_seconds
+    )
+
+
+@lru_cache
+def get_ingestion_service() -> IngestionService:
+    """Background memo creation, run by this process's workers.
+
+    Jobs run outside any request, so the MemoService is built by calling the
+    providers directly and ``dependency_overrides`` of ``get_memo_service`` or
+    its providers never reach it. Override this provider and
+    ``get_async_ingestion_service`` to replace the service as a whole.
+    """
+    settings = get_settings()
+    vectorizer = get_vectorizer(settings)
+    memo_service = get_memo_service(
+        audio_processor=get_audio_processor(get_transcriber(settings)),
+        text_processor=get_text_processor(vectorizer),
+        vector_storage=get_vector_storage(settings),
+        storage=get_memo_store(),
+        summarizer=get_summarizer(settings),
+        lexical_index=get_lexical_index(settings),
+    )
+    return IngestionService(
+        get_job_store(), memo_service, workers=settings.ingestion_workers
+    )
+
+
+def get_async_ingestion_service(
+    prefer: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings),
+) -> Optional[IngestionService]:
+    """The ingestion service if the client sent ``Prefer: respond-async``.
+
+    Without workers in this process nothing would run a queued job, so the
+    memo is then created inline.
+    """
+    if settings.ingestion_workers <= 0:
+        return None
+    if prefer is not None and "respond-async" in prefer:
+        return get_ingestion_service()
+    return None
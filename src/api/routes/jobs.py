@@ -0,0 +1,69 @@
+import json
+
+from fastapi import APIRouter, Depends, Query, Response
+
+from src.api.dependencies import get_ingestion_service, get_memo_service
+from src.api.schemas import JobResponse
+from src.core.services.ingestion import IngestionService
+from src.core.services.memo import MemoService
+
+router = APIRouter(prefix="/v1/jobs")
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobResponse,
+    summary="Get Memo Job",
+    description="""
+    Report the progress of a memo queued with `Prefer: respond-async`.
+    
+    `status` is one of queued, running, succeeded or failed; a succeeded job includes the memo.
+    Pass `wait` to hold the request open for up to that many seconds until the job finishes.""",
+)
+async def get_job(
+    job_id: str,
+    user_id: str,
+    wait: float = Query(0, ge=0, le=60),
+    ingestion_service: IngestionService = Depends(get_ingestion_service),
+    memo_service: MemoService = Depends(get_memo_service),
+):
+    job = await ingestion_service.get(job_id, user_id, wait)
+    if job is None:
+        return Response(
+            status_code=404, content=json.dumps({"details": "Job not found"})
+        )
+    memo = None
+    if job.memo_id is not None:
+        memo = await memo_service.get_memo(user_id, job.memo_id)
+    return JobResponse.from_job(job, memo)
+
+
+@router.post(
+    "/{job_id}/retry",
+    response_model=JobResponse,
+    status_code=202,
+    summary="Retry Failed Memo Job",
+    description="""
+    Queue a failed memo job again with a fresh set of attempts.
+    
+    The job resumes from its last completed stage. Only jobs whose status is `failed`
+    can be retried; others get `409 Conflict`.""",
+)
+async def retry_job(
+    job_id: str,
+    user_id: str,
+    response: Response,
+    ingestion_service: IngestionService = Depends(get_ingestion_service),
+):
+    job = await ingestion_service.get(job_id, user_id)
+    if job is None:
+        return Response(
+            status_code=404, content=json.dumps({"details": "Job not found"})
+        )
+    retried = await ingestion_service.retry(job) if job.status == "failed" else None
+    if retried is None:
+        return Response(
+            status_code=409, content=json.dumps({"details": "Only failed jobs can be retried"})
+        )
+    response.headers["Location"] = f"/v1/jobs/{job_id}"
+    return JobResponse.from_job(retried)
@@ -1,10 +1,17 @@
 import json
+from typing import Optional
 
-from fastapi import APIRouter, Depends, File, Response, UploadFile
+from fastapi import (APIRouter, Depends, File, Header, Query, Response,
+                     UploadFile)
 
-from src.api.dependencies import get_memo_service
-from src.api.schemas import MemoResponse
+from src.api.dependencies import (get_async_ingestion_service,
+                                  get_memo_deduplicator, get_memo_service)
+from src.api.schemas import JobResponse, MemoListResponse, MemoResponse
+from src.core.context import get_request_id
 from src.core.models import AudioData
+from src.core.services.deduplication import (DuplicateInProgress,
+                                             MemoDeduplicator)
+from src.core.services.ingestion import IngestionService
 from src.core.services.memo import MemoService
 
 router = APIRouter(prefix="/v1/memos")
@@ -12,29 +19,92 @@ router = APIRouter(prefix="/v1/memos")
 
 @router.post(
     "/",
-    response_model=MemoResponse,
+    response_model=MemoResponse | JobResponse,
     summary="Create Voice Memo",
     description="""
     Create a new voice memo from an audio file.
     
     Supported audio formats: flac, m4a, mp3, mp4, mpeg, mpga, oga, ogg, wav, webm
     Maximum file size: 25MB
-    Maximum audio duration: 10 minutes""",
+    Maximum audio duration: 10 minutes
+    
+    With a `Prefer: respond-async` header the audio is queued and the response is
+    `202 Accepted` with a job to poll at `/v1/jobs/{id}` (also in `Location`).
+    
+    Repeating a request with the same `Idempotency-Key` header, or without one
+    but with the same audio, returns the first request's memo or job. A repeat of
+    a queued request that is still running gets `202 Accepted` with its job.""",
+    responses={202: {"model": JobResponse, "description": "Memo creation queued"}},
 )
 async def create_memo(
     user_id: str,
+    response: Response,
     audio: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     memo_service: MemoService = Depends(get_memo_service),
+    ingestion_service: Optional[IngestionService] = Depends(get_async_ingestion_service),
+    deduplicator: Optional[MemoDeduplicator] = Depends(get_memo_deduplicator),
 ):
     audio_data = AudioData(
         file=audio.file,
         format=audio.filename.split(".")[-1],
     )
+    key = None
+    if deduplicator is not None:
+        key = await deduplicator.key(user_id, audio.file, idempotency_key)
+
+    def accepted(job):
+        response.status_code = 202
+        response.headers["Location"] = f"/v1/jobs/{job.id}"
+        return JobResponse.from_job(job)
+
+    if ingestion_service is not None:
+        request_id = get_request_id()
 
-    memo = await memo_service.create_memo_from_audio(audio_data, user_id)
+        def submit():
+            return ingestion_service.submit(audio_data, user_id, request_id)
+
+        if deduplicator is None:
+            job = await submit()
+        else:
+            job = await deduplicator.submit_job(
+                key, user_id, request_id, submit, memo_service.get_memo
+            )
+        return accepted(job)
+
+    def create():
+        return memo_service.create_memo_from_audio(audio_data, user_id)
+
+    if deduplicator is None:
+        memo = await create()
+    else:
+        try:
+            memo = await deduplicator.create_memo(key, user_id, create, memo_service.get_memo)
+        except DuplicateInProgress as exc:
+            # The same audio is still being processed as a job; point at it
+            return accepted(exc.job)
     return MemoResponse.from_memo(memo)
 
 
+@router.get(
+    "/",
+    response_model=MemoListResponse,
+    summary="List Voice Memos",
+    description="""
+    List a user's voice memos, newest first.
+    
+    Pass the returned `next_cursor` as `cursor` to fetch the next page; it is null on the last page.""",
+)
+async def list_memos(
+    user_id: str,
+    cursor: Optional[str] = Query(None, pattern=r"^[0-9]+$"),
+    limit: int = Query(20, ge=1, le=100),
+    memo_service: MemoService = Depends(get_memo_service),
+):
+    page = await memo_service.list_memos(user_id, limit, cursor)
+    return MemoListResponse.from_page(page)
+
+
 @router.delete(
     "/{memo_id}",
     summary="Delete Voice Memo",
@@ -1,9 +1,9 @@
 # src/api/schemas.py
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
-from src.core.models import Memo, SearchResult
+from src.core.models import Job, Memo, MemoPage, SearchResult
 
 
 class MemoCreate(BaseModel):
@@ -27,6 +27,42 @@ class MemoResponse(BaseModel):
         return cls(id=memo.id, text=memo.text, title=memo.title, date=memo.date)
 
 
+class MemoListResponse(BaseModel):
+    """Response schema for a page of memos"""
+
+    results: List[MemoResponse]
+    next_cursor: Optional[str] = None
+
+    @classmethod
+    def from_page(cls, page: MemoPage) -> "MemoListResponse":
+        return cls(
+            results=[MemoResponse.from_memo(memo) for memo in page.memos],
+            next_cursor=page.next_cursor,
+        )
+
+
+class JobResponse(BaseModel):
+    """Response schema for a memo ingestion job"""
+
+    id: str
+    status: str
+    stage: Optional[str] = None
+    memo: Optional[MemoResponse] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    @classmethod
+    def from_job(cls, job: Job, memo: Optional[Memo] = None) -> "JobResponse":
+        return cls(
+            id=job.id,
+            status=job.status,
+            stage=job.stage,
+            memo=MemoResponse.from_memo(memo) if memo is not None else None,
+            error=job.error,
+            attempts=job.attempts,
+        )
+
+
 class SearchQuery(BaseModel):
     """Request schema for search"""
 
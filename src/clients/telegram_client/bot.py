@@ -22,6 +22,7 @@ class AudioMessage:
     duration: int
     user_id: str
     username: str
+    message_id: int
 
 
 class TelegramBot:
@@ -52,6 +53,7 @@ class TelegramBot:
             duration=duration,
             user_id=str(update.effective_chat.id),
             username=update.effective_user.first_name,
+            message_id=update.message.message_id,
         )
 
     async def handle_audio(
@@ -71,7 +73,12 @@ class TelegramBot:
             duration=audio_message.duration,
         )
 
-        stored_memo = await self.memo_client.store_memo(audio, audio_message.user_id)
+        # A redelivered update maps to the memo its first delivery created
+        stored_memo = await self.memo_client.store_memo(
+            audio,
+            audio_message.user_id,
+            idempotency_key=f"telegram:{audio_message.user_id}:{audio_message.message_id}",
+        )
         html = await self.html_processor.process([stored_memo])
         await update.message.reply_html(html)
 
@@ -1,29 +1,58 @@
+from typing import Optional
+
 import httpx
 
 from src.core.context import get_request_id
 from src.core.models import AudioData
 
 
+# Seconds each job status request is held open by the API
+JOB_POLL_WAIT = 30
+
+
 class MemoAPIClient:
     def __init__(self, base_url: str, version: str = "v1"):
         self.client = httpx.AsyncClient(
             base_url=base_url,
             follow_redirects=True,
-            timeout=600,
+            timeout=JOB_POLL_WAIT + 30,
         )
         self.version = version
 
-    async def store_memo(self, audio: AudioData, user_id: str):
+    async def store_memo(
+        self, audio: AudioData, user_id: str, idempotency_key: Optional[str] = None
+    ):
         files = {
             "audio": (f"audio.{audio.format}", audio.file, f"audio/{audio.format}")
         }
+        headers = {"X-Request-ID": get_request_id(), "Prefer": "respond-async"}
+        if idempotency_key is not None:
+            headers["Idempotency-Key"] = idempotency_key
         response = await self.client.post(
             f"/{self.version}/memos",
             params={"user_id": user_id},
             files=files,
-            headers={"X-Request-ID": get_request_id()},
+            headers=headers,
         )
-        return response.json()
+        if response.status_code != 202:
+            return response.json()
+
+        # Long-poll the job instead of holding one request open for the whole pipeline
+        job = response.json()
+        while job["status"] not in ("succeeded", "failed"):
+            response = await self.client.get(
+                f"/{self.version}/jobs/{job['id']}",
+                params={"user_id": user_id, "wait": JOB_POLL_WAIT},
+                headers={"X-Request-ID": get_request_id()},
+            )
+            response.raise_for_status()
+            job = response.json()
+        if job["status"] == "failed":
+            raise RuntimeError(f"Memo job {job['id']} failed: {job['error']}")
+        if job["memo"] is None:
+            # Deleted between the job finishing and this poll
+            raise RuntimeError(f"Memo of job {job['id']} no longer exists")
+        return job["memo"]
 
     async def search_memos(self, query: str, user_id: str):
         response = await self.client.post(
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal, Optional
 
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
@@ -10,6 +11,85 @@ class Settings(BaseSettings):
     pinecone_host: str
     claude_api_key: str
     data_folder: Path
+    storage_backend: Literal["json", "log", "sqlite"] = "json"
+    # Where memo embeddings are searched: Pinecone, or in-process under data_folder
+    vector_backend: Literal["pinecone", "local", "hnsw"] = "pinecone"
+    # HNSW graph tuning: links per node, build beam width and default query beam width
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    # "hybrid" fuses vector results with a local BM25 index and falls back to it
+    # when the vector leg errors or exceeds the timeout
+    search_mode: Literal["vector", "hybrid"] = "vector"
+    search_vector_timeout_ms: float = 2000
+    # Tasks per API worker running memos submitted with `Prefer: respond-async`
+    ingestion_workers: int = 4
+    # Repeated POST /v1/memos with the same Idempotency-Key, or else the same audio,
+    # get the first request's memo or job for this long instead of a new one
+    memo_deduplication: bool = True
+    memo_deduplication_ttl_hours: float = 24
+    # A synchronous duplicate of a queued request waits this long for its job,
+    # then gets 202 Accepted with the job instead of the memo
+    memo_deduplication_wait_seconds: float = 30
+    # A claim whose request died before recording its memo or job is taken over
+    # after this long; keep it above the longest inline memo creation
+    memo_deduplication_pending_timeout_seconds: float = 600
+    # A claimed job whose worker goes silent this long is handed to another one
+    ingestion_visibility_timeout_seconds: float = 300
+    # Failed jobs are retried with exponential backoff, then dead-lettered as failed
+    ingestion_max_attempts: int = 5
+    ingestion_retry_base_seconds: float = 5
+    ingestion_retry_max_seconds: float = 600
+    # Startup opens connections to OpenAI, Anthropic and Pinecone with one cheap
+    # call each, given this long; 0 skips it
+    provider_warmup_timeout_seconds: float = 5
+    # Client-side provider budgets, shared by the coroutines of one worker and
+    # retried on 429 with a pause for all of them; 0 leaves a budget unlimited
+    provider_rate_limiting: bool = False
+    transcription_requests_per_minute: float = 0
+    embedding_requests_per_minute: float = 0
+    embedding_tokens_per_minute: float = 0
+    summary_requests_per_minute: float = 0
+    summary_tokens_per_minute: float = 0
+    # Concurrent calls per provider adapt below this; a 429 or, for embeddings and
+    # summaries, a call slower than the latency target (0 ignores latency) shrinks it
+    provider_max_concurrency: int = 16
+    provider_latency_target_ms: float = 0
+    # Coalesce concurrent embedding calls into one request per batch
+    embedding_batching: bool = False
+    embedding_batch_max_size: int = 64
+    embedding_batch_max_wait_ms: float = 5
+    # Reuse embeddings of repeated texts: an in-process LRU, then a SQLite file
+    # under data_folder shared by workers; 0 MB keeps the memory tier only
+    embedding_cache: bool = False
+    embedding_cache_memory_entries: int = 4096
+    embedding_cache_max_mb: float = 256
+    # Rankings of repeated queries kept per worker; 0 disables the cache. Only
+    # the worker taking a write invalidates, so others may serve stale results
+    # for up to the TTL: enable it with a single worker
+    search_cache_max_entries: int = 0
+    search_cache_ttl_seconds: float = 300
+    # Compressed codes in merged local segments, re-ranked exactly over the best candidates
+    vector_quantization: Literal["none", "int8", "pq"] = "none"
+    vector_pq_subspaces: int = 96
+    vector_rerank_candidates: int = 100
+    # Users kept parsed in memory by the json backend; unset keeps everyone
+    storage_cache_max_users: Optional[int] = None
+    # Target layout for `python -m src.infrastructure.db.sharding`; 0 is a single db.json
+    storage_shard_count: int = 0
+    # Snowflake worker ID (0-1023) of this process, unique among processes sharing
+    # the data or the Pinecone index; unset draws a random one
+    storage_worker_id: Optional[int] = None
+    # Threads running blocking storage I/O off the event loop
+    storage_io_threads: int = 4
+    # Coalesce concurrent memo writes into one flush
+    storage_group_commit: bool = False
+    storage_commit_max_batch: int = 64
+    storage_commit_max_wait_ms: float = 5
+    # Compress memo text in the json backend; plain records stay readable either way
+    storage_compression: Literal["none", "zlib"] = "none"
+    # Train a per-user zlib dictionary once a user has this many memos; 0 disables it
+    storage_compression_dictionary_min_memos: int = 0
 
     model_config = ConfigDict(
         extra="allow",
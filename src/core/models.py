@@ -64,6 +64,53 @@ class Memo(BaseModel):
     )
 
 
+class MemoPage(BaseModel):
+    """One page of a user's memos, newest first"""
+
+    memos: list[Memo]
+    next_cursor: Optional[str] = None
+
+
+class MemoCheckpoint(BaseModel):
+    """Results of the memo creation stages completed so far"""
+
+    transcript: Optional[str] = None
+    title: Optional[str] = None
+    vector: Optional[list[float]] = None
+    # Chosen before the first stage, so every attempt stores the memo under it
+    memo_id: Optional[str] = None
+    # The memo is in storage under ``memo_id``
+    stored: bool = False
+    # The vector and lexical index entries exist
+    indexed: bool = False
+
+    @property
+    def started(self) -> bool:
+        """Some stage has completed, so this resumes an earlier attempt"""
+        return self != MemoCheckpoint()
+
+
+class Job(BaseModel):
+    """Background creation of a memo from uploaded audio"""
+
+    id: str
+    user_id: str
+    # Queued also covers a failed attempt waiting for its retry; failed is final
+    status: Literal["queued", "running", "succeeded", "failed"]
+    # Last pipeline stage the job completed
+    stage: Optional[str] = None
+    memo_id: Optional[str] = None
+    # Error of the last failed attempt
+    error: Optional[str] = None
+    attempts: int = 0
+    created: str
+    updated: str
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+
 class SearchResult(BaseModel):
     """Container for search result"""
 
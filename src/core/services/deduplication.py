@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import logging
+from typing import IO, Awaitable, Callable, Optional, TypeVar
+
+from prometheus_client import Counter
+
+from src.core.models import Job, Memo
+from src.infrastructure.db.executor import run_io
+from src.infrastructure.jobs.idempotency_store import (IdempotencyRecord,
+                                                       IdempotencyStore)
+from src.infrastructure.jobs.job_store import JobStore
+
+MEMO_DUPLICATES = Counter(
+    "memo_duplicate_requests_total",
+    "Memo creation requests answered with the result of an earlier one",
+)
+
+T = TypeVar("T")
+
+
+class DuplicateInProgress(Exception):
+    """The earlier request's job did not finish within the deduplicator's wait"""
+
+    def __init__(self, job: Job):
+        super().__init__(f"job {job.id} is still {job.status}")
+        self.job = job
+
+
+def request_key(user_id: str, audio: IO[bytes], idempotency_key: Optional[str] = None) -> str:
+    """The client's key if it sent one, else a hash of the audio; per user either way"""
+    digest = hashlib.sha256(user_id.encode() + b"\0")
+    if idempotency_key is not None:
+        digest.update(b"key\0" + idempotency_key.encode())
+        return digest.hexdigest()
+    digest.update(b"audio\0")
+    for chunk in iter(lambda: audio.read(1 << 16), b""):
+        digest.update(chunk)
+    audio.seek(0)
+    return digest.hexdigest()
+
+
+class MemoDeduplicator:
+    """Answer repeated memo creation requests with the first one's result.
+
+    The first request for a key claims it in the ``IdempotencyStore`` and
+    runs the pipeline, or queues a job; duplicates arriving meanwhile, from
+    any worker, wait for it and get the same memo or job. A key whose memo
+    was deleted, or whose job failed for good, is free to run again.
+    """
+
+    def __init__(
+        self,
+        store: IdempotencyStore,
+        job_store: JobStore,
+        poll_interval: float = 0.5,
+        job_wait: float = 30,
+    ):
+        self.store = store
+        self.job_store = job_store
+        self.poll_interval = poll_interval
+        # Longest a synchronous duplicate waits for an earlier request's job
+        self.job_wait = job_wait
+        # Set whenever a claim in this process completes or is released
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def key(self, user_id: str, audio: IO[bytes], idempotency_key: Optional[str]) -> str:
+        return await run_io(request_key, user_id, audio, idempotency_key)
+
+    async def _claim(self, key: str, user_id: str) -> Optional[IdempotencyRecord]:
+        """None once this request owns ``key``, else the finished record holding it"""
+        while True:
+            changed = self._changed
+            record = await self.store.claim(key, user_id)
+            if record is None or not record.pending:
+                return record
+            # Claims held by other workers are only seen by polling
+            try:
+                await asyncio.wait_for(changed.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(
+        self, key: str, run: Callable[[], Awaitable[T]], result: Callable[[T], dict]
+    ) -> T:
+        """Run the claimed request, recording ``result(value)`` or releasing the key"""
+        try:
+            value = await run()
+        except BaseException:
+            await self.store.release(key)
+            self._notify()
+            raise
+        await self.store.complete(key, **result(value))
+        self._notify()
+        return value
+
+    async def _finished_job(self, job_id: str) -> Optional[Job]:
+        """The job once finished; raises ``DuplicateInProgress`` after ``job_wait``"""
+        deadline = asyncio.get_running_loop().time() + self.job_wait
+        while True:
+            job = await self.job_store.get(job_id)
+            if job is None or job.finished:
+                return job
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                raise DuplicateInProgress(job)
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    async def create_memo(
+        self,
+        key: str,
+        user_id: str,
+        create: Callable[[], Awaitable[Memo]],
+        load: Callable[[str, str], Awaitable[Optional[Memo]]],
+    ) -> Memo:
+        """Return the memo created for ``key``, running ``create`` only for the first request
+
+        A duplicate of a queued request waits for its job at most ``job_wait``
+        seconds, then gets ``DuplicateInProgress``.
+        """
+        while True:
+            record = await self._claim(key, user_id)
+            if record is None:
+                return await self._run(key, create, lambda memo: {"memo_id": memo.id})
+            memo_id = record.memo_id
+            if record.job_id is not None:
+                job = await self._finished_job(record.job_id)
+                memo_id = job.memo_id if job is not None else None
+            memo = await load(user_id, memo_id) if memo_id is not None else None
+            if memo is not None:
+                MEMO_DUPLICATES.inc()
+                logging.info(
+                    "duplicate memo request", extra={"user_id": user_id, "memo_id": memo.id}
+                )
+                return memo
+            await self.store.forget(record)
+
+    async def submit_job(
+        self,
+        key: str,
+        user_id: str,
+        request_id: str,
+        submit: Callable[[], Awaitable[Job]],
+        load: Callable[[str, str], Awaitable[Optional[Memo]]],
+    ) -> Job:
+        """Return the job queued for ``key``, running ``submit`` only for the first request"""
+        while True:
+            record = await self._claim(key, user_id)
+            if record is None:
+                return await self._run(key, submit, lambda job: {"job_id": job.id})
+            if record.job_id is not None:
+                job = await self.job_store.get(record.job_id)
+                if job is not None and job.status != "failed":
+                    MEMO_DUPLICATES.inc()
+                    return job
+            elif await load(user_id, record.memo_id) is not None:
+                # Created synchronously before; report it as a finished job
+                MEMO_DUPLICATES.inc()
+                return await self.job_store.create_completed(user_id, record.memo_id, request_id)
+            await self.store.forget(record)
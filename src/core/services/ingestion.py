@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from typing import Optional
+
+from src.core.context import set_request_id
+from src.core.models import AudioData, Job, MemoCheckpoint
+from src.core.services.memo import MemoService
+from src.infrastructure.db.executor import run_io
+from src.infrastructure.jobs.job_store import ClaimedJob, JobStore, LeaseLost
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Client errors from a provider would only repeat; anything else may pass"""
+    status = getattr(exc, "status_code", None)
+    if not isinstance(status, int):
+        return True
+    return not 400 <= status < 500 or status in (408, 409, 429)
+
+
+class IngestionService:
+    """Create memos from audio in the background.
+
+    ``submit`` persists the upload and returns a queued job at once; a pool
+    of ``workers`` tasks claims queued jobs, from this process or any other
+    sharing the job store, and runs them through ``MemoService``. Every
+    completed stage is checkpointed in the job store, so a retry, or a job
+    picked up again after its worker died, resumes from the last one. While a
+    job runs its lease is renewed every third of the visibility timeout, so
+    slow stages are not mistaken for a dead worker.
+    """
+
+    def __init__(
+        self,
+        job_store: JobStore,
+        memo_service: MemoService,
+        workers: int = 4,
+        poll_interval: float = 1.0,
+    ):
+        self.job_store = job_store
+        self.memo_service = memo_service
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: list[asyncio.Task] = []
+        # Set whenever a job is queued or changes state in this process
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def submit(self, audio: AudioData, user_id: str, request_id: str) -> Job:
+        data = await run_io(audio.file.read)
+        job = await self.job_store.create(user_id, data, audio.format, request_id)
+        self._notify()
+        return job
+
+    async def get(self, job_id: str, user_id: str, wait: float = 0) -> Optional[Job]:
+        """Return the job, waiting up to ``wait`` seconds for it to finish"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while True:
+            changed = self._changed
+            job = await self.job_store.get(job_id)
+            if job is None or job.user_id != user_id:
+                return None
+            remaining = deadline - loop.time()
+            if job.finished or remaining <= 0:
+                return job
+            # Jobs run by other processes are only seen by polling
+            try:
+                await asyncio.wait_for(changed.wait(), min(remaining, self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+
+    async def retry(self, job: Job) -> Optional[Job]:
+        """Queue a dead-lettered job again; None if it is no longer ``failed``"""
+        if not await self.job_store.requeue(job.id):
+            return None
+        self._notify()
+        return await self.job_store.get(job.id)
+
+    async def _heartbeat(self, claimed: ClaimedJob):
+        while True:
+            await asyncio.sleep(self.job_store.visibility_timeout / 3)
+            try:
+                await self.job_store.renew(claimed)
+            except LeaseLost:
+                # The job's next checkpoint reports the lost lease
+                return
+            except Exception as exc:
+                logging.warning(
+                    "ingestion lease renewal failed",
+                    extra={"job_id": claimed.job.id},
+                    exc_info=exc,
+                )
+
+    async def _run(self, claimed: ClaimedJob, audio: AudioData):
+        job = claimed.job
+        lock = asyncio.Lock()
+
+        async def on_checkpoint(stage: str, checkpoint: MemoCheckpoint):
+            # Serialized so an older snapshot never lands after a newer one
+            async with lock:
+                await self.job_store.checkpoint(claimed, stage, checkpoint)
+            self._notify()
+
+        heartbeat = asyncio.create_task(self._heartbeat(claimed))
+        try:
+            try:
+                memo = await self.memo_service.create_memo_from_audio(
+                    audio,
+                    job.user_id,
+                    # Empty for a fresh job; a requeued dead letter keeps its progress
+                    checkpoint=claimed.checkpoint,
+                    on_checkpoint=on_checkpoint,
+                )
+            finally:
+                heartbeat.cancel()
+            await self.job_store.succeed(claimed, memo.id)
+        except LeaseLost:
+            logging.warning("ingestion job lease lost", extra={"job_id": job.id})
+            return
+        except Exception as exc:
+            try:
+                failed = await self.job_store.fail(
+                    claimed, f"{exc.__class__.__name__}: {exc}", retry=_is_retryable(exc)
+                )
+            except LeaseLost:
+                return
+            logging.error(
+                "ingestion job failed",
+                extra={
+                    "job_id": job.id,
+                    "user_id": job.user_id,
+                    "attempts": failed.attempts,
+                    "status": failed.status,
+                },
+                exc_info=exc,
+            )
+        else:
+            logging.info(
+                "ingestion job finished",
+                extra={"job_id": job.id, "memo_id": memo.id, "attempts": job.attempts},
+            )
+        self._notify()
+
+    async def _wait_for_change(self):
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _work_once(self):
+        claimed = await self.job_store.claim()
+        if claimed is None:
+            await self._wait_for_change()
+            return
+
+        set_request_id(claimed.request_id)
+        self._notify()
+        try:
+            f = open(claimed.audio_path, "rb")
+        except FileNotFoundError as exc:
+            # Another attempt would find no audio either
+            await self.job_store.fail(
+                claimed, f"{exc.__class__.__name__}: audio is missing", retry=False
+            )
+            logging.error("ingestion job audio missing", extra={"job_id": claimed.job.id})
+            self._notify()
+            return
+        with f:
+            await self._run(claimed, AudioData(file=f, format=claimed.audio_path.suffix[1:]))
+
+    async def _work(self):
+        while True:
+            try:
+                await self._work_once()
+            except Exception as exc:
+                # A worker outlives errors such as a locked job database
+                logging.error("ingestion worker error", exc_info=exc)
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logging.info("started ingestion workers", extra={"workers": self.workers})
+
+    async def stop(self):
+        """Cancel the workers; their jobs are claimed again once the leases expire"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -1,13 +1,59 @@
-from typing import Optional
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional
 
-from src.core.models import AudioData, Memo
+from prometheus_client import Histogram
+
+from src.core.models import AudioData, Memo, MemoCheckpoint, MemoPage
 from src.core.processors.audio import AudioProcessor
 from src.core.processors.text import TextProcessor
-from src.infrastructure.db.base import Storage
+from src.core.services.search import memo_document
+from src.core.services.search_cache import SearchCache
+from src.infrastructure.db.base import MemoIdConflict, Storage
+from src.infrastructure.lexical.base import LexicalIndex
 from src.infrastructure.summarization.base import Summarizer
 from src.infrastructure.vector_db.base import VectorStorage
 
 
+MEMO_STAGE_DURATION = Histogram(
+    "memo_pipeline_stage_seconds",
+    "Time spent in each stage of creating a memo from audio",
+    ["stage"],
+)
+
+
+async def _concurrently(*awaitables: Awaitable) -> list:
+    """Await all, cancelling the rest as soon as one fails"""
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+@contextmanager
+def _stage(stage: str, timings: dict[str, float]):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - started
+        MEMO_STAGE_DURATION.labels(stage=stage).observe(timings[stage])
+
+
+async def _timed(stage: str, timings: dict[str, float], awaitable: Awaitable):
+    with _stage(stage, timings):
+        return await awaitable
+
+
+async def _ignore_checkpoint(stage: str, checkpoint: MemoCheckpoint):
+    pass
+
+
 class MemoService:
     """Service responsible for memo creation and management"""
 
@@ -18,46 +64,153 @@ class MemoService:
         vector_storage: VectorStorage,
         storage: Storage,
         summarizer: Summarizer,
+        lexical_index: Optional[LexicalIndex] = None,
+        search_cache: Optional[SearchCache] = None,
     ):
         self.audio_processor = audio_processor
         self.text_processor = text_processor
         self.vector_storage = vector_storage
         self.storage = storage
         self.summarizer = summarizer
+        self.lexical_index = lexical_index
+        self.search_cache = search_cache
 
-    async def create_memo_from_audio(self, audio: AudioData, user_id: str) -> Memo:
-        """Create a new memo from audio input"""
-        # Transcribe and summarize audio
-        transcription = await self.audio_processor.process(audio)
-        memo_summary = await self.summarizer.summarize(transcription.text)
+    async def create_memo_from_audio(
+        self,
+        audio: AudioData,
+        user_id: str,
+        checkpoint: Optional[MemoCheckpoint] = None,
+        on_checkpoint: Optional[Callable[[str, MemoCheckpoint], Awaitable[None]]] = None,
+    ) -> Memo:
+        """Create a new memo from audio input.
 
-        # Generate vector
-        vector_data = await self.text_processor.process(transcription.text)
+        Summary and embedding both need only the transcript, so they run
+        concurrently; once the memo has an ID, the vector upsert, the lexical
+        index update and the read-back of the stored memo overlap too.
 
-        # Store in both databases
-        memo_id = await self.storage.store_memo(
-            text=transcription.text, title=memo_summary.summary, user_id=user_id
-        )
-        await self.vector_storage.store_vector(
-            vector_data.vector, memo_id=memo_id, metadata={"user_id": user_id}
+        After each stage ``on_checkpoint`` is awaited with its name
+        (transcribed, titled, embedded, stored or indexed) and the results so
+        far. Passing those results back as ``checkpoint`` resumes the pipeline
+        after the stages they cover; the memo ID is among them from the start,
+        so an attempt that stored the memo but crashed before recording it is
+        simply overwritten.
+        """
+        on_checkpoint = on_checkpoint or _ignore_checkpoint
+        resumed = checkpoint is not None and checkpoint.started
+        checkpoint = checkpoint.model_copy() if checkpoint is not None else MemoCheckpoint()
+        if checkpoint.memo_id is None:
+            checkpoint.memo_id = self.storage.new_memo_id()
+        timings: dict[str, float] = {}
+        with _stage("total", timings):
+            if checkpoint.transcript is None:
+                transcription = await _timed(
+                    "transcribe", timings, self.audio_processor.process(audio)
+                )
+                checkpoint.transcript = transcription.text
+                await on_checkpoint("transcribed", checkpoint)
+            text = checkpoint.transcript
+
+            async def summarize():
+                summary = await _timed("summarize", timings, self.summarizer.summarize(text))
+                checkpoint.title = summary.summary
+                await on_checkpoint("titled", checkpoint)
+
+            async def vectorize():
+                vector_data = await _timed(
+                    "vectorize", timings, self.text_processor.process(text)
+                )
+                checkpoint.vector = vector_data.vector
+                await on_checkpoint("embedded", checkpoint)
+
+            pending = []
+            if checkpoint.title is None:
+                pending.append(summarize())
+            if checkpoint.vector is None:
+                pending.append(vectorize())
+            await _concurrently(*pending)
+
+            while not checkpoint.stored:
+                try:
+                    checkpoint.memo_id = await _timed(
+                        "store_memo",
+                        timings,
+                        self.storage.store_memo(
+                            text=text,
+                            title=checkpoint.title,
+                            user_id=user_id,
+                            memo_id=checkpoint.memo_id,
+                        ),
+                    )
+                except MemoIdConflict:
+                    # Another memo took the ID first; nothing was written
+                    logging.warning("memo id conflict", extra={"memo_id": checkpoint.memo_id})
+                    checkpoint.memo_id = self.storage.new_memo_id()
+                    continue
+                checkpoint.stored = True
+                await on_checkpoint("stored", checkpoint)
+            memo_id = checkpoint.memo_id
+
+            if checkpoint.indexed:
+                memo = await self.storage.get_memo(user_id, memo_id)
+            else:
+                # Both indexes upsert by memo ID, so repeating this is harmless
+                writes = [
+                    self.storage.get_memo(user_id, memo_id),
+                    _timed(
+                        "store_vector",
+                        timings,
+                        self.vector_storage.store_vector(
+                            checkpoint.vector, memo_id=memo_id, metadata={"user_id": user_id}
+                        ),
+                    ),
+                ]
+                if self.lexical_index is not None:
+                    writes.append(
+                        _timed(
+                            "index_text",
+                            timings,
+                            self.lexical_index.add_document(
+                                user_id, memo_id, memo_document(checkpoint.title, text)
+                            ),
+                        )
+                    )
+                memo, *_ = await _concurrently(*writes)
+                checkpoint.indexed = True
+                await on_checkpoint("indexed", checkpoint)
+            if self.search_cache is not None:
+                self.search_cache.invalidate(user_id)
+        logging.info(
+            "created memo",
+            extra={
+                "user_id": user_id,
+                "memo_id": memo_id,
+                "resumed": resumed,
+                "stage_seconds": timings,
+            },
         )
 
-        memo = await self.storage.get_memo(user_id, memo_id)
         return Memo(
             id=memo_id,
             text=memo.text,
             title=memo.title,
             user_id=user_id,
-            vector=vector_data.vector,
+            vector=checkpoint.vector,
             date=memo.date,
         )
 
+    async def get_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        return await self.storage.get_memo(user_id, memo_id)
+
     async def delete_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
         memo = await self.storage.delete_memo(user_id, memo_id)
         if memo is None:
             return None
 
-        await self.vector_storage.delete_vector(memo_id=memo.id)
+        await self.vector_storage.delete_vector(memo_id=memo.id, user_id=user_id)
+        if self.lexical_index is not None:
+            await self.lexical_index.delete_document(user_id, memo.id)
+        if self.search_cache is not None:
+            self.search_cache.invalidate(user_id)
         return Memo(
             id=memo_id,
             text=memo.text,
@@ -65,3 +218,13 @@ class MemoService:
             user_id=user_id,
             date=memo.date,
         )
+
+    async def list_memos(
+        self, user_id: str, limit: int, cursor: Optional[str] = None
+    ) -> MemoPage:
+        """Return up to ``limit`` memos older than ``cursor``, newest first"""
+        # One extra row tells whether another page exists
+        memos = await self.storage.list_memos(user_id, limit + 1, before=cursor)
+        if len(memos) <= limit:
+            return MemoPage(memos=memos)
+        return MemoPage(memos=memos[:limit], next_cursor=memos[limit - 1].id)
@@ -1,36 +1,164 @@
+import asyncio
 import logging
+from typing import Optional
 
 from src.core.models import SearchResult
 from src.core.processors.text import TextProcessor
+from src.core.services.search_cache import SearchCache
 from src.infrastructure.db.base import Storage
+from src.infrastructure.lexical.base import LexicalIndex
 from src.infrastructure.vector_db.base import VectorStorage
 
+BACKFILL_PAGE = 500
+
+
+def memo_document(title: str, text: str) -> str:
+    """Text of a memo as the lexical index sees it"""
+    return f"{title}\n{text}"
+
 
 class SearchEngine:
+    """Semantic search, optionally fused with a local lexical index.
+
+    With a ``lexical_index`` both legs run concurrently and their rankings are
+    merged with reciprocal rank fusion, ``sum(1 / (rrf_k + rank))``. If the
+    vector leg fails or takes longer than ``vector_timeout`` seconds, the
+    lexical ranking is returned alone; if the lexical leg fails, the vector one.
+
+    A ``cache`` keeps rankings of repeated queries, except those served with
+    a leg missing. Cached memos are still
+    read from storage, so a memo deleted by another worker is never shown.
+    """
+
     def __init__(
         self,
         text_processor: TextProcessor,
         vector_storage: VectorStorage,
         storage: Storage,
+        lexical_index: Optional[LexicalIndex] = None,
+        vector_timeout: Optional[float] = None,
+        rrf_k: int = 60,
+        fusion_depth: int = 20,
+        cache: Optional[SearchCache] = None,
     ):
         self.text_processor = text_processor
         self.vector_storage = vector_storage
         self.storage = storage
+        self.lexical_index = lexical_index
+        self.vector_timeout = vector_timeout
+        self.rrf_k = rrf_k
+        self.fusion_depth = fusion_depth
+        self.cache = cache
 
-    async def search(self, query: str, user_id: str, limit: int) -> list[SearchResult]:
-
+    async def _vector_search(self, query: str, user_id: str, limit: int) -> list[dict]:
         # Convert text to vector
         vector_data = await self.text_processor.process(query)
 
         # Search vector database
-        vector_results = await self.vector_storage.search(
-            vector_data.vector, user_id, limit
+        return await self.vector_storage.search(vector_data.vector, user_id, limit)
+
+    async def _ensure_indexed(self, user_id: str):
+        """Add memos written before the lexical index existed"""
+        if await self.lexical_index.is_indexed(user_id):
+            return
+        documents: dict[str, str] = {}
+        cursor = None
+        while True:
+            page = await self.storage.list_memos(user_id, BACKFILL_PAGE, before=cursor)
+            documents.update((m.id, memo_document(m.title, m.text)) for m in page)
+            if len(page) < BACKFILL_PAGE:
+                break
+            cursor = page[-1].id
+        await self.lexical_index.add_documents(user_id, documents)
+        logging.info(
+            "indexed memos for lexical search",
+            extra={"user_id": user_id, "memos": len(documents)},
         )
 
-        # Fetch full texts from database
+    async def _hybrid_search(
+        self, query: str, user_id: str, limit: int
+    ) -> tuple[list[dict], bool]:
+        """The fused ranking, and whether a leg was missing from it"""
+        depth = max(limit, self.fusion_depth)
+        vector_task = asyncio.create_task(self._vector_search(query, user_id, depth))
+        rankings = []
+        degraded = False
+        try:
+            await self._ensure_indexed(user_id)
+            rankings.append(await self.lexical_index.search(query, user_id, depth))
+        except Exception as exc:
+            degraded = True
+            logging.warning(
+                "lexical search unavailable, serving vector results",
+                extra={
+                    "user_id": user_id,
+                    "exception_type": exc.__class__.__name__,
+                    "exception_message": str(exc),
+                },
+            )
+        except BaseException:
+            vector_task.cancel()
+            raise
+
+        if not rankings:
+            # Nothing to fall back to, so the vector leg gets all the time it needs
+            rankings.append(await vector_task)
+        else:
+            try:
+                rankings.append(await asyncio.wait_for(vector_task, self.vector_timeout))
+            except Exception as exc:
+                degraded = True
+                logging.warning(
+                    "vector search unavailable, serving lexical results",
+                    extra={
+                        "user_id": user_id,
+                        "exception_type": exc.__class__.__name__,
+                        "exception_message": str(exc),
+                    },
+                )
+
+        fused: dict[str, float] = {}
+        metadata: dict[str, dict] = {}
+        for ranking in rankings:
+            for rank, result in enumerate(ranking, start=1):
+                fused[result["id"]] = fused.get(result["id"], 0.0) + 1 / (self.rrf_k + rank)
+                metadata[result["id"]] = result["metadata"]
+        # Scaled so a memo ranked first by every leg scores 1
+        best = len(rankings) / (self.rrf_k + 1)
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+        results = [
+            {"id": memo_id, "score": min(score / best, 1.0), "metadata": metadata[memo_id]}
+            for memo_id, score in ranked
+        ]
+        return results, degraded
+
+    async def _rank(self, query: str, user_id: str, limit: int) -> tuple[list[dict], bool]:
+        if self.lexical_index is None:
+            return await self._vector_search(query, user_id, limit), False
+        return await self._hybrid_search(query, user_id, limit)
+
+    async def search(self, query: str, user_id: str, limit: int) -> list[SearchResult]:
+        if self.cache is None:
+            vector_results, _ = await self._rank(query, user_id, limit)
+        else:
+            generation = self.cache.generation(user_id)
+            vector_results = self.cache.get(user_id, generation, query, limit)
+            if vector_results is None:
+                vector_results, degraded = await self._rank(query, user_id, limit)
+                # A ranking missing a leg would outlive the outage that caused it
+                if not degraded:
+                    self.cache.put(user_id, generation, query, limit, vector_results)
+
+        if not vector_results:
+            return []
+
+        # Fetch full texts from database in one round trip
+        memos = await self.storage.get_memos(
+            user_id, [vec_result["id"] for vec_result in vector_results]
+        )
         results = []
         for vec_result in vector_results:
-            memo = await self.storage.get_memo(user_id, vec_result["id"])
+            memo = memos.get(vec_result["id"])
             if memo is None:
                 logging.warning(
                     f"Memo {vec_result['id']} found in vector storage but missing from main storage",
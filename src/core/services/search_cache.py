@@ -0,0 +1,63 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from prometheus_client import Counter
+
+SEARCH_CACHE_REQUESTS = Counter(
+    "search_cache_requests_total",
+    "Search result cache lookups",
+    ["result"],
+)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+class SearchCache:
+    """LRU cache of search rankings with a time-to-live.
+
+    Entries are keyed by ``(user_id, generation, normalized query, limit)``.
+    Bumping a user's generation on every memo write makes their older entries
+    unreachable; they age out of the LRU order instead of being scanned for.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+
+    def generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    def invalidate(self, user_id: str):
+        """Drop every cached search of the user"""
+        self._generations[user_id] = self.generation(user_id) + 1
+
+    def get(
+        self, user_id: str, generation: int, query: str, limit: int
+    ) -> Optional[list[dict]]:
+        key = (user_id, generation, normalize_query(query), limit)
+        entry = self._entries.get(key) if generation == self.generation(user_id) else None
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            SEARCH_CACHE_REQUESTS.labels(result="miss").inc()
+            return None
+        self._entries.move_to_end(key)
+        SEARCH_CACHE_REQUESTS.labels(result="hit").inc()
+        return entry[1]
+
+    def put(
+        self, user_id: str, generation: int, query: str, limit: int, results: list[dict]
+    ):
+        if generation != self.generation(user_id) or self.max_entries <= 0:
+            # A write landed while searching, so the ranking may be stale already
+            return
+        key = (user_id, generation, normalize_query(query), limit)
+        self._entries[key] = (time.monotonic() + self.ttl, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
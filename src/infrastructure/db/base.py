@@ -2,20 +2,69 @@ from abc import ABC, abstractmethod
 from typing import Optional
 
 from src.core.models import Memo
+from src.infrastructure.db.ids import IdGenerator, default_id_generator
+
+
+class MemoIdConflict(Exception):
+    """A caller-chosen memo ID already holds a different memo"""
 
 
 class Storage(ABC):
+    def __init__(self, id_generator: Optional[IdGenerator] = None):
+        self.id_generator = id_generator or default_id_generator
+
     @abstractmethod
-    async def store_memo(self, text: str, title: str, user_id: str) -> str:
-        """Store memo text and return memo ID"""
+    async def store_memo(
+        self, text: str, title: str, user_id: str, memo_id: Optional[str] = None
+    ) -> str:
+        """Store memo text and return memo ID.
+
+        With ``memo_id`` (from ``new_memo_id``) the memo is written under that
+        ID, so repeating the call is harmless. If a memo with other text or
+        title is stored there, ``MemoIdConflict`` is raised and nothing is written.
+        """
         pass
 
+    async def store_memos(self, memos: list[dict]) -> list[str]:
+        """Store several memos in one durable write and return their IDs.
+
+        Each item holds the keyword arguments of ``store_memo``.
+        """
+        return [await self.store_memo(**memo) for memo in memos]
+
     @abstractmethod
     async def get_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
         """Retrieve memo by ID"""
         pass
 
+    @abstractmethod
+    async def get_memos(self, user_id: str, memo_ids: list[str]) -> dict[str, Memo]:
+        """Retrieve several memos at once, keyed by ID; missing IDs are omitted"""
+        pass
+
+    @abstractmethod
+    async def list_memos(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> list[Memo]:
+        """List memos newest first, with IDs strictly between ``after`` and ``before``"""
+        pass
+
     @abstractmethod
     async def delete_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
         """Delete memo by ID"""
         pass
+
+    def close(self):
+        """Release files and connections held by the backend"""
+        pass
+
+    def new_memo_id(self) -> str:
+        """An ID to store a memo under later"""
+        return self._generate_id()
+
+    def _generate_id(self) -> str:
+        return self.id_generator.generate()
@@ -0,0 +1,111 @@
+"""Per-record compression of memo text.
+
+Records without a ``v`` field are the original plain layout with a ``text``
+field. Version 1 records hold ``text_z``: base64 of the zlib-compressed text,
+optionally primed with a preset dictionary named by ``zd``. Dictionaries are
+immutable, content-addressed files in ``<data_folder>/dictionaries`` so every
+worker decodes the same bytes.
+"""
+
+import base64
+import os
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+RECORD_VERSION = 1
+# zlib only looks back 32 KiB, so a larger preset dictionary is wasted
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+
+def train_dictionary(samples: list[str], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """Build a zlib preset dictionary from phrases recurring across ``samples``.
+
+    zlib favours matches close to the data, so the most frequent phrases are
+    placed at the end of the dictionary.
+    """
+    counts: Counter[str] = Counter()
+    for sample in samples:
+        words = sample.split()
+        counts.update(
+            {" ".join(words[i : i + 3]) + " " for i in range(len(words) - 2)}
+        )
+
+    pieces, total = [], 0
+    for phrase, count in counts.most_common():
+        if count < 2:
+            break
+        encoded = phrase.encode()
+        if total + len(encoded) > size:
+            break
+        pieces.append(encoded)
+        total += len(encoded)
+    return b"".join(reversed(pieces))
+
+
+class DictionaryStore:
+    """Content-addressed preset dictionaries shared by all workers"""
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self._cache: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, dictionary_id: str) -> bytes:
+        with self._lock:
+            if dictionary_id not in self._cache:
+                with open(self.folder / f"{dictionary_id}.zdict", "rb") as f:
+                    self._cache[dictionary_id] = f.read()
+            return self._cache[dictionary_id]
+
+    def add(self, dictionary: bytes) -> str:
+        dictionary_id = f"{zlib.crc32(dictionary):08x}{len(dictionary):x}"
+        path = self.folder / f"{dictionary_id}.zdict"
+        if not path.exists():
+            self.folder.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(dictionary)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._cache[dictionary_id] = dictionary
+        return dictionary_id
+
+
+class TextCodec:
+    """Encode and decode the text of stored memo records"""
+
+    def __init__(self, dictionaries: DictionaryStore, level: int = 6):
+        self.dictionaries = dictionaries
+        self.level = level
+
+    def encode(self, text: str, dictionary_id: Optional[str] = None) -> dict:
+        """Return the record fields holding ``text`` in the current format"""
+        if dictionary_id is None:
+            compressor = zlib.compressobj(self.level)
+        else:
+            zdict = self.dictionaries.get(dictionary_id)
+            compressor = zlib.compressobj(self.level, zdict=zdict)
+        data = compressor.compress(text.encode()) + compressor.flush()
+        fields = {"v": RECORD_VERSION, "text_z": base64.b64encode(data).decode()}
+        if dictionary_id is not None:
+            fields["zd"] = dictionary_id
+        return fields
+
+    def decode(self, record: dict) -> str:
+        version = record.get("v")
+        if version is None:
+            return record["text"]
+        if version != RECORD_VERSION:
+            raise ValueError(f"Unsupported memo record version {version}")
+
+        if "zd" in record:
+            decompressor = zlib.decompressobj(zdict=self.dictionaries.get(record["zd"]))
+        else:
+            decompressor = zlib.decompressobj()
+        data = base64.b64decode(record["text_z"])
+        return (decompressor.decompress(data) + decompressor.flush()).decode()
@@ -0,0 +1,42 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def configure_io_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Create the thread pool that runs blocking storage I/O"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+    _executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="storage-io"
+    )
+    logging.info("configured storage io executor", extra={"threads": max_workers})
+    return _executor
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    if _executor is None:
+        return configure_io_executor(4)
+    return _executor
+
+
+def shutdown_io_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_io(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking call on the storage I/O pool without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_io_executor(), functools.partial(func, *args, **kwargs)
+    )
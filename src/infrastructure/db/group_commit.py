@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from typing import Optional
+
+from prometheus_client import Histogram
+
+from src.core.models import Memo
+from src.infrastructure.db.base import MemoIdConflict, Storage
+
+COMMIT_BATCH_SIZE = Histogram(
+    "memo_storage_commit_batch_size",
+    "Number of memos written by one group commit",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+COMMIT_DURATION = Histogram(
+    "memo_storage_commit_duration_seconds",
+    "Time spent in one group commit flush",
+)
+
+
+class GroupCommitStorage(Storage):
+    """Coalesce concurrent ``store_memo`` calls into batched durable flushes.
+
+    The first write opens a batch; writes arriving within ``max_wait_ms`` (or
+    until ``max_batch_size`` is reached) join it, and the whole batch goes to
+    the wrapped storage's ``store_memos`` in one call. Each caller resumes only
+    after that flush has finished. Reads and deletes go straight through.
+    """
+
+    def __init__(
+        self, storage: Storage, max_batch_size: int = 64, max_wait_ms: float = 5
+    ):
+        super().__init__()
+        self.storage = storage
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _enqueue(self, item: tuple[dict, asyncio.Future]):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._flusher = None
+        self._queue.put_nowait(item)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._run(self._queue))
+
+    async def _collect(self, queue: asyncio.Queue) -> list[tuple[dict, asyncio.Future]]:
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue):
+        # The flusher exits once the queue drains and is restarted on demand
+        while not queue.empty():
+            batch = await self._collect(queue)
+            COMMIT_BATCH_SIZE.observe(len(batch))
+            try:
+                with COMMIT_DURATION.time():
+                    memo_ids = await self.storage.store_memos([m for m, _ in batch])
+            except MemoIdConflict:
+                # Nothing was written; store one by one so only the conflict fails
+                await self._store_each(batch)
+                continue
+            except Exception as exc:
+                logging.error(
+                    "group commit failed",
+                    extra={"batch_size": len(batch)},
+                    exc_info=exc,
+                )
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future), memo_id in zip(batch, memo_ids):
+                if not future.done():
+                    future.set_result(memo_id)
+
+    async def _store_each(self, batch: list[tuple[dict, asyncio.Future]]):
+        for memo, future in batch:
+            try:
+                memo_id = await self.storage.store_memo(**memo)
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(memo_id)
+
+    async def store_memo(
+        self, text: str, title: str, user_id: str, memo_id: Optional[str] = None
+    ) -> str:
+        """Queue the memo for the next group commit and wait for it"""
+        future = asyncio.get_running_loop().create_future()
+        memo = {"text": text, "title": title, "user_id": user_id, "memo_id": memo_id}
+        self._enqueue((memo, future))
+        return await future
+
+    async def store_memos(self, memos: list[dict]) -> list[str]:
+        return await self.storage.store_memos(memos)
+
+    def new_memo_id(self) -> str:
+        return self.storage.new_memo_id()
+
+    async def get_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        return await self.storage.get_memo(user_id, memo_id)
+
+    async def get_memos(self, user_id: str, memo_ids: list[str]) -> dict[str, Memo]:
+        return await self.storage.get_memos(user_id, memo_ids)
+
+    async def list_memos(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> list[Memo]:
+        return await self.storage.list_memos(user_id, limit, before, after)
+
+    async def delete_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        return await self.storage.delete_memo(user_id, memo_id)
+
+    def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+        self.storage.close()
@@ -0,0 +1,126 @@
+import os
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+# Snowflake layout: 41 bits of milliseconds since EPOCH, 10 bits of worker id,
+# 12 bits of per-millisecond sequence. The result fits a signed 64-bit integer
+# and is written as plain decimal so it stays usable in /del_<id> commands.
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+EPOCH_MS = int(EPOCH.timestamp() * 1000)
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+# CRC IDs of memos stored before snowflakes; every snowflake ID is above it
+LEGACY_ID_LIMIT = 1 << 20
+
+
+class IdGenerator(ABC):
+    @abstractmethod
+    def generate(self) -> str:
+        """Return a new unique memo ID"""
+        pass
+
+
+class SnowflakeIdGenerator(IdGenerator):
+    """Monotonic, time-ordered 63-bit IDs.
+
+    IDs from one generator strictly increase, even if the wall clock steps
+    back. Comparing IDs as integers orders memos by creation time, which lets
+    storage backends answer newest-first and date-range scans from the ID
+    order alone; legacy CRC IDs (at most 20 bits) sort before all of them.
+
+    Processes sharing a store, or a Pinecone index, need distinct
+    ``worker_id`` values. Without one a random ID is drawn, since PIDs repeat
+    across containers.
+    """
+
+    def __init__(self, worker_id: Optional[int] = None):
+        if worker_id is None:
+            worker_id = secrets.randbelow(MAX_WORKER + 1)
+            # Forked uvicorn workers must not share the parent's worker id
+            os.register_at_fork(after_in_child=self._reset_worker_id)
+        if not 0 <= worker_id <= MAX_WORKER:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER}")
+        self.worker_id = worker_id
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _reset_worker_id(self):
+        self.worker_id = secrets.randbelow(MAX_WORKER + 1)
+
+    def generate(self) -> str:
+        with self._lock:
+            now_ms = max(int(time.time() * 1000) - EPOCH_MS, self._last_ms)
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond, borrow the next one
+                    now_ms += 1
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            return str(
+                (now_ms << (WORKER_BITS + SEQUENCE_BITS))
+                | (self.worker_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+
+def id_from_datetime(date: datetime) -> str:
+    """Smallest ID that could have been generated at ``date``.
+
+    Memos created at or after ``date`` have IDs >= this value, so it converts a
+    date range into an ID range. Naive datetimes are taken as local time.
+    """
+    ms = int(date.timestamp() * 1000) - EPOCH_MS
+    return str(max(ms, 0) << (WORKER_BITS + SEQUENCE_BITS))
+
+
+def newest_page(
+    sorted_ids: list[int],
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    legacy_date: Optional[Callable[[int], str]] = None,
+) -> list[str]:
+    """Up to ``limit`` IDs strictly between ``after`` and ``before``, newest first.
+
+    Legacy CRC IDs say nothing about age, so they come after every snowflake
+    ID, ordered by the date ``legacy_date`` returns for each; it is only
+    called when the page or a cursor reaches them. A legacy cursor that is
+    no longer stored is placed by its ID instead.
+    """
+    split = bisect_left(sorted_ids, LEGACY_ID_LIMIT)
+    legacy: Optional[list[int]] = None
+
+    def legacy_ids() -> list[int]:
+        nonlocal legacy
+        if legacy is None:
+            legacy = sorted_ids[:split]
+            if legacy_date is not None:
+                legacy.sort(key=lambda memo_id: (legacy_date(memo_id), memo_id))
+        return legacy
+
+    def position(memo_id: str, inclusive: bool) -> int:
+        memo_id = int(memo_id)
+        index = bisect_left(sorted_ids, memo_id)
+        if index < split and sorted_ids[index] == memo_id:
+            return legacy_ids().index(memo_id) + inclusive
+        return bisect_right(sorted_ids, memo_id) if inclusive else index
+
+    end = position(before, False) if before is not None else len(sorted_ids)
+    start = position(after, True) if after is not None else 0
+    page = range(end - 1, max(start, end - limit) - 1, -1)
+    return [
+        str(sorted_ids[i] if i >= split else legacy_ids()[i]) for i in page
+    ]
+
+
+default_id_generator = SnowflakeIdGenerator()
@@ -0,0 +1,139 @@
+import fcntl
+import json
+import os
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+class JsonDbCache:
+    """Parsed, in-process copy of a ``{user_id: {memo_id: memo}}`` JSON file.
+
+    The copy is trusted only while the file's ``(inode, mtime, size)`` matches
+    what was last read or written, so edits made by other workers sharing the
+    same data folder are picked up on the next access. Writes replace the file
+    atomically under an exclusive ``flock`` and bump ``generation``.
+
+    With ``max_users`` set only the most recently used users stay resident;
+    a miss on an evicted user re-parses the file.
+    """
+
+    def __init__(self, path: Path, max_users: Optional[int] = None):
+        self.path = path
+        self.lock_path = path.with_name(path.name + ".lock")
+        self.max_users = max_users
+        self.generation = 0
+
+        self._lock = threading.RLock()
+        self._users: OrderedDict[str, dict] = OrderedDict()
+        self._sorted_ids: dict[str, list[int]] = {}
+        self._complete = False
+        self._signature: Optional[tuple[int, int, int]] = None
+
+    def _stat(self) -> Optional[tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _validate(self):
+        signature = self._stat()
+        if signature != self._signature:
+            self._users.clear()
+            self._sorted_ids.clear()
+            self._complete = False
+            self._signature = signature
+
+    def _parse(self) -> dict:
+        if self._signature is None:
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _remember(self, user_id: str, memos: dict):
+        previous = self._users.get(user_id)
+        sorted_ids = self._sorted_ids.get(user_id)
+        if sorted_ids is not None and previous is not None:
+            # Keep the listing index in step with the written memos
+            for memo_id in previous.keys() - memos.keys():
+                del sorted_ids[bisect_left(sorted_ids, int(memo_id))]
+            for memo_id in memos.keys() - previous.keys():
+                insort(sorted_ids, int(memo_id))
+        else:
+            self._sorted_ids.pop(user_id, None)
+        self._users[user_id] = memos
+        self._users.move_to_end(user_id)
+        if self.max_users is not None:
+            while len(self._users) > self.max_users:
+                evicted, _ = self._users.popitem(last=False)
+                self._sorted_ids.pop(evicted, None)
+                self._complete = False
+
+    def _load_all(self) -> dict:
+        db = self._parse()
+        if self.max_users is None:
+            self._users = OrderedDict(db)
+            self._sorted_ids.clear()
+            self._complete = True
+        return db
+
+    def get_user(self, user_id: str) -> dict[str, dict]:
+        """Return the memos of ``user_id``; callers must treat it as read-only"""
+        with self._lock:
+            self._validate()
+            if user_id in self._users:
+                self._users.move_to_end(user_id)
+                return self._users[user_id]
+            if self._complete:
+                return {}
+
+            memos = self._load_all().get(user_id, {})
+            self._remember(user_id, memos)
+            return memos
+
+    def get_user_index(self, user_id: str) -> tuple[dict[str, dict], list[int]]:
+        """Return the user's memos along with their IDs in ascending order"""
+        with self._lock:
+            memos = self.get_user(user_id)
+            if user_id not in self._sorted_ids:
+                # Built once per load; writes in this process update it in place
+                self._sorted_ids[user_id] = sorted(int(memo_id) for memo_id in memos)
+            return memos, self._sorted_ids[user_id]
+
+    @contextmanager
+    def transaction(self, *user_ids: str) -> Iterator[dict]:
+        """Yield the whole database for modification and persist it on exit.
+
+        Only the ``flock`` is held while the file is written, so readers keep
+        being served from the previous snapshot until the new file is in place.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with self._lock:
+                    self._validate()
+                    db = dict(self._users) if self._complete else self._load_all()
+                for user_id in user_ids:
+                    db[user_id] = dict(db.get(user_id, {}))
+                yield db
+                self._write(db)
+                with self._lock:
+                    self._signature = self._stat()
+                    self.generation += 1
+                    for user_id in user_ids:
+                        self._remember(user_id, db[user_id])
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write(self, db: dict):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(db, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
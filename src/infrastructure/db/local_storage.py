@@ -1,81 +1,212 @@
 import json
 import logging
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
-from zlib import crc32
 
 from src.config.settings import Settings
 from src.core.models import Memo
-from src.infrastructure.db.base import Storage
+from src.infrastructure.db.base import MemoIdConflict, Storage
+from src.infrastructure.db.compression import (DictionaryStore, TextCodec,
+                                               train_dictionary)
+from src.infrastructure.db.executor import run_io
+from src.infrastructure.db.ids import IdGenerator, newest_page
+from src.infrastructure.db.json_cache import JsonDbCache
+from src.infrastructure.db.sharding import (layout_lock, manifest_path,
+                                            read_shard_count, shard_path)
 
 
 class LocalStorage(Storage):
 
-    def __init__(self, settings: Settings):
-        super().__init__()
-        self.db_file = Path(settings.data_folder / "db.json")
+    def __init__(self, settings: Settings, id_generator: Optional[IdGenerator] = None):
+        super().__init__(id_generator)
+        self.data_folder = Path(settings.data_folder)
+        self.db_file = self.data_folder / "db.json"
+        self.cache_max_users = settings.storage_cache_max_users
+        self.compression = settings.storage_compression
+        self.dictionary_min_memos = settings.storage_compression_dictionary_min_memos
+        self.codec = TextCodec(DictionaryStore(self.data_folder / "dictionaries"))
+        self._caches: dict[Path, JsonDbCache] = {}
+        self._caches_lock = threading.Lock()
+        self._manifest_signature = None
+        self._shard_count = 0
         self._ensure_file_exists()
-        logging.info("initialized local db")
+        logging.info("initialized local db", extra={"shards": self._layout()})
 
     def _ensure_file_exists(self):
-        if not os.path.exists(self.db_file):
-            json.dump({}, open(self.db_file, "w"), indent=4, ensure_ascii=False)
+        if not os.path.exists(self.db_file) and read_shard_count(self.data_folder) == 0:
+            with open(self.db_file, "w") as f:
+                json.dump({}, f, indent=4, ensure_ascii=False)
 
-    def _generate_id(self, text: str, title: str, user_id: str, date: datetime):
-        message_data = f"{user_id}:{date.isoformat()}:{title}:{text}"
-        crc = crc32(message_data.encode()) & 0xFFFFF
-        return str(abs(crc))
+    def _layout(self) -> int:
+        """Current shard count, re-read whenever the manifest changes"""
+        manifest = manifest_path(self.data_folder)
+        try:
+            stat = os.stat(manifest)
+            signature = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+        if signature != self._manifest_signature:
+            shard_count = read_shard_count(self.data_folder)
+            if shard_count != self._shard_count:
+                # A reshard removed the old layout's files
+                with self._caches_lock:
+                    self._caches.clear()
+            self._shard_count = shard_count
+            self._manifest_signature = signature
+        return self._shard_count
 
-    async def store_memo(self, text: str, title: str, user_id: str) -> str:
-        """Store memo text and return memo ID"""
-        db = json.load(open(self.db_file))
+    def _shard(self, user_id: str) -> JsonDbCache:
+        path = shard_path(self.data_folder, self._layout(), user_id)
+        with self._caches_lock:
+            if path not in self._caches:
+                self._caches[path] = JsonDbCache(path, max_users=self.cache_max_users)
+            return self._caches[path]
+
+    @contextmanager
+    def _transaction(self, user_id: str):
+        with layout_lock(self.data_folder):
+            with self._shard(user_id).transaction(user_id) as db:
+                yield db
+
+    def _to_memo(self, user_id: str, memo_id: str, memo: dict) -> Memo:
+        return Memo(
+            id=memo_id,
+            text=self.codec.decode(memo),
+            title=memo["title"],
+            date=memo["date"],
+            user_id=user_id,
+        )
+
+    def _store_memo(
+        self, text: str, title: str, user_id: str, memo_id: Optional[str] = None
+    ) -> str:
+        memo = {"text": text, "title": title, "user_id": user_id, "memo_id": memo_id}
+        return self._store_memos([memo])[0]
+
+    def _check_memo_id(self, user_memos: dict[str, dict], memo: dict):
+        stored = user_memos.get(memo["memo_id"])
+        if stored is not None and (self.codec.decode(stored), stored["title"]) != (
+            memo["text"],
+            memo["title"],
+        ):
+            raise MemoIdConflict(f"Memo ID {memo['memo_id']} holds another memo")
+
+    def _store_memos(self, memos: list[dict]) -> list[str]:
         message_date = datetime.now()
-        memo_id = self._generate_id(text, title, user_id, message_date)
-        if user_id in db:
-            db[user_id][memo_id] = {
-                "text": text,
-                "title": title,
-                "date": message_date.isoformat(),
-            }
-        else:
-            db[user_id] = {
-                memo_id: {
-                    "text": text,
-                    "title": title,
-                    "date": message_date.isoformat(),
-                }
-            }
-        json.dump(db, open(self.db_file, "w"), indent=4, ensure_ascii=False)
-        return memo_id
+        memo_ids = [memo.get("memo_id") or self._generate_id() for memo in memos]
+        with layout_lock(self.data_folder):
+            shards: dict[JsonDbCache, list[int]] = {}
+            for position, memo in enumerate(memos):
+                shards.setdefault(self._shard(memo["user_id"]), []).append(position)
+            # Checked up front too, since a batch spanning shards is written shard by shard
+            for shard, positions in shards.items():
+                for p in positions:
+                    if memos[p].get("memo_id"):
+                        self._check_memo_id(shard.get_user(memos[p]["user_id"]), memos[p])
+
+            for shard, positions in shards.items():
+                user_ids = {memos[p]["user_id"] for p in positions}
+                with shard.transaction(*user_ids) as db:
+                    for p in positions:
+                        user_memos = db[memos[p]["user_id"]]
+                        # A caller-chosen ID replaces the same memo, a generated one
+                        # never replaces anything
+                        if memos[p].get("memo_id"):
+                            self._check_memo_id(user_memos, memos[p])
+                        while not memos[p].get("memo_id") and memo_ids[p] in user_memos:
+                            memo_ids[p] = self._generate_id()
+                        user_memos[memo_ids[p]] = {
+                            **self._encode_text(memos[p]["text"], user_memos),
+                            "title": memos[p]["title"],
+                            "date": message_date.isoformat(),
+                        }
+        return memo_ids
+
+    def _encode_text(self, text: str, user_memos: dict[str, dict]) -> dict:
+        if self.compression == "none":
+            return {"text": text}
+        if not self.dictionary_min_memos or len(user_memos) < self.dictionary_min_memos:
+            return self.codec.encode(text)
+
+        # Keep using the dictionary of the user's newest memo, train one if it has none
+        newest = user_memos[max(user_memos, key=int)]
+        dictionary_id = newest.get("zd")
+        if dictionary_id is None:
+            samples = [self.codec.decode(memo) for memo in user_memos.values()]
+            dictionary_id = self.codec.dictionaries.add(train_dictionary(samples))
+            logging.info("trained compression dictionary", extra={"samples": len(samples)})
+        return self.codec.encode(text, dictionary_id)
+
+    def _get_memos(self, user_id: str, memo_ids: list[str]) -> dict[str, Memo]:
+        memos = self._shard(user_id).get_user(user_id)
+        return {
+            memo_id: self._to_memo(user_id, memo_id, memos[memo_id])
+            for memo_id in memo_ids
+            if memo_id in memos
+        }
+
+    def _list_memos(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str],
+        after: Optional[str],
+    ) -> list[Memo]:
+        memos, sorted_ids = self._shard(user_id).get_user_index(user_id)
+        page = newest_page(
+            sorted_ids,
+            limit,
+            before,
+            after,
+            legacy_date=lambda memo_id: memos[str(memo_id)]["date"],
+        )
+        return [self._to_memo(user_id, memo_id, memos[memo_id]) for memo_id in page]
+
+    def _delete_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        if memo_id not in self._shard(user_id).get_user(user_id):
+            return None
+        with self._transaction(user_id) as db:
+            memo = db[user_id].pop(memo_id, None)
+        if memo is None:
+            return None
+        return self._to_memo(user_id, memo_id, memo)
+
+    async def store_memo(
+        self, text: str, title: str, user_id: str, memo_id: Optional[str] = None
+    ) -> str:
+        """Store memo text and return memo ID"""
+        return await run_io(self._store_memo, text, title, user_id, memo_id)
+
+    async def store_memos(self, memos: list[dict]) -> list[str]:
+        """Store several memos with one rewrite per touched shard"""
+        return await run_io(self._store_memos, memos)
 
     async def get_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
         """Retrieve memo text by ID"""
-        db = json.load(open(self.db_file))
-        if memo_id in db[user_id]:
-            logging.info(f"Retrieved memo from local db {db[user_id][memo_id]}")
-            return Memo(
-                id=memo_id,
-                text=db[user_id][memo_id]["text"],
-                title=db[user_id][memo_id]["title"],
-                date=db[user_id][memo_id]["date"],
-                user_id=user_id,
-            )
+        memos = await run_io(self._get_memos, user_id, [memo_id])
+        if memo_id in memos:
+            logging.info(f"Retrieved memo from local db {memo_id}")
+            return memos[memo_id]
         return None
 
+    async def get_memos(self, user_id: str, memo_ids: list[str]) -> dict[str, Memo]:
+        """Retrieve several memos with a single lookup of the user's records"""
+        return await run_io(self._get_memos, user_id, memo_ids)
+
+    async def list_memos(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> list[Memo]:
+        """List memos newest first by walking the user's sorted IDs"""
+        return await run_io(self._list_memos, user_id, limit, before, after)
+
     async def delete_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
         """Delete memo by ID"""
-        db = json.load(open(self.db_file))
-        if memo_id in db[user_id]:
-            memo = Memo(
-                id=memo_id,
-                text=db[user_id][memo_id]["text"],
-                title=db[user_id][memo_id]["title"],
-                date=db[user_id][memo_id]["date"],
-                user_id=user_id,
-            )
-            del db[user_id][memo_id]
-            json.dump(db, open(self.db_file, "w"), indent=4, ensure_ascii=False)
-            return memo
-        return None
+        return await run_io(self._delete_memo, user_id, memo_id)
@@ -0,0 +1,410 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left, insort
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.config.settings import Settings
+from src.core.models import Memo
+from src.infrastructure.db.base import MemoIdConflict, Storage
+from src.infrastructure.db.compression import DictionaryStore, TextCodec
+from src.infrastructure.db.executor import get_io_executor, run_io
+from src.infrastructure.db.ids import LEGACY_ID_LIMIT, IdGenerator, newest_page
+from src.infrastructure.db.sharding import layout_files
+
+PUT = "put"
+DELETE = "del"
+
+
+class LogStorage(Storage):
+    """Append-only memo log with an in-memory offset index.
+
+    Every write is a single JSON line appended to ``memos.log``; deletes are
+    tombstone records. The index maps ``user_id -> memo_id -> offset`` so reads
+    are a seek plus one line parse. Superseded records are reclaimed by a
+    compaction that runs on the storage I/O pool once enough of the log is
+    garbage; writers wait for it.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        compaction_min_bytes: int = 1024 * 1024,
+        compaction_ratio: float = 0.5,
+        id_generator: Optional[IdGenerator] = None,
+    ):
+        super().__init__(id_generator)
+        self.log_file = Path(settings.data_folder / "memos.log")
+        self.lock_file = Path(settings.data_folder / "memos.log.lock")
+        self.data_folder = Path(settings.data_folder)
+        self.compaction_min_bytes = compaction_min_bytes
+        self.compaction_ratio = compaction_ratio
+
+        self._lock = threading.RLock()
+        self._index: dict[str, dict[str, tuple[int, int]]] = {}
+        # Per-user ascending memo IDs, built on first listing and kept in step
+        self._sorted_ids: dict[str, list[int]] = {}
+        # Dates of legacy CRC IDs read while listing, which order them
+        self._legacy_dates: dict[str, dict[int, str]] = {}
+        self._live_bytes = 0
+        self._dead_bytes = 0
+        self._indexed_size = 0
+        self._inode: Optional[int] = None
+        self._compaction: Optional[Future] = None
+
+        with self._file_lock():
+            self._ensure_file_exists()
+            self._repair_tail()
+            self._refresh()
+        logging.info("initialized log db", extra={"records": self._live_count()})
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialise appends and compactions across processes"""
+        with open(self.lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _ensure_file_exists(self):
+        if os.path.exists(self.log_file):
+            return
+
+        tmp_file = self.log_file.with_suffix(".import")
+        sources = layout_files(self.data_folder)
+        imported = 0
+        with open(tmp_file, "wb") as log:
+            codec = TextCodec(DictionaryStore(self.data_folder / "dictionaries"))
+            for source in sources:
+                with open(source) as f:
+                    db = json.load(f)
+                for user_id, memos in db.items():
+                    for memo_id, memo in memos.items():
+                        log.write(
+                            self._encode(
+                                PUT,
+                                user_id,
+                                memo_id,
+                                text=codec.decode(memo),
+                                title=memo["title"],
+                                date=memo["date"],
+                            )
+                        )
+                        imported += 1
+            log.flush()
+            os.fsync(log.fileno())
+        os.replace(tmp_file, self.log_file)
+        if imported:
+            logging.info(
+                "imported legacy db into log",
+                extra={"records": imported, "sources": len(sources)},
+            )
+
+    def _repair_tail(self):
+        """Drop a torn final record left by a crash mid-append"""
+        with open(self.log_file, "rb+") as log:
+            size = log.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            log.seek(size - 1)
+            if log.read(1) == b"\n":
+                return
+            log.seek(0)
+            valid = log.read().rfind(b"\n") + 1
+            log.truncate(valid)
+            logging.warning(
+                "truncated torn record from memo log",
+                extra={"dropped_bytes": size - valid},
+            )
+
+    @staticmethod
+    def _encode(op: str, user_id: str, memo_id: str, **fields) -> bytes:
+        record = {"op": op, "user_id": user_id, "id": memo_id, **fields}
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode()
+
+    def _apply(self, index: dict, record: dict, offset: int, length: int):
+        """Apply a single record to ``index`` and update garbage accounting"""
+        memos = index.setdefault(record["user_id"], {})
+        previous = memos.pop(record["id"], None)
+        if previous is not None:
+            self._live_bytes -= previous[1]
+            self._dead_bytes += previous[1]
+
+        if record["op"] == PUT:
+            memos[record["id"]] = (offset, length)
+            self._live_bytes += length
+        else:
+            self._dead_bytes += length
+
+        sorted_ids = self._sorted_ids.get(record["user_id"])
+        if index is self._index and sorted_ids is not None:
+            memo_id = int(record["id"])
+            if record["op"] == PUT and previous is None:
+                insort(sorted_ids, memo_id)
+            elif record["op"] == DELETE and previous is not None:
+                del sorted_ids[bisect_left(sorted_ids, memo_id)]
+        if index is self._index and int(record["id"]) < LEGACY_ID_LIMIT:
+            self._legacy_dates.get(record["user_id"], {}).pop(int(record["id"]), None)
+
+    def _scan(self, index: dict, start: int) -> int:
+        """Index complete records from ``start`` and return the new end offset"""
+        with open(self.log_file, "rb") as log:
+            log.seek(start)
+            offset = start
+            for line in log:
+                if not line.endswith(b"\n"):
+                    break
+                self._apply(index, json.loads(line), offset, len(line))
+                offset += len(line)
+        return offset
+
+    def _refresh(self):
+        """Catch up with records appended or compacted by other processes"""
+        with self._lock:
+            stat = os.stat(self.log_file)
+            if stat.st_ino != self._inode:
+                self._index = {}
+                self._sorted_ids = {}
+                self._legacy_dates = {}
+                self._live_bytes = 0
+                self._dead_bytes = 0
+                self._indexed_size = self._scan(self._index, 0)
+                self._inode = stat.st_ino
+            elif stat.st_size > self._indexed_size:
+                self._indexed_size = self._scan(self._index, self._indexed_size)
+
+    def _live_count(self) -> int:
+        return sum(len(memos) for memos in self._index.values())
+
+    def _append(self, *records: bytes):
+        """Append records with a single write and fsync"""
+        with self._file_lock(), self._lock:
+            self._refresh()
+            self._write_records(records)
+        self._maybe_compact()
+
+    def _write_records(self, records: tuple[bytes, ...]):
+        # Callers hold both locks and have refreshed the index
+        with open(self.log_file, "ab") as log:
+            offset = log.seek(0, os.SEEK_END)
+            log.write(b"".join(records))
+            log.flush()
+            os.fsync(log.fileno())
+        for record in records:
+            self._apply(self._index, json.loads(record), offset, len(record))
+            offset += len(record)
+        self._indexed_size = offset
+
+    def _read(self, user_id: str, memo_id: str) -> Optional[dict]:
+        self._refresh()
+        with self._lock:
+            entry = self._index.get(user_id, {}).get(memo_id)
+            if entry is None:
+                return None
+            with open(self.log_file, "rb") as log:
+                log.seek(entry[0])
+                return json.loads(log.read(entry[1]))
+
+    def _legacy_date(self, user_id: str, memo_id: int) -> str:
+        # Callers hold the lock and have refreshed the index
+        dates = self._legacy_dates.setdefault(user_id, {})
+        if memo_id not in dates:
+            offset, length = self._index[user_id][str(memo_id)]
+            with open(self.log_file, "rb") as log:
+                log.seek(offset)
+                dates[memo_id] = json.loads(log.read(length))["date"]
+        return dates[memo_id]
+
+    def _read_many(self, user_id: str, memo_ids: list[str]) -> list[dict]:
+        self._refresh()
+        with self._lock:
+            memos = self._index.get(user_id, {})
+            entries = sorted(memos[i] for i in set(memo_ids) if i in memos)
+            with open(self.log_file, "rb") as log:
+                records = []
+                for offset, length in entries:
+                    log.seek(offset)
+                    records.append(json.loads(log.read(length)))
+                return records
+
+    def _list(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str],
+        after: Optional[str],
+    ) -> list[dict]:
+        self._refresh()
+        with self._lock:
+            if user_id not in self._sorted_ids:
+                memos = self._index.get(user_id, {})
+                self._sorted_ids[user_id] = sorted(int(i) for i in memos)
+            page = newest_page(
+                self._sorted_ids[user_id],
+                limit,
+                before,
+                after,
+                legacy_date=lambda memo_id: self._legacy_date(user_id, memo_id),
+            )
+        records = {record["id"]: record for record in self._read_many(user_id, page)}
+        return [records[memo_id] for memo_id in page if memo_id in records]
+
+    @staticmethod
+    def _to_memo(record: dict) -> Memo:
+        return Memo(
+            id=record["id"],
+            text=record["text"],
+            title=record["title"],
+            date=record["date"],
+            user_id=record["user_id"],
+        )
+
+    def _maybe_compact(self):
+        if self._compaction is not None and not self._compaction.done():
+            return
+        if self._dead_bytes < self.compaction_min_bytes:
+            return
+        if self._dead_bytes < self.compaction_ratio * (
+            self._dead_bytes + self._live_bytes
+        ):
+            return
+
+        self._compaction = get_io_executor().submit(self.compact)
+
+    def compact(self):
+        """Rewrite the log with live records only.
+
+        The file lock is held throughout, so appends from every process wait
+        and no other process can compact or swap the log underneath the copy.
+        Reads in this process only wait for the swap itself.
+        """
+        with self._file_lock():
+            with self._lock:
+                # Another process may have compacted while this one waited
+                self._refresh()
+                if self._dead_bytes == 0:
+                    return
+                snapshot = sorted(
+                    (entry, user_id, memo_id)
+                    for user_id, memos in self._index.items()
+                    for memo_id, entry in memos.items()
+                )
+                dead_before = self._dead_bytes
+
+            tmp_file = self.log_file.with_suffix(".compact")
+            index: dict[str, dict[str, tuple[int, int]]] = {}
+            with open(self.log_file, "rb") as src, open(tmp_file, "wb") as dst:
+                for (offset, length), user_id, memo_id in snapshot:
+                    src.seek(offset)
+                    index.setdefault(user_id, {})[memo_id] = (dst.tell(), length)
+                    dst.write(src.read(length))
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            with self._lock:
+                os.replace(tmp_file, self.log_file)
+                self._index = index
+                self._sorted_ids = {}
+                self._legacy_dates = {}
+                self._live_bytes = os.path.getsize(self.log_file)
+                self._dead_bytes = 0
+                self._inode = os.stat(self.log_file).st_ino
+                self._indexed_size = self._live_bytes
+
+        logging.info("compacted memo log", extra={"reclaimed_bytes": dead_before})
+
+    def _store_memo(
+        self, text: str, title: str, user_id: str, memo_id: Optional[str] = None
+    ) -> str:
+        memo = {"text": text, "title": title, "user_id": user_id, "memo_id": memo_id}
+        return self._store_memos([memo])[0]
+
+    def _store_memos(self, memos: list[dict]) -> list[str]:
+        message_date = datetime.now().isoformat()
+        memo_ids = []
+        with self._file_lock(), self._lock:
+            self._refresh()
+            for memo in memos:
+                # A caller-chosen ID supersedes a record of the same memo, a
+                # generated one never supersedes anything
+                memo_id = memo.get("memo_id")
+                if memo_id:
+                    stored = self._read(memo["user_id"], memo_id)
+                    if stored is not None and (stored["text"], stored["title"]) != (
+                        memo["text"],
+                        memo["title"],
+                    ):
+                        raise MemoIdConflict(f"Memo ID {memo_id} holds another memo")
+                else:
+                    memo_id = self._generate_id()
+                    while memo_id in self._index.get(memo["user_id"], {}):
+                        memo_id = self._generate_id()
+                memo_ids.append(memo_id)
+            self._write_records(
+                tuple(
+                    self._encode(
+                        PUT,
+                        memo["user_id"],
+                        memo_id,
+                        text=memo["text"],
+                        title=memo["title"],
+                        date=message_date,
+                    )
+                    for memo_id, memo in zip(memo_ids, memos)
+                )
+            )
+        self._maybe_compact()
+        return memo_ids
+
+    def _delete_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        record = self._read(user_id, memo_id)
+        if record is None:
+            return None
+        self._append(self._encode(DELETE, user_id, memo_id))
+        return self._to_memo(record)
+
+    async def store_memo(
+        self, text: str, title: str, user_id: str, memo_id: Optional[str] = None
+    ) -> str:
+        """Store memo text and return memo ID"""
+        return await run_io(self._store_memo, text, title, user_id, memo_id)
+
+    async def store_memos(self, memos: list[dict]) -> list[str]:
+        """Store several memos with one append and one fsync"""
+        return await run_io(self._store_memos, memos)
+
+    async def get_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        """Retrieve memo text by ID"""
+        record = await run_io(self._read, user_id, memo_id)
+        if record is None:
+            return None
+        logging.info(f"Retrieved memo from log db {record['id']}")
+        return self._to_memo(record)
+
+    async def get_memos(self, user_id: str, memo_ids: list[str]) -> dict[str, Memo]:
+        """Retrieve several memos, reading them in log order"""
+        records = await run_io(self._read_many, user_id, memo_ids)
+        return {record["id"]: self._to_memo(record) for record in records}
+
+    async def list_memos(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> list[Memo]:
+        """List memos newest first from the sorted ID index"""
+        records = await run_io(self._list, user_id, limit, before, after)
+        return [self._to_memo(record) for record in records]
+
+    async def delete_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        """Delete memo by ID"""
+        return await run_io(self._delete_memo, user_id, memo_id)
@@ -0,0 +1,158 @@
+"""On-disk shard layout for the JSON memo store.
+
+Without a manifest the store is the legacy single ``db.json``. Once
+``shards/manifest.json`` records a shard count N, user ``u`` lives in
+``shards/<N>/<crc32(u) % N>.json``. ``python -m src.infrastructure.db.sharding``
+moves the data to ``Settings.storage_shard_count`` while the API keeps serving.
+"""
+
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from zlib import crc32
+
+from src.config.settings import Settings
+
+
+def manifest_path(data_folder: Path) -> Path:
+    return data_folder / "shards" / "manifest.json"
+
+
+def read_shard_count(data_folder: Path) -> int:
+    """Shard count currently in use; 0 means the legacy ``db.json`` layout"""
+    try:
+        with open(manifest_path(data_folder)) as f:
+            return json.load(f)["shard_count"]
+    except FileNotFoundError:
+        return 0
+
+
+def shard_path(data_folder: Path, shard_count: int, user_id: str) -> Path:
+    if shard_count == 0:
+        return data_folder / "db.json"
+    bucket = crc32(user_id.encode()) % shard_count
+    return data_folder / "shards" / str(shard_count) / f"{bucket:04d}.json"
+
+
+def shard_files(data_folder: Path, shard_count: int) -> list[Path]:
+    if shard_count == 0:
+        return [data_folder / "db.json"]
+    return sorted((data_folder / "shards" / str(shard_count)).glob("*.json"))
+
+
+def layout_files(data_folder: Path) -> list[Path]:
+    """Existing files of the layout in use, for importers of the JSON store"""
+    return [
+        path
+        for path in shard_files(data_folder, read_shard_count(data_folder))
+        if path.exists()
+    ]
+
+
+@contextmanager
+def layout_lock(data_folder: Path, exclusive: bool = False):
+    """Writers hold this shared; a reshard holds it exclusively to switch layouts"""
+    lock_file = data_folder / "shards" / "layout.lock"
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_file, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _signature(path: Path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _load(path: Path) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_atomic(path: Path, data: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _copy(
+    data_folder: Path, sources: list[Path], target_count: int
+) -> dict[Path, dict]:
+    targets: dict[Path, dict] = {}
+    for source in sources:
+        for user_id, memos in _load(source).items():
+            path = shard_path(data_folder, target_count, user_id)
+            targets.setdefault(path, {})[user_id] = memos
+    return targets
+
+
+def reshard(data_folder: Path, target_count: int) -> int:
+    """Move every user to a ``target_count`` layout and switch to it.
+
+    Shards are copied while writers keep going; the layout lock is only taken
+    exclusively to re-copy sources that changed meanwhile, flip the manifest
+    and remove the source files, so nothing reads the old layout again.
+    Returns the number of users moved.
+    """
+    source_count = read_shard_count(data_folder)
+    if source_count == target_count:
+        logging.info("memo store already uses the requested layout")
+        return 0
+
+    sources = shard_files(data_folder, source_count)
+    signatures = {source: _signature(source) for source in sources}
+    targets = _copy(data_folder, sources, target_count)
+
+    with layout_lock(data_folder, exclusive=True):
+        sources = shard_files(data_folder, source_count)
+        changed = [s for s in sources if _signature(s) != signatures.get(s)]
+        for path, users in _copy(data_folder, changed, target_count).items():
+            targets.setdefault(path, {}).update(users)
+
+        for path, users in targets.items():
+            _write_atomic(path, users)
+        _write_atomic(manifest_path(data_folder), {"shard_count": target_count})
+        for source in sources:
+            source.unlink(missing_ok=True)
+        if source_count:
+            (data_folder / "shards" / str(source_count)).rmdir()
+
+    moved = sum(len(users) for users in targets.values())
+    logging.info(
+        "resharded memo store",
+        extra={
+            "from_shards": source_count,
+            "to_shards": target_count,
+            "users": moved,
+            "recopied_sources": len(changed),
+        },
+    )
+    return moved
+
+
+def main():
+    from src.core.log import setup_logging
+
+    setup_logging()
+    settings = Settings()
+    reshard(settings.data_folder, settings.storage_shard_count)
+
+
+if __name__ == "__main__":
+    main()
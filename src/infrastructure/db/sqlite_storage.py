@@ -0,0 +1,336 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.config.settings import Settings
+from src.core.models import Memo
+from src.infrastructure.db.base import MemoIdConflict, Storage
+from src.infrastructure.db.compression import DictionaryStore, TextCodec
+from src.infrastructure.db.executor import run_io
+from src.infrastructure.db.ids import LEGACY_ID_LIMIT, IdGenerator
+from src.infrastructure.db.sharding import layout_files
+
+# Stay below SQLITE_MAX_VARIABLE_NUMBER on older builds
+MAX_QUERY_PARAMS = 900
+MAX_MEMO_ID = (1 << 63) - 1
+
+# Bumped whenever SCHEMA changes; tracked in PRAGMA user_version
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memos (
+    user_id TEXT NOT NULL,
+    memo_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    title TEXT NOT NULL,
+    date TEXT NOT NULL,
+    PRIMARY KEY (user_id, memo_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS memos_user_date ON memos (user_id, date);
+"""
+
+# Version 0 stored memo IDs as TEXT, which sorts "9" after "10"
+MIGRATE_V0 = """
+DROP INDEX IF EXISTS memos_user_date;
+ALTER TABLE memos RENAME TO memos_v0;
+""" + SCHEMA + """
+INSERT INTO memos (user_id, memo_id, text, title, date)
+SELECT user_id, CAST(memo_id AS INTEGER), text, title, date FROM memos_v0;
+DROP TABLE memos_v0;
+"""
+
+
+def _as_int(memo_id: str) -> Optional[int]:
+    """Memo IDs are decimal integers; anything else cannot be stored"""
+    return int(memo_id) if memo_id.isdigit() else None
+
+
+class SqliteStorage(Storage):
+    """Memo storage on SQLite in WAL mode.
+
+    Each thread gets its own connection so readers never wait on the writer;
+    lookups go through the ``(user_id, memo_id)`` primary key, which also
+    serves newest-first listing since memo IDs are time-ordered integers.
+    Legacy CRC IDs carry no time and are listed by ``memos_user_date``.
+    """
+
+    def __init__(self, settings: Settings, id_generator: Optional[IdGenerator] = None):
+        super().__init__(id_generator)
+        self.db_file = Path(settings.data_folder / "memos.sqlite3")
+        self.data_folder = Path(settings.data_folder)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        is_new = not os.path.exists(self.db_file)
+        self._migrate(is_new)
+        if is_new:
+            self.import_json(layout_files(self.data_folder))
+        logging.info("initialized sqlite db")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _migrate(self, is_new: bool):
+        conn = self._connection()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        has_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memos'"
+        ).fetchone()
+        script = MIGRATE_V0 if has_table and not is_new else SCHEMA
+        # executescript commits first, so wrap the migration in its own transaction
+        conn.executescript(
+            f"BEGIN; {script} PRAGMA user_version = {SCHEMA_VERSION}; COMMIT;"
+        )
+        if has_table:
+            logging.info("migrated sqlite db", extra={"schema_version": SCHEMA_VERSION})
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def import_json(self, json_files: list[Path]) -> int:
+        """Copy memos from the JSON store's files, keeping their IDs"""
+        codec = TextCodec(DictionaryStore(self.data_folder / "dictionaries"))
+        rows = []
+        for json_file in json_files:
+            with open(json_file) as f:
+                db = json.load(f)
+            rows.extend(
+                (user_id, int(memo_id), codec.decode(memo), memo["title"], memo["date"])
+                for user_id, memos in db.items()
+                for memo_id, memo in memos.items()
+            )
+        if not rows:
+            return 0
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO memos (user_id, memo_id, text, title, date) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        logging.info(
+            "imported legacy db into sqlite",
+            extra={"records": len(rows), "sources": len(json_files)},
+        )
+        return len(rows)
+
+    @staticmethod
+    def _to_memo(row: sqlite3.Row) -> Memo:
+        return Memo(
+            id=str(row["memo_id"]),
+            text=row["text"],
+            title=row["title"],
+            date=row["date"],
+            user_id=row["user_id"],
+        )
+
+    def _store_memo(
+        self, text: str, title: str, user_id: str, memo_id: Optional[str] = None
+    ) -> str:
+        memo = {"text": text, "title": title, "user_id": user_id, "memo_id": memo_id}
+        return self._store_memos([memo])[0]
+
+    def _store_memos(self, memos: list[dict]) -> list[str]:
+        message_date = datetime.now().isoformat()
+        memo_ids = []
+        with self._connection() as conn:
+            for memo in memos:
+                if memo.get("memo_id"):
+                    # The caller chose the ID, so a repeat of the same memo rewrites it
+                    written = conn.execute(
+                        "INSERT INTO memos (user_id, memo_id, text, title, date) "
+                        "VALUES (?, ?, ?, ?, ?) ON CONFLICT (user_id, memo_id) DO UPDATE "
+                        "SET date = excluded.date "
+                        "WHERE text = excluded.text AND title = excluded.title "
+                        "RETURNING memo_id",
+                        (
+                            memo["user_id"],
+                            int(memo["memo_id"]),
+                            memo["text"],
+                            memo["title"],
+                            message_date,
+                        ),
+                    ).fetchone()
+                    if written is None:
+                        raise MemoIdConflict(f"Memo ID {memo['memo_id']} holds another memo")
+                    memo_ids.append(memo["memo_id"])
+                    continue
+                while True:
+                    memo_id = self._generate_id()
+                    try:
+                        conn.execute(
+                            "INSERT INTO memos (user_id, memo_id, text, title, date) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (
+                                memo["user_id"],
+                                int(memo_id),
+                                memo["text"],
+                                memo["title"],
+                                message_date,
+                            ),
+                        )
+                    except sqlite3.IntegrityError:
+                        # Another worker took this ID; never overwrite a memo
+                        continue
+                    break
+                memo_ids.append(memo_id)
+        return memo_ids
+
+    def _get_memos(self, user_id: str, memo_ids: list[str]) -> dict[str, Memo]:
+        conn = self._connection()
+        keys = [key for key in map(_as_int, memo_ids) if key is not None]
+        memos = {}
+        for start in range(0, len(keys), MAX_QUERY_PARAMS):
+            chunk = keys[start : start + MAX_QUERY_PARAMS]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT * FROM memos WHERE user_id = ? AND memo_id IN ({placeholders})",
+                (user_id, *chunk),
+            )
+            memos.update((str(row["memo_id"]), self._to_memo(row)) for row in rows)
+        return memos
+
+    def _list_memos(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str],
+        after: Optional[str],
+    ) -> list[Memo]:
+        conn = self._connection()
+        before_key = self._cursor_key(conn, user_id, before)
+        after_key = self._cursor_key(conn, user_id, after)
+
+        rows = []
+        if before_key is None or before_key[0] == "id":
+            rows += conn.execute(
+                "SELECT * FROM memos WHERE user_id = ? AND memo_id >= ? "
+                "AND memo_id < ? AND memo_id > ? ORDER BY memo_id DESC LIMIT ?",
+                (
+                    user_id,
+                    LEGACY_ID_LIMIT,
+                    before_key[1] if before_key else MAX_MEMO_ID,
+                    after_key[1] if after_key and after_key[0] == "id" else -1,
+                    limit,
+                ),
+            ).fetchall()
+        if len(rows) < limit and (after_key is None or after_key[0] != "id"):
+            # Legacy CRC IDs come last, newest first by date; the
+            # memos_user_date index serves this order
+            query = "SELECT * FROM memos WHERE user_id = ? AND memo_id < ?"
+            params: list = [user_id, LEGACY_ID_LIMIT]
+            for key, op in ((before_key, "<"), (after_key, ">")):
+                if key is None or key[0] == "id":
+                    continue
+                if key[0] == "date":
+                    query += f" AND (date, memo_id) {op} (?, ?)"
+                    params += key[1:]
+                else:
+                    query += f" AND memo_id {op} ?"
+                    params.append(key[1])
+            query += " ORDER BY date DESC, memo_id DESC LIMIT ?"
+            params.append(limit - len(rows))
+            rows += conn.execute(query, params).fetchall()
+        return [self._to_memo(row) for row in rows]
+
+    @staticmethod
+    def _cursor_key(conn: sqlite3.Connection, user_id: str, memo_id: Optional[str]) -> Optional[tuple]:
+        """Where a paging cursor sits: by ID for snowflakes, by date for legacy IDs.
+
+        A legacy cursor that is no longer stored is placed by its ID instead.
+        """
+        if memo_id is None:
+            return None
+        key = int(memo_id)
+        if key >= LEGACY_ID_LIMIT:
+            return ("id", key)
+        row = conn.execute(
+            "SELECT date FROM memos WHERE user_id = ? AND memo_id = ?", (user_id, key)
+        ).fetchone()
+        if row is None:
+            return ("legacy", key)
+        return ("date", row["date"], key)
+
+    def _delete_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        key = _as_int(memo_id)
+        if key is None:
+            return None
+        with self._connection() as conn:
+            row = conn.execute(
+                "DELETE FROM memos WHERE user_id = ? AND memo_id = ? RETURNING *",
+                (user_id, key),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._to_memo(row)
+
+    async def store_memo(
+        self, text: str, title: str, user_id: str, memo_id: Optional[str] = None
+    ) -> str:
+        """Store memo text and return memo ID"""
+        return await run_io(self._store_memo, text, title, user_id, memo_id)
+
+    async def store_memos(self, memos: list[dict]) -> list[str]:
+        """Store several memos in a single transaction"""
+        return await run_io(self._store_memos, memos)
+
+    async def get_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        """Retrieve memo text by ID"""
+        memos = await run_io(self._get_memos, user_id, [memo_id])
+        if memo_id not in memos:
+            return None
+        logging.info(f"Retrieved memo from sqlite db {memo_id}")
+        return memos[memo_id]
+
+    async def get_memos(self, user_id: str, memo_ids: list[str]) -> dict[str, Memo]:
+        """Retrieve several memos with primary-key lookups in batches"""
+        return await run_io(self._get_memos, user_id, memo_ids)
+
+    async def list_memos(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> list[Memo]:
+        """List memos newest first with a primary-key range scan"""
+        return await run_io(self._list_memos, user_id, limit, before, after)
+
+    async def delete_memo(self, user_id: str, memo_id: str) -> Optional[Memo]:
+        """Delete memo by ID"""
+        return await run_io(self._delete_memo, user_id, memo_id)
+
+
+def main():
+    """One-shot migration of the JSON store into ``memos.sqlite3``"""
+    from src.core.log import setup_logging
+
+    setup_logging()
+    settings = Settings()
+    existed = os.path.exists(settings.data_folder / "memos.sqlite3")
+    storage = SqliteStorage(settings)
+    if existed:
+        storage.import_json(layout_files(storage.data_folder))
+
+
+if __name__ == "__main__":
+    main()
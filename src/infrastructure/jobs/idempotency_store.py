@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from src.infrastructure.db.executor import run_io
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    memo_id TEXT,
+    job_id TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_keys_updated ON idempotency_keys (updated);
+"""
+
+
+@dataclass
+class IdempotencyRecord:
+    key: str
+    user_id: str
+    memo_id: Optional[str]
+    job_id: Optional[str]
+
+    @property
+    def pending(self) -> bool:
+        """The request that claimed the key has not recorded a result yet"""
+        return self.memo_id is None and self.job_id is None
+
+
+class IdempotencyStore:
+    """Request keys and the memo or job each produced, shared by all workers.
+
+    A key is claimed by inserting it without a result, which makes
+    concurrent duplicates wait for the claimant instead of running the
+    pipeline again. Results expire after ``ttl`` seconds; claims whose
+    request died without a result are taken over after ``pending_timeout``.
+    """
+
+    def __init__(self, data_folder: Path, ttl: float = 86400, pending_timeout: float = 600):
+        folder = Path(data_folder) / "jobs"
+        folder.mkdir(parents=True, exist_ok=True)
+        self.db_file = folder / "idempotency.sqlite3"
+        self.ttl = ttl
+        self.pending_timeout = pending_timeout
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _claim(self, key: str, user_id: str) -> Optional[IdempotencyRecord]:
+        """Claim ``key`` and return None, or return the record already holding it"""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM idempotency_keys WHERE updated < ? OR (key = ? "
+                "AND memo_id IS NULL AND job_id IS NULL AND updated < ?)",
+                (now - self.ttl, key, now - self.pending_timeout),
+            )
+            claimed = conn.execute(
+                "INSERT INTO idempotency_keys (key, user_id, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO NOTHING RETURNING key",
+                (key, user_id, now),
+            ).fetchone()
+            if claimed is not None:
+                return None
+            row = conn.execute(
+                "SELECT key, user_id, memo_id, job_id FROM idempotency_keys WHERE key = ?",
+                (key,),
+            ).fetchone()
+        return IdempotencyRecord(**row)
+
+    def _complete(self, key: str, memo_id: Optional[str] = None, job_id: Optional[str] = None):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE idempotency_keys SET memo_id = ?, job_id = ?, updated = ? WHERE key = ?",
+                (memo_id, job_id, time.time(), key),
+            )
+
+    def _forget(self, record: IdempotencyRecord):
+        """Drop the key unless someone replaced ``record`` in the meantime"""
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM idempotency_keys WHERE key = ? AND memo_id IS ? AND job_id IS ?",
+                (record.key, record.memo_id, record.job_id),
+            )
+
+    async def claim(self, key: str, user_id: str) -> Optional[IdempotencyRecord]:
+        return await run_io(self._claim, key, user_id)
+
+    async def complete(
+        self, key: str, memo_id: Optional[str] = None, job_id: Optional[str] = None
+    ):
+        await run_io(self._complete, key, memo_id, job_id)
+
+    async def release(self, key: str):
+        """Give up a claim whose request failed, so a retry can run"""
+        await run_io(self._forget, IdempotencyRecord(key, "", None, None))
+
+    async def forget(self, record: IdempotencyRecord):
+        await run_io(self._forget, record)
@@ -0,0 +1,292 @@
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.core.models import Job, MemoCheckpoint
+from src.infrastructure.db.executor import run_io
+from src.infrastructure.db.ids import IdGenerator, default_id_generator
+
+# Bumped whenever SCHEMA changes; tracked in PRAGMA user_version
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    audio_format TEXT NOT NULL,
+    request_id TEXT NOT NULL,
+    memo_id TEXT,
+    error TEXT,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    checkpoint TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+# Version 0 had no retry scheduling, leases or checkpoints
+MIGRATE_V0 = """
+ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE jobs ADD COLUMN available_at REAL NOT NULL DEFAULT 0;
+ALTER TABLE jobs ADD COLUMN lease_owner TEXT;
+ALTER TABLE jobs ADD COLUMN lease_until REAL;
+ALTER TABLE jobs ADD COLUMN checkpoint TEXT;
+UPDATE jobs SET status = 'queued' WHERE status = 'running';
+"""
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and another worker may have claimed it"""
+
+
+@dataclass
+class ClaimedJob:
+    """A job leased to this worker, with what it needs to run"""
+
+    job: Job
+    audio_path: Path
+    request_id: str
+    lease_owner: str
+    checkpoint: MemoCheckpoint
+
+
+class JobStore:
+    """Durable ingestion queue in SQLite, with audio kept next to it.
+
+    Claiming a job leases it for ``visibility_timeout`` seconds, and its
+    worker renews the lease while it runs; a job whose lease runs out,
+    because its worker crashed or hung, becomes claimable again and resumes
+    from its last checkpoint. Failed or abandoned attempts are retried with
+    exponential backoff up to ``max_attempts`` times, then the job is
+    dead-lettered as ``failed`` and its audio kept for inspection.
+    """
+
+    def __init__(
+        self,
+        data_folder: Path,
+        id_generator: Optional[IdGenerator] = None,
+        visibility_timeout: float = 300,
+        max_attempts: int = 5,
+        retry_base: float = 5,
+        retry_max: float = 600,
+    ):
+        self.folder = Path(data_folder) / "jobs"
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.db_file = self.folder / "jobs.sqlite3"
+        self.id_generator = id_generator or default_id_generator
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._local = threading.local()
+        self._migrate()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self):
+        conn = self._connection()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        has_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs'"
+        ).fetchone()
+        script = MIGRATE_V0 if has_table else SCHEMA
+        # executescript commits first, so wrap the migration in its own transaction
+        conn.executescript(
+            f"BEGIN; {script} PRAGMA user_version = {SCHEMA_VERSION}; COMMIT;"
+        )
+        if has_table:
+            logging.info("migrated job queue", extra={"schema_version": SCHEMA_VERSION})
+
+    def audio_path(self, job_id: str, audio_format: str) -> Path:
+        return self.folder / f"{job_id}.{audio_format}"
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            user_id=row["user_id"],
+            status=row["status"],
+            stage=row["stage"],
+            memo_id=row["memo_id"],
+            error=row["error"],
+            attempts=row["attempts"],
+            created=row["created"],
+            updated=row["updated"],
+        )
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with full jitter after ``attempts`` failures"""
+        return random.uniform(0, min(self.retry_max, self.retry_base * 2 ** (attempts - 1)))
+
+    def _create(self, user_id: str, audio: bytes, audio_format: str, request_id: str) -> Job:
+        job_id = self.id_generator.generate()
+        now = datetime.now().isoformat()
+        # The audio is durable before the job becomes visible to workers
+        tmp_path = self.folder / f"{job_id}.{audio_format}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.audio_path(job_id, audio_format))
+        with self._connection() as conn:
+            row = conn.execute(
+                "INSERT INTO jobs (id, user_id, status, audio_format, request_id, created, updated) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?) RETURNING *",
+                (job_id, user_id, audio_format, request_id, now, now),
+            ).fetchone()
+        return self._to_job(row)
+
+    def _create_completed(self, user_id: str, memo_id: str, request_id: str) -> Job:
+        """A job that succeeded on creation, for a memo that already exists"""
+        now = datetime.now().isoformat()
+        with self._connection() as conn:
+            row = conn.execute(
+                "INSERT INTO jobs (id, user_id, status, audio_format, request_id, memo_id, "
+                "created, updated) VALUES (?, ?, 'succeeded', '', ?, ?, ?, ?) RETURNING *",
+                (self.id_generator.generate(), user_id, request_id, memo_id, now, now),
+            ).fetchone()
+        return self._to_job(row)
+
+    def _claim(self) -> Optional[ClaimedJob]:
+        """Lease the oldest job that is due, or whose previous lease expired"""
+        now = time.time()
+        owner = uuid.uuid4().hex
+        updated = datetime.now().isoformat()
+        with self._connection() as conn:
+            # An abandoned last attempt dead-letters the job like a failed one
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, updated = ? "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                ("LeaseLost: the last attempt's lease expired", updated, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                "lease_owner = ?, lease_until = ?, updated = ? WHERE id = ("
+                "SELECT id FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_until < ? AND attempts < ?) "
+                "ORDER BY id LIMIT 1) RETURNING *",
+                (owner, now + self.visibility_timeout, updated, now, now, self.max_attempts),
+            ).fetchone()
+        if row is None:
+            return None
+        checkpoint = MemoCheckpoint.model_validate_json(row["checkpoint"] or "{}")
+        return ClaimedJob(
+            self._to_job(row),
+            self.audio_path(row["id"], row["audio_format"]),
+            row["request_id"],
+            owner,
+            checkpoint,
+        )
+
+    def _update(self, claimed: ClaimedJob, **fields) -> sqlite3.Row:
+        fields["updated"] = datetime.now().isoformat()
+        columns = ", ".join(f"{column} = ?" for column in fields)
+        with self._connection() as conn:
+            row = conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ? AND lease_owner = ? RETURNING *",
+                (*fields.values(), claimed.job.id, claimed.lease_owner),
+            ).fetchone()
+        if row is None:
+            raise LeaseLost(f"Job {claimed.job.id} is no longer leased to this worker")
+        return row
+
+    def _checkpoint(self, claimed: ClaimedJob, stage: str, checkpoint: MemoCheckpoint):
+        # Each completed stage also renews the lease
+        self._update(
+            claimed,
+            stage=stage,
+            memo_id=checkpoint.memo_id if checkpoint.stored else None,
+            checkpoint=checkpoint.model_dump_json(),
+            lease_until=time.time() + self.visibility_timeout,
+        )
+
+    def _renew(self, claimed: ClaimedJob):
+        self._update(claimed, lease_until=time.time() + self.visibility_timeout)
+
+    def _succeed(self, claimed: ClaimedJob, memo_id: str):
+        row = self._update(
+            claimed, status="succeeded", memo_id=memo_id, error=None, lease_owner=None
+        )
+        self.audio_path(row["id"], row["audio_format"]).unlink(missing_ok=True)
+
+    def _fail(self, claimed: ClaimedJob, error: str, retry: bool) -> Job:
+        """Schedule another attempt, or dead-letter the job once attempts run out"""
+        attempts = claimed.job.attempts
+        if retry and attempts < self.max_attempts:
+            row = self._update(
+                claimed,
+                status="queued",
+                error=error,
+                available_at=time.time() + self.retry_delay(attempts),
+                lease_owner=None,
+            )
+        else:
+            row = self._update(claimed, status="failed", error=error, lease_owner=None)
+        return self._to_job(row)
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else self._to_job(row)
+
+    def _requeue(self, job_id: str) -> bool:
+        """Give a dead-lettered job a fresh set of attempts"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, available_at = 0, "
+                "updated = ? WHERE id = ? AND status = 'failed'",
+                (datetime.now().isoformat(), job_id),
+            )
+        return cursor.rowcount > 0
+
+    async def create(self, user_id: str, audio: bytes, audio_format: str, request_id: str) -> Job:
+        """Persist the audio and queue a job for it"""
+        return await run_io(self._create, user_id, audio, audio_format, request_id)
+
+    async def create_completed(self, user_id: str, memo_id: str, request_id: str) -> Job:
+        return await run_io(self._create_completed, user_id, memo_id, request_id)
+
+    async def claim(self) -> Optional[ClaimedJob]:
+        return await run_io(self._claim)
+
+    async def checkpoint(self, claimed: ClaimedJob, stage: str, checkpoint: MemoCheckpoint):
+        """Record a completed stage so a later attempt can skip it"""
+        await run_io(self._checkpoint, claimed, stage, checkpoint)
+
+    async def renew(self, claimed: ClaimedJob):
+        """Extend the lease; raises ``LeaseLost`` if another worker took the job"""
+        await run_io(self._renew, claimed)
+
+    async def succeed(self, claimed: ClaimedJob, memo_id: str):
+        await run_io(self._succeed, claimed, memo_id)
+
+    async def fail(self, claimed: ClaimedJob, error: str, retry: bool = True) -> Job:
+        return await run_io(self._fail, claimed, error, retry)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await run_io(self._get, job_id)
+
+    async def requeue(self, job_id: str) -> bool:
+        """Queue a failed job again; False if the job is not ``failed``"""
+        return await run_io(self._requeue, job_id)
@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+
+
+class LexicalIndex(ABC):
+    @abstractmethod
+    async def add_document(self, user_id: str, memo_id: str, text: str):
+        """Index memo text, replacing any previous version of the memo"""
+        pass
+
+    @abstractmethod
+    async def add_documents(self, user_id: str, documents: dict[str, str]):
+        """Index several memos of a user and mark the user as fully indexed"""
+        pass
+
+    @abstractmethod
+    async def delete_document(self, user_id: str, memo_id: str):
+        """Remove memo from the index"""
+        pass
+
+    @abstractmethod
+    async def is_indexed(self, user_id: str) -> bool:
+        """Whether the user's memos written before indexing began were added"""
+        pass
+
+    @abstractmethod
+    async def search(self, query: str, user_id: str, limit: int = 10) -> list[dict]:
+        """Search for memos matching query terms, best first"""
+        pass
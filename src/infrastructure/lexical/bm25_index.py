@@ -0,0 +1,233 @@
+import fcntl
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from src.infrastructure.db.executor import run_io
+from src.infrastructure.lexical.base import LexicalIndex
+
+ADD = "add"
+DELETE = "del"
+USER = "user"
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN.findall(text.casefold())
+
+
+class UserPostings:
+    """Inverted index of one user's memos"""
+
+    def __init__(self):
+        self.postings: dict[str, dict[str, int]] = {}
+        self.lengths: dict[str, int] = {}
+        self.documents: dict[str, dict[str, int]] = {}
+        self.total_length = 0
+        self.indexed = False
+
+    def add(self, memo_id: str, terms: dict[str, int]):
+        self.remove(memo_id)
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[memo_id] = count
+        self.documents[memo_id] = terms
+        self.lengths[memo_id] = sum(terms.values())
+        self.total_length += self.lengths[memo_id]
+
+    def remove(self, memo_id: str) -> bool:
+        terms = self.documents.pop(memo_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            memos = self.postings[term]
+            del memos[memo_id]
+            if not memos:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(memo_id)
+        return True
+
+
+class Bm25Index(LexicalIndex):
+    """Okapi BM25 over memo text, one inverted index per user.
+
+    The index lives in memory and is persisted as ``lexical/postings.log``,
+    an append-only log of term counts per memo and deletes. Other workers'
+    appends are replayed on the next access; once most of the log is
+    superseded it is rewritten with live documents only.
+    """
+
+    def __init__(
+        self,
+        data_folder: Path,
+        k1: float = 1.2,
+        b: float = 0.75,
+        compaction_min_records: int = 1000,
+    ):
+        self.folder = Path(data_folder) / "lexical"
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.log_file = self.folder / "postings.log"
+        self.k1 = k1
+        self.b = b
+        self.compaction_min_records = compaction_min_records
+        self._lock = threading.RLock()
+        self._users: dict[str, UserPostings] = {}
+        self._records = 0
+        self._indexed_size = 0
+        self._inode: Optional[int] = None
+        with self._file_lock():
+            self.log_file.touch()
+            self._refresh()
+        logging.info(
+            "initialized lexical index",
+            extra={"documents": sum(len(u.documents) for u in self._users.values())},
+        )
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.folder / "postings.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with self._lock:
+                    yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _user(self, user_id: str) -> UserPostings:
+        return self._users.setdefault(user_id, UserPostings())
+
+    def _apply(self, record: dict):
+        user = self._user(record["user_id"])
+        if record["op"] == ADD:
+            user.add(record["id"], record["terms"])
+        elif record["op"] == DELETE:
+            user.remove(record["id"])
+        elif record["op"] == USER:
+            user.indexed = True
+        self._records += 1
+
+    def _refresh(self):
+        """Catch up with records appended or compacted by other processes"""
+        with self._lock:
+            stat = os.stat(self.log_file)
+            if stat.st_ino != self._inode:
+                self._users = {}
+                self._records = 0
+                self._indexed_size = 0
+                self._inode = stat.st_ino
+            if stat.st_size <= self._indexed_size:
+                return
+            with open(self.log_file, "rb") as log:
+                log.seek(self._indexed_size)
+                for line in log:
+                    if not line.endswith(b"\n"):
+                        # Torn append from a crash; dropped by the next write
+                        break
+                    self._apply(json.loads(line))
+                    self._indexed_size += len(line)
+
+    def _append(self, records: list[dict]):
+        with self._file_lock():
+            self._refresh()
+            with open(self.log_file, "ab") as log:
+                log.truncate(self._indexed_size)
+                log.write(
+                    b"".join(
+                        (json.dumps(record, ensure_ascii=False) + "\n").encode()
+                        for record in records
+                    )
+                )
+                log.flush()
+                os.fsync(log.fileno())
+            self._refresh()
+            live = sum(len(u.documents) + u.indexed for u in self._users.values())
+            if self._records >= self.compaction_min_records and self._records > 2 * live:
+                self._compact()
+
+    def _compact(self):
+        """Rewrite the log with live documents only; callers hold the file lock"""
+        tmp_file = self.log_file.with_suffix(".compact")
+        with open(tmp_file, "wb") as log:
+            for user_id, user in self._users.items():
+                records = [
+                    {"op": ADD, "user_id": user_id, "id": memo_id, "terms": terms}
+                    for memo_id, terms in user.documents.items()
+                ]
+                if user.indexed:
+                    records.append({"op": USER, "user_id": user_id})
+                log.write(
+                    b"".join(
+                        (json.dumps(record, ensure_ascii=False) + "\n").encode()
+                        for record in records
+                    )
+                )
+            log.flush()
+            os.fsync(log.fileno())
+        os.replace(tmp_file, self.log_file)
+        self._refresh()
+        logging.info("compacted lexical index", extra={"records": self._records})
+
+    @staticmethod
+    def _add_record(user_id: str, memo_id: str, text: str) -> dict:
+        return {"op": ADD, "user_id": user_id, "id": memo_id, "terms": Counter(tokenize(text))}
+
+    def _search(self, query: str, user_id: str, limit: int) -> list[dict]:
+        terms = set(tokenize(query))
+        with self._lock:
+            self._refresh()
+            user = self._users.get(user_id)
+            if user is None or not user.documents or not terms:
+                return []
+            count = len(user.documents)
+            average_length = user.total_length / count or 1
+            scores: Counter = Counter()
+            for term in terms:
+                memos = user.postings.get(term)
+                if not memos:
+                    continue
+                idf = math.log(1 + (count - len(memos) + 0.5) / (len(memos) + 0.5))
+                for memo_id, frequency in memos.items():
+                    norm = 1 - self.b + self.b * user.lengths[memo_id] / average_length
+                    scores[memo_id] += idf * frequency * (self.k1 + 1) / (
+                        frequency + self.k1 * norm
+                    )
+        return [
+            {"id": memo_id, "score": score, "metadata": {"user_id": user_id}}
+            for memo_id, score in scores.most_common(limit)
+        ]
+
+    def _is_indexed(self, user_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            user = self._users.get(user_id)
+            return user is not None and user.indexed
+
+    async def add_document(self, user_id: str, memo_id: str, text: str):
+        """Index memo text, replacing any previous version of the memo"""
+        await run_io(self._append, [self._add_record(user_id, memo_id, text)])
+
+    async def add_documents(self, user_id: str, documents: dict[str, str]):
+        """Index several memos of a user and mark the user as fully indexed"""
+        records = [
+            self._add_record(user_id, memo_id, text) for memo_id, text in documents.items()
+        ]
+        await run_io(self._append, records + [{"op": USER, "user_id": user_id}])
+
+    async def delete_document(self, user_id: str, memo_id: str):
+        """Remove memo from the index"""
+        await run_io(self._append, [{"op": DELETE, "user_id": user_id, "id": memo_id}])
+
+    async def is_indexed(self, user_id: str) -> bool:
+        """Whether the user's memos written before indexing began were added"""
+        return await run_io(self._is_indexed, user_id)
+
+    async def search(self, query: str, user_id: str, limit: int = 10) -> list[dict]:
+        """Rank the user's memos by BM25 over the query terms"""
+        return await run_io(self._search, query, user_id, limit)
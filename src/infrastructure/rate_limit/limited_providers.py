@@ -0,0 +1,50 @@
+from src.core.models import (AudioData, Summary, TranscriptionResult,
+                             VectorData)
+from src.infrastructure.rate_limit.provider_limiter import (ProviderLimiter,
+                                                            estimate_tokens)
+from src.infrastructure.summarization.base import Summarizer
+from src.infrastructure.transcription.base import Transcriber
+from src.infrastructure.vectorization.base import Vectorizer
+
+
+class RateLimitedTranscriber(Transcriber):
+    def __init__(self, transcriber: Transcriber, limiter: ProviderLimiter):
+        self.transcriber = transcriber
+        self.limiter = limiter
+
+    async def transcribe(self, audio: AudioData) -> TranscriptionResult:
+        async def attempt():
+            # A retried upload has to start from the beginning of the file
+            audio.file.seek(0)
+            return await self.transcriber.transcribe(audio)
+
+        return await self.limiter.call(attempt)
+
+
+class RateLimitedVectorizer(Vectorizer):
+    def __init__(self, vectorizer: Vectorizer, limiter: ProviderLimiter):
+        self.vectorizer = vectorizer
+        self.limiter = limiter
+
+    async def vectorize(self, text: str) -> VectorData:
+        return await self.limiter.call(
+            lambda: self.vectorizer.vectorize(text), estimate_tokens(text)
+        )
+
+    async def vectorize_batch(self, texts: list[str]) -> list[VectorData]:
+        return await self.limiter.call(
+            lambda: self.vectorizer.vectorize_batch(texts),
+            sum(map(estimate_tokens, texts)),
+        )
+
+
+class RateLimitedSummarizer(Summarizer):
+    def __init__(self, summarizer: Summarizer, limiter: ProviderLimiter):
+        self.summarizer = summarizer
+        self.limiter = limiter
+
+    async def summarize(self, text: str, length: int = 50) -> Summary:
+        # Input tokens plus the title the model writes back
+        return await self.limiter.call(
+            lambda: self.summarizer.summarize(text, length), estimate_tokens(text) + length
+        )
@@ -0,0 +1,234 @@
+"""Client-side rate limiting shared by every call to one provider endpoint.
+
+Two token buckets hold the endpoint's requests-per-minute and
+tokens-per-minute budgets. A call reserves one request and its estimated
+tokens up front, then waits until both buckets cover the reservation, so
+callers are served in arrival order.
+
+Concurrent calls are capped by an AIMD window. A call that finishes within
+the latency target widens it by ``1 / window``, about one slot per round
+trip. A 429, or a call slower than the target, shrinks it by
+``decrease``. A 429 also pauses every caller for the provider's
+``Retry-After`` before the call is retried.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import anthropic
+import openai
+from prometheus_client import Counter, Gauge, Histogram
+from tenacity import (AsyncRetrying, before_sleep_log, retry_if_exception,
+                      stop_after_attempt)
+
+PROVIDER_BUDGET_UTILIZATION = Gauge(
+    "provider_budget_utilization",
+    "Share of a provider's per-minute budget that is reserved",
+    ["provider", "budget"],
+)
+PROVIDER_CONCURRENCY_LIMIT = Gauge(
+    "provider_concurrency_limit",
+    "Concurrent calls the AIMD window currently allows",
+    ["provider"],
+)
+PROVIDER_CALLS_IN_FLIGHT = Gauge(
+    "provider_calls_in_flight",
+    "Calls currently waiting on the provider",
+    ["provider"],
+)
+PROVIDER_RATE_LIMITED = Counter(
+    "provider_rate_limited_total",
+    "429 responses received from the provider",
+    ["provider"],
+)
+PROVIDER_WAIT = Histogram(
+    "provider_limiter_wait_seconds",
+    "Time calls spent waiting for budget or a concurrency slot",
+    ["provider"],
+)
+
+# Rough size of a token in characters, for budgeting before the call
+CHARS_PER_TOKEN = 4
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) == 429
+
+
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (openai.APIConnectionError, anthropic.APIConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status in (408, 409, 429) or status >= 500)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    header = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(header)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """``per_minute`` units refilling continuously, bursting up to a minute's worth"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.clock = clock
+        self._level = per_minute
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` now and return the seconds until the bucket covers it"""
+        self._refill()
+        self._level -= amount
+        return max(0.0, -self._level / self.rate)
+
+    @property
+    def utilization(self) -> float:
+        """Above 1 while callers are queued behind the budget"""
+        self._refill()
+        return 1 - self._level / self.capacity
+
+
+class ProviderLimiter:
+    """Budgets and adaptive concurrency for one provider endpoint.
+
+    ``requests_per_minute`` and ``tokens_per_minute`` of 0 leave that budget
+    unlimited. The window starts at ``max_concurrency`` and never drops
+    below 1. Transient errors are retried up to ``max_attempts`` times in
+    total, with exponential backoff between ``backoff_min`` and
+    ``backoff_max`` when the provider sends no ``Retry-After``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 16,
+        latency_target: Optional[float] = None,
+        decrease: float = 0.5,
+        max_attempts: int = 3,
+        backoff_min: float = 3,
+        backoff_max: float = 10,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.max_attempts = max_attempts
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.window = float(max_concurrency)
+        self.in_flight = 0
+        self._paused_until = 0.0
+        # Calls started before the last decrease do not shrink the window again
+        self._decreased_at = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Condition] = None
+
+        for budget, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            if bucket is not None:
+                PROVIDER_BUDGET_UTILIZATION.labels(name, budget).set_function(
+                    lambda bucket=bucket: bucket.utilization
+                )
+        PROVIDER_CONCURRENCY_LIMIT.labels(name).set(self.window)
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Condition()
+        return self._slots
+
+    async def _acquire(self, tokens: int):
+        started = time.monotonic()
+        delay = 0.0
+        if self.requests is not None:
+            delay = self.requests.reserve(1)
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        await asyncio.sleep(delay)
+        # The pause can be extended by a 429 while we sleep
+        while (pause := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(pause)
+
+        slots = self._condition()
+        async with slots:
+            await slots.wait_for(lambda: self.in_flight < int(self.window))
+            self.in_flight += 1
+        PROVIDER_CALLS_IN_FLIGHT.labels(self.name).set(self.in_flight)
+        PROVIDER_WAIT.labels(self.name).observe(time.monotonic() - started)
+
+    async def _release(self, started: float, congested: bool):
+        if congested:
+            if started >= self._decreased_at:
+                self.window = max(1.0, self.window * self.decrease)
+                self._decreased_at = time.monotonic()
+        else:
+            self.window = min(float(self.max_concurrency), self.window + 1 / self.window)
+        PROVIDER_CONCURRENCY_LIMIT.labels(self.name).set(self.window)
+
+        slots = self._condition()
+        async with slots:
+            self.in_flight -= 1
+            slots.notify_all()
+        PROVIDER_CALLS_IN_FLIGHT.labels(self.name).set(self.in_flight)
+
+    async def _call_once(self, call: Callable[[], Awaitable[T]], tokens: int) -> T:
+        await self._acquire(tokens)
+        started = time.monotonic()
+        try:
+            result = await call()
+        except BaseException as exc:
+            rate_limited = _is_rate_limited(exc)
+            if rate_limited:
+                PROVIDER_RATE_LIMITED.labels(self.name).inc()
+            await asyncio.shield(self._release(started, congested=rate_limited))
+            raise
+        latency = time.monotonic() - started
+        slow = self.latency_target is not None and latency > self.latency_target
+        await self._release(started, congested=slow)
+        return result
+
+    def _backoff(self, state) -> float:
+        exc = state.outcome.exception()
+        delay = _retry_after(exc)
+        if delay is None:
+            delay = min(self.backoff_max, self.backoff_min * 2 ** (state.attempt_number - 1))
+        if _is_rate_limited(exc):
+            # Every caller of this provider waits, not only the one that was refused
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            return 0
+        return delay
+
+    async def call(self, call: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """Run ``call`` within the budgets, retrying transient provider errors"""
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            retry=retry_if_exception(_is_transient),
+            wait=self._backoff,
+            before_sleep=before_sleep_log(logging.getLogger(), logging.WARNING),
+            reraise=True,
+        ):
+            with attempt:
+                return await self._call_once(call, tokens)
@@ -1,9 +1,6 @@
-import logging
+from typing import Optional
 
 import anthropic
-from anthropic._exceptions import RateLimitError
-from tenacity import (before_sleep_log, retry, retry_if_exception_type,
-                      stop_after_attempt, wait_exponential)
 
 from src.core.models import Summary
 from src.infrastructure.summarization.base import Summarizer
@@ -11,18 +8,18 @@ from src.infrastructure.summarization.base import Summarizer
 
 class ClaudeSummarizer(Summarizer):
 
-    def __init__(self, api_key: str, *args, **kwargs):
+    def __init__(
+        self,
+        api_key: str,
+        *args,
+        client: Optional[anthropic.AsyncAnthropic] = None,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = client or anthropic.AsyncAnthropic(api_key=api_key)
 
-    @retry(
-        wait=wait_exponential(min=3, max=10),
-        stop=stop_after_attempt(3),
-        retry=retry_if_exception_type(RateLimitError),
-        before_sleep=before_sleep_log(logging.getLogger(), logging.WARNING),
-    )
     async def summarize(self, text: str, length: int = 50) -> Summary:
-        message = self.client.messages.create(
+        message = await self.client.messages.create(
             model="claude-3-5-sonnet-20241022",
             max_tokens=1024,
             system=(
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 class VectorStorage(ABC):
@@ -18,6 +19,6 @@ class VectorStorage(ABC):
         pass
 
     @abstractmethod
-    async def delete_vector(self, memo_id: str):
-        """Delete vector from database"""
+    async def delete_vector(self, memo_id: str, user_id: Optional[str] = None):
+        """Delete vector from database; ``user_id``, if known, is its owner"""
         pass
@@ -0,0 +1,234 @@
+"""Hierarchical navigable small world graph for approximate cosine search.
+
+Follows Malkov & Yashunin: every node gets a random top level, upper layers
+are sparse express lanes and layer 0 links each node to up to ``2 * m``
+neighbours chosen with the diversity heuristic. Vectors are normalised on
+insert, so similarity is a dot product.
+"""
+
+import heapq
+import math
+import random
+from typing import Optional
+
+import numpy as np
+
+
+class HnswIndex:
+    def __init__(
+        self,
+        dimension: int,
+        m: int = 16,
+        ef_construction: int = 200,
+        seed: Optional[int] = None,
+    ):
+        self.dimension = dimension
+        self.m = m
+        self.ef_construction = ef_construction
+        self.level_mult = 1 / math.log(m)
+        self.vectors = np.empty((16, dimension), dtype=np.float32)
+        self.count = 0
+        self.labels: list[str] = []
+        self.metadata: list[dict] = []
+        # links[node][level] is the neighbour list of ``node`` on that layer
+        self.links: list[list[list[int]]] = []
+        self.deleted: set[int] = set()
+        self.nodes: dict[str, int] = {}
+        self.entry_point: Optional[int] = None
+        self.max_level = -1
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def deleted_ratio(self) -> float:
+        return len(self.deleted) / self.count if self.count else 0.0
+
+    def _max_links(self, level: int) -> int:
+        return 2 * self.m if level == 0 else self.m
+
+    def _similarities(self, query: np.ndarray, nodes: list[int]) -> list[float]:
+        return (self.vectors[nodes] @ query).tolist()
+
+    def _search_layer(
+        self, query: np.ndarray, entry_points: list[int], ef: int, level: int
+    ) -> list[tuple[float, int]]:
+        """Best-first search of one layer; returns up to ``ef`` nodes, best first"""
+        visited = set(entry_points)
+        scores = self._similarities(query, entry_points)
+        candidates = [(-score, node) for score, node in zip(scores, entry_points)]
+        heapq.heapify(candidates)
+        # Min-heap of the best ``ef`` found so far, worst on top
+        found = [(score, node) for score, node in zip(scores, entry_points)]
+        heapq.heapify(found)
+        while len(found) > ef:
+            heapq.heappop(found)
+
+        while candidates:
+            negative, node = heapq.heappop(candidates)
+            if -negative < found[0][0] and len(found) >= ef:
+                break
+            neighbours = [n for n in self.links[node][level] if n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+            for score, neighbour in zip(self._similarities(query, neighbours), neighbours):
+                if len(found) < ef or score > found[0][0]:
+                    heapq.heappush(candidates, (-score, neighbour))
+                    heapq.heappush(found, (score, neighbour))
+                    if len(found) > ef:
+                        heapq.heappop(found)
+        return sorted(found, reverse=True)
+
+    def _select_neighbours(
+        self, candidates: list[tuple[float, int]], limit: int
+    ) -> list[int]:
+        """Keep candidates closer to the query than to any already selected one"""
+        selected: list[int] = []
+        skipped: list[int] = []
+        for score, node in candidates:
+            if len(selected) >= limit:
+                break
+            if selected and max(self._similarities(self.vectors[node], selected)) >= score:
+                skipped.append(node)
+            else:
+                selected.append(node)
+        # Fill up with the nearest pruned candidates to keep the graph connected
+        return selected + skipped[: limit - len(selected)]
+
+    def _connect(self, node: int, neighbour: int, level: int):
+        links = self.links[neighbour][level]
+        links.append(node)
+        if len(links) > self._max_links(level):
+            scores = self._similarities(self.vectors[neighbour], links)
+            ranked = sorted(zip(scores, links), reverse=True)
+            self.links[neighbour][level] = self._select_neighbours(
+                ranked, self._max_links(level)
+            )
+
+    def add(self, label: str, vector: np.ndarray, metadata: dict):
+        """Insert ``vector`` under ``label``, replacing any previous one"""
+        if vector.shape[0] != self.dimension:
+            raise ValueError(
+                f"Vector has {vector.shape[0]} dimensions, expected {self.dimension}"
+            )
+        self.remove(label)
+        norm = np.linalg.norm(vector)
+        query = (vector / norm if norm > 0 else vector).astype(np.float32)
+
+        node = self.count
+        if node == len(self.vectors):
+            grown = np.empty((2 * len(self.vectors), self.dimension), np.float32)
+            grown[:node] = self.vectors[:node]
+            self.vectors = grown
+        self.vectors[node] = query
+        self.count += 1
+        self.labels.append(label)
+        self.metadata.append(metadata)
+        self.nodes[label] = node
+
+        level = int(-math.log(1 - self._random.random()) * self.level_mult)
+        self.links.append([[] for _ in range(level + 1)])
+        if self.entry_point is None:
+            self.entry_point, self.max_level = node, level
+            return
+
+        entry_points = [self.entry_point]
+        for layer in range(self.max_level, level, -1):
+            entry_points = [self._search_layer(query, entry_points, 1, layer)[0][1]]
+        for layer in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(query, entry_points, self.ef_construction, layer)
+            neighbours = self._select_neighbours(found, self.m)
+            self.links[node][layer] = neighbours
+            for neighbour in neighbours:
+                self._connect(node, neighbour, layer)
+            entry_points = [n for _, n in found]
+
+        if level > self.max_level:
+            self.entry_point, self.max_level = node, level
+
+    def remove(self, label: str) -> bool:
+        """Mark the label deleted; the node keeps routing searches until a rebuild"""
+        node = self.nodes.pop(label, None)
+        if node is None:
+            return False
+        self.deleted.add(node)
+        return True
+
+    def search(
+        self, vector: np.ndarray, limit: int, ef: int = 64
+    ) -> list[tuple[str, float, dict]]:
+        if not self.nodes:
+            return []
+        norm = np.linalg.norm(vector)
+        query = (vector / norm if norm > 0 else vector).astype(np.float32)
+
+        entry_points = [self.entry_point]
+        for layer in range(self.max_level, 0, -1):
+            entry_points = [self._search_layer(query, entry_points, 1, layer)[0][1]]
+        # Deleted nodes take up result slots, so widen the beam to compensate
+        ef = max(ef, limit) + len(self.deleted)
+        found = self._search_layer(query, entry_points, ef, 0)
+        live = [(score, node) for score, node in found if node not in self.deleted]
+        return [
+            (self.labels[node], score, self.metadata[node]) for score, node in live[:limit]
+        ]
+
+    def rebuilt(self) -> "HnswIndex":
+        """A fresh index holding only live nodes, in their original insert order"""
+        index = HnswIndex(
+            self.dimension,
+            self.m,
+            self.ef_construction,
+            seed=self._random.randrange(1 << 32),
+        )
+        for node in sorted(self.nodes.values()):
+            index.add(self.labels[node], self.vectors[node], self.metadata[node])
+        return index
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        levels = [len(node_links) for node_links in self.links]
+        flat = [link for node_links in self.links for links in node_links for link in links]
+        lengths = [len(links) for node_links in self.links for links in node_links]
+        return {
+            "params": np.array(
+                [self.dimension, self.m, self.ef_construction, self.max_level,
+                 -1 if self.entry_point is None else self.entry_point]
+            ),
+            "vectors": self.vectors[: self.count],
+            "labels": np.array(self.labels, dtype=str),
+            "levels": np.array(levels, dtype=np.int32),
+            "link_lengths": np.array(lengths, dtype=np.int32),
+            "links": np.array(flat, dtype=np.int32),
+            "deleted": np.array(sorted(self.deleted), dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata: list[dict]) -> "HnswIndex":
+        dimension, m, ef_construction, max_level, entry_point = arrays["params"].tolist()
+        index = cls(dimension, m, ef_construction)
+        index.vectors = np.array(arrays["vectors"], dtype=np.float32)
+        if len(index.vectors) == 0:
+            index.vectors = np.empty((16, dimension), dtype=np.float32)
+        index.count = len(arrays["labels"])
+        index.labels = arrays["labels"].tolist()
+        index.metadata = metadata
+        index.max_level = max_level
+        index.entry_point = None if entry_point < 0 else entry_point
+        index.deleted = set(arrays["deleted"].tolist())
+        index.nodes = {
+            label: node for node, label in enumerate(index.labels)
+            if node not in index.deleted
+        }
+
+        flat, lengths = arrays["links"].tolist(), iter(arrays["link_lengths"].tolist())
+        position = 0
+        for levels in arrays["levels"].tolist():
+            node_links = []
+            for _ in range(levels):
+                length = next(lengths)
+                node_links.append(flat[position : position + length])
+                position += length
+            index.links.append(node_links)
+        return index
@@ -0,0 +1,344 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.infrastructure.db.executor import get_io_executor, run_io
+from src.infrastructure.vector_db.base import VectorStorage
+from src.infrastructure.vector_db.hnsw import HnswIndex
+
+HEADER = struct.Struct("<I")
+OPEN, ADD, DELETE = "open", "add", "del"
+
+
+class UserGraph:
+    """A user's HNSW index plus how much of its on-disk op log is applied"""
+
+    def __init__(self, index: Optional[HnswIndex], signature: tuple):
+        self.index = index
+        self.signature = signature
+        self.ops_offset = 0
+        self.ops_count = 0
+
+
+class HnswVectorStorage(VectorStorage):
+    """Approximate cosine search with one HNSW graph per user.
+
+    A user is stored as ``hnsw/<hash>.npz`` (a graph snapshot) plus
+    ``hnsw/<hash>.ops``, an append-only log of inserts and deletes since the
+    snapshot, so a write costs one append. Deletes only mark nodes; once
+    ``rebuild_ratio`` of a graph is deleted it is rebuilt from the live
+    vectors, and the snapshot is rewritten whenever the log outgrows
+    ``snapshot_ops``; both run on the storage I/O pool and swap the new graph
+    in when done. Other workers' appends are replayed on the next access.
+    Locks are per user, so one user's writes never hold up another's.
+    """
+
+    def __init__(
+        self,
+        data_folder: Path,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        rebuild_ratio: float = 0.2,
+        snapshot_ops: int = 1000,
+    ):
+        self.folder = Path(data_folder) / "hnsw"
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.rebuild_ratio = rebuild_ratio
+        self.snapshot_ops = snapshot_ops
+        # Guards the maps below; each user's graph has its own lock
+        self._lock = threading.Lock()
+        self._users: dict[str, UserGraph] = {}
+        self._owners: dict[str, str] = {}
+        self._user_locks: dict[str, threading.RLock] = {}
+        self._compactions: dict[str, Future] = {}
+        self._load_all()
+        logging.info("initialized hnsw vector db", extra={"vectors": len(self._owners)})
+
+    def _paths(self, user_id: str) -> tuple[Path, Path]:
+        digest = hashlib.sha1(user_id.encode()).hexdigest()[:16]
+        return self.folder / f"{digest}.npz", self.folder / f"{digest}.ops"
+
+    def _user_lock(self, user_id: str) -> threading.RLock:
+        with self._lock:
+            return self._user_locks.setdefault(user_id, threading.RLock())
+
+    def _signature(self, user_id: str) -> tuple:
+        """Changes whenever the snapshot is rewritten or the op log restarted"""
+        signature = []
+        for path in self._paths(user_id):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_ino, stat.st_mtime_ns))
+        # Appends change the log's mtime but not its inode
+        return signature[0], signature[1] and signature[1][0]
+
+    def _load_all(self):
+        for path in self.folder.glob("*.ops"):
+            with open(path, "rb") as ops:
+                record = self._read_record(ops)
+            if record is not None:
+                self._refresh(record[0]["user_id"])
+
+    @staticmethod
+    def _read_record(ops) -> Optional[tuple[dict, Optional[np.ndarray]]]:
+        prefix = ops.read(HEADER.size)
+        if len(prefix) < HEADER.size:
+            return None
+        header = ops.read(HEADER.unpack(prefix)[0])
+        try:
+            record = json.loads(header)
+        except ValueError:
+            # Torn header from a crash mid-append
+            return None
+        vector = None
+        if record["op"] == ADD:
+            data = ops.read(4 * record["dimension"])
+            if len(data) < 4 * record["dimension"]:
+                return None
+            vector = np.frombuffer(data, dtype=np.float32)
+        return record, vector
+
+    def _apply(self, user: UserGraph, record: dict, vector: Optional[np.ndarray]):
+        if record["op"] == ADD:
+            if user.index is None:
+                user.index = HnswIndex(len(vector), self.m, self.ef_construction)
+            user.index.add(record["id"], vector, record["metadata"])
+            with self._lock:
+                self._owners[record["id"]] = record["user_id"]
+            user.ops_count += 1
+        elif record["op"] == DELETE:
+            if user.index is not None and user.index.remove(record["id"]):
+                with self._lock:
+                    self._owners.pop(record["id"], None)
+            user.ops_count += 1
+
+    def _refresh(self, user_id: str) -> UserGraph:
+        """Bring the user's graph up to date with the files on disk"""
+        with self._user_lock(user_id):
+            snapshot_path, ops_path = self._paths(user_id)
+            signature = self._signature(user_id)
+            user = self._users.get(user_id)
+            if user is None or user.signature != signature:
+                index = self._load_snapshot(snapshot_path)
+                with self._lock:
+                    if user is not None and user.index is not None:
+                        for label in user.index.nodes:
+                            self._owners.pop(label, None)
+                    user = self._users[user_id] = UserGraph(index, signature)
+                    if index is not None:
+                        self._owners.update((label, user_id) for label in index.nodes)
+
+            try:
+                with open(ops_path, "rb") as ops:
+                    ops.seek(user.ops_offset)
+                    while (record := self._read_record(ops)) is not None:
+                        self._apply(user, *record)
+                        user.ops_offset = ops.tell()
+            except FileNotFoundError:
+                pass
+            return user
+
+    @staticmethod
+    def _load_snapshot(path: Path) -> Optional[HnswIndex]:
+        try:
+            with np.load(path) as data:
+                return HnswIndex.from_arrays(data, json.loads(str(data["metadata"])))
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _file_lock(self, user_id: str):
+        """Serialise one user's appends and swaps across processes"""
+        snapshot_path, _ = self._paths(user_id)
+        with open(snapshot_path.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with self._user_lock(user_id):
+                    yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _encode(user_id: str, record: dict, vector: Optional[np.ndarray] = None) -> bytes:
+        header = json.dumps({**record, "user_id": user_id}).encode()
+        data = HEADER.pack(len(header)) + header
+        if vector is not None:
+            data += vector.astype(np.float32).tobytes()
+        return data
+
+    def _append(self, user_id: str, record: dict, vector: Optional[np.ndarray] = None):
+        with self._file_lock(user_id):
+            user = self._refresh(user_id)
+            _, ops_path = self._paths(user_id)
+            data = self._encode(user_id, record, vector)
+            if not ops_path.exists():
+                # The first record names the user so the folder can be scanned on start
+                data = self._encode(user_id, {"op": OPEN}) + data
+            with open(ops_path, "ab") as ops:
+                # Drop a torn record left by a crash mid-append
+                ops.truncate(user.ops_offset)
+                ops.write(data)
+                ops.flush()
+                os.fsync(ops.fileno())
+            user = self._refresh(user_id)
+            if self._needs_compaction(user) and user_id not in self._compactions:
+                self._compactions[user_id] = get_io_executor().submit(
+                    self._compact_while_needed, user_id
+                )
+
+    def _needs_compaction(self, user: UserGraph) -> bool:
+        index = user.index
+        return index is not None and (
+            index.deleted_ratio > self.rebuild_ratio or user.ops_count >= self.snapshot_ops
+        )
+
+    def _compact_while_needed(self, user_id: str):
+        try:
+            while True:
+                self.compact(user_id)
+                with self._user_lock(user_id):
+                    # Writers check for a running compaction under this lock
+                    if not self._needs_compaction(self._users[user_id]):
+                        del self._compactions[user_id]
+                        return
+        except BaseException:
+            with self._user_lock(user_id):
+                self._compactions.pop(user_id, None)
+            raise
+
+    def compact(self, user_id: str):
+        """Rebuild or snapshot the user's graph and start a fresh op log.
+
+        The graph is copied under the user's lock, then rebuilt and saved
+        without holding any, so searches and writes only wait for the swap.
+        Records appended meanwhile move to the new op log and are replayed
+        onto the new graph.
+        """
+        snapshot_path, ops_path = self._paths(user_id)
+        with self._user_lock(user_id):
+            user = self._refresh(user_id)
+            if not self._needs_compaction(user):
+                return
+            rebuild = user.index.deleted_ratio > self.rebuild_ratio
+            arrays, metadata = user.index.to_arrays(), list(user.index.metadata)
+            signature, offset = user.signature, user.ops_offset
+
+        index = HnswIndex.from_arrays(arrays, metadata)
+        if rebuild:
+            index = index.rebuilt()
+            arrays, metadata = index.to_arrays(), index.metadata
+        # Unique, since another worker may be saving the same user's graph
+        tmp_path = snapshot_path.with_name(
+            f"{snapshot_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with open(tmp_path, "wb") as f:
+            np.savez(f, metadata=np.array(json.dumps(metadata)), **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._file_lock(user_id):
+            user = self._refresh(user_id)
+            if user.signature != signature:
+                # Another worker swapped in its own snapshot first
+                os.remove(tmp_path)
+                return
+            with open(ops_path, "rb") as ops:
+                ops.seek(offset)
+                tail = ops.read(user.ops_offset - offset)
+            opening = self._encode(user_id, {"op": OPEN})
+            ops_tmp_path = ops_path.with_name(ops_path.name + ".tmp")
+            with open(ops_tmp_path, "wb") as ops:
+                ops.write(opening + tail)
+                ops.flush()
+                os.fsync(ops.fileno())
+            os.replace(tmp_path, snapshot_path)
+            os.replace(ops_tmp_path, ops_path)
+
+            fresh = UserGraph(index, self._signature(user_id))
+            fresh.ops_offset = len(opening)
+            with self._lock:
+                self._users[user_id] = fresh
+            self._refresh(user_id)
+        logging.info(
+            "wrote hnsw snapshot", extra={"vectors": len(index), "rebuilt": rebuild}
+        )
+
+    def _owner(self, memo_id: str, user_id: Optional[str]) -> Optional[str]:
+        if user_id is not None:
+            # Picks up the vector if another worker stored it
+            self._refresh(user_id)
+        # Every graph was loaded at start, so an unknown ID is not stored
+        with self._lock:
+            return self._owners.get(memo_id)
+
+    def _store_vector(self, vector: list[float], memo_id: str, metadata: dict):
+        user_id = metadata["user_id"]
+        with self._lock:
+            previous_owner = self._owners.get(memo_id)
+        if previous_owner is not None and previous_owner != user_id:
+            self._delete_vector(memo_id)
+        array = np.asarray(vector, dtype=np.float32)
+        index = self._refresh(user_id).index
+        if index is not None and len(array) != index.dimension:
+            raise ValueError(
+                f"Vector has {len(array)} dimensions, expected {index.dimension}"
+            )
+        record = {"op": ADD, "id": memo_id, "metadata": metadata, "dimension": len(array)}
+        self._append(user_id, record, array)
+
+    def _search(
+        self, query_vector: list[float], user_id: str, limit: int, ef_search: Optional[int]
+    ) -> list[dict]:
+        with self._user_lock(user_id):
+            index = self._refresh(user_id).index
+            if index is None:
+                return []
+            matches = index.search(
+                np.asarray(query_vector, dtype=np.float32),
+                limit,
+                ef=ef_search or self.ef_search,
+            )
+        return [
+            {"id": label, "score": min(max(score, 0.0), 1.0), "metadata": metadata}
+            for label, score, metadata in matches
+        ]
+
+    def _delete_vector(self, memo_id: str, user_id: Optional[str] = None):
+        owner = self._owner(memo_id, user_id)
+        if owner is not None:
+            self._append(owner, {"op": DELETE, "id": memo_id})
+
+    async def store_vector(self, vector: list[float], memo_id: str, metadata: dict):
+        """Store vector in database"""
+        await run_io(self._store_vector, vector, memo_id, metadata)
+
+    async def search(
+        self,
+        query_vector: list[float],
+        user_id: str,
+        limit: int = 3,
+        ef_search: Optional[int] = None,
+    ) -> list[dict]:
+        """Search the user's graph; a larger ``ef_search`` trades speed for recall"""
+        return await run_io(self._search, query_vector, user_id, limit, ef_search)
+
+    async def delete_vector(self, memo_id: str, user_id: Optional[str] = None):
+        """Delete vector from database; without ``user_id`` only vectors seen here are found"""
+        await run_io(self._delete_vector, memo_id, user_id)
@@ -0,0 +1,401 @@
+import fcntl
+import json
+import logging
+import math
+import os
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.infrastructure.db.executor import get_io_executor, run_io
+from src.infrastructure.vector_db.base import VectorStorage
+from src.infrastructure.vector_db.quantization import (product_scores,
+                                                       scalar_scores)
+from src.infrastructure.vector_db.segments import (Segment, parse_segment_name,
+                                                   segment_name)
+
+
+class LocalVectorStorage(VectorStorage):
+    """Exact cosine search over memory-mapped vector segments.
+
+    Every write lands in a new immutable segment under ``vectors/``; deletes
+    are segments carrying tombstones. A search scans the user's slice of each
+    segment with one matrix-vector product, masking rows that a newer segment
+    overwrote or deleted. ``manifest.json`` lists the live segments, so
+    workers only re-read it when its inode or mtime changes. Once
+    ``merge_threshold`` adjacent segments of a similar size pile up they are
+    merged into one on the storage I/O pool, which leaves large segments
+    alone until enough of their size exist. Opening the store only reads
+    segment headers, so it can search right after start whatever the corpus
+    size, and several workers can share the folder.
+
+    With ``quantization`` set to ``"int8"`` or ``"pq"``, merged segments also
+    carry compressed codes. Searches rank a user's rows by those codes, then
+    re-rank the best ``rerank_candidates`` against the float32 rows, so only
+    the codes and a few full vectors need to stay in memory. PQ codebooks are
+    trained once and reused by later merges.
+    """
+
+    def __init__(
+        self,
+        data_folder: Path,
+        merge_threshold: int = 8,
+        quantization: str = "none",
+        pq_subspaces: int = 96,
+        rerank_candidates: int = 100,
+    ):
+        if merge_threshold < 2:
+            raise ValueError("merge_threshold must be at least 2")
+        self.folder = Path(data_folder) / "vectors"
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.manifest = self.folder / "manifest.json"
+        self.merge_threshold = merge_threshold
+        self.quantization = quantization
+        self.pq_subspaces = pq_subspaces
+        self.rerank_candidates = rerank_candidates
+        self._lock = threading.RLock()
+        self._segments: list[Segment] = []
+        # IDs written or deleted by segments newer than the one at the same index
+        self._shadows: list[np.ndarray] = []
+        self._signature = None
+        self._merge: Optional[Future] = None
+        self._recover()
+        self._import_npz()
+        self._refresh()
+        logging.info(
+            "initialized local vector db", extra={"segments": len(self._segments)}
+        )
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.folder / "vectors.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _list(self) -> list[Path]:
+        """Segments on disk, minus those already covered by a merged segment"""
+        ranges = []
+        for path in self.folder.glob("seg-*.vec"):
+            span = parse_segment_name(path)
+            if span is not None:
+                ranges.append((*span, path))
+        return [
+            path
+            for first, last, path in sorted(ranges)
+            if not any(
+                lo <= first and last <= hi and (lo, hi) != (first, last)
+                for lo, hi, _ in ranges
+            )
+        ]
+
+    def _read_manifest(self) -> list[str]:
+        with open(self.manifest) as f:
+            return json.load(f)["segments"]
+
+    def _write_manifest(self, names: list[str]):
+        """Replace the manifest atomically; call with the file lock held"""
+        tmp_path = self.manifest.with_name(self.manifest.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"segments": names}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest)
+
+    def _recover(self):
+        """Write the manifest for a folder without one and drop unlisted files.
+
+        Segments are only listed or unlisted under the file lock, so any
+        segment missing from the manifest was left by a worker that died
+        mid-merge.
+        """
+        with self._file_lock():
+            if not self.manifest.exists():
+                self._write_manifest([path.name for path in self._list()])
+            listed = set(self._read_manifest())
+            for path in self.folder.glob("seg-*.vec*"):
+                if path.name not in listed:
+                    os.remove(path)
+
+    def _refresh(self):
+        """Pick up segments written, merged or removed by any worker"""
+        with self._lock:
+            while True:
+                stat = os.stat(self.manifest)
+                signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                if signature == self._signature:
+                    return
+                opened = {segment.path.name: segment for segment in self._segments}
+                try:
+                    self._segments = [
+                        opened.get(name) or Segment(self.folder / name)
+                        for name in self._read_manifest()
+                    ]
+                    break
+                except FileNotFoundError:
+                    # A merge removed a segment after we read the manifest; a
+                    # newer manifest no longer lists it
+                    stat = os.stat(self.manifest)
+                    if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == signature:
+                        raise
+
+            shadow: set[bytes] = set()
+            self._shadows = []
+            for segment in reversed(self._segments):
+                self._shadows.append(np.array(sorted(shadow), dtype=bytes))
+                shadow.update(segment.ids.tolist())
+                shadow.update(memo_id.encode() for memo_id in segment.deleted)
+            self._shadows.reverse()
+            self._signature = signature
+
+    def _append(self, dimension: Optional[int], rows, deleted=(), **kwargs):
+        """Write a segment after all others; call with the file lock held"""
+        self._refresh()
+        sequence = max((s.last for s in self._segments), default=0) + 1
+        name = segment_name(sequence, sequence)
+        Segment.write(self.folder / name, dimension, rows, deleted, **kwargs)
+        self._write_manifest([segment.path.name for segment in self._segments] + [name])
+        self._refresh()
+
+    def _write(
+        self, rows: list[tuple[str, str, np.ndarray, dict]], deleted: list[str] = ()
+    ):
+        dimension = len(rows[0][2]) if rows else None
+        with self._file_lock():
+            self._refresh()
+            known = next((s.dimension for s in self._segments if s.dimension), None)
+            if dimension is not None and known is not None and dimension != known:
+                raise ValueError(f"Vector has {dimension} dimensions, expected {known}")
+            self._append(dimension, rows, deleted)
+        self._maybe_merge()
+
+    def _tier(self, segment: Segment) -> int:
+        return int(math.log(max(segment.rows + len(segment.deleted), 1), self.merge_threshold))
+
+    def _merge_candidates(self) -> list[Segment]:
+        """Oldest run of ``merge_threshold`` adjacent segments in one size tier"""
+        with self._lock:
+            segments = list(self._segments)
+        run: list[Segment] = []
+        for segment in segments:
+            if run and self._tier(segment) != self._tier(run[-1]):
+                run = []
+            run.append(segment)
+            if len(run) == self.merge_threshold:
+                return run
+        return []
+
+    def _maybe_merge(self):
+        if self._merge is not None and not self._merge.done():
+            return
+        if self._merge_candidates():
+            self._merge = get_io_executor().submit(self._merge_tiers)
+
+    def _merge_tiers(self):
+        while run := self._merge_candidates():
+            if not self.merge(run):
+                return
+
+    def _codebooks(self) -> Optional[np.ndarray]:
+        if self.quantization != "pq":
+            return None
+        with self._lock:
+            for segment in self._segments:
+                if segment.pq_codebooks is not None:
+                    return np.array(segment.pq_codebooks)
+        return None
+
+    def merge(self, segments: Optional[list[Segment]] = None) -> bool:
+        """Replace adjacent ``segments`` (all by default) with one of live rows.
+
+        Segments written while the merge runs have higher sequence numbers and
+        stay in place. Tombstones are dropped once nothing older remains, or
+        when the merged segment holds the row again. Returns False if another
+        worker merged any of them first.
+        """
+        with self._lock:
+            self._refresh()
+            if segments is None:
+                segments = list(self._segments)
+        if len(segments) < 2:
+            return True
+
+        # Newest first, so rows a later segment rewrote or deleted drop out
+        seen: set[bytes] = set()
+        parts = []
+        for segment in reversed(segments):
+            rows = np.flatnonzero(~np.isin(segment.ids, np.array(sorted(seen), dtype=bytes)))
+            parts.append((segment, rows))
+            seen.update(segment.ids.tolist())
+            seen.update(memo_id.encode() for memo_id in segment.deleted)
+        parts.reverse()
+
+        user_ids: list[str] = []
+        metadata: list[dict] = []
+        for segment, rows in parts:
+            owners = np.empty(segment.rows, dtype=object)
+            for user_id, (start, stop) in segment.users.items():
+                owners[start:stop] = user_id
+            user_ids.extend(owners[rows].tolist())
+            metadata.extend(segment.metadata(int(row)) for row in rows)
+        memo_ids = [
+            memo_id.decode()
+            for segment, rows in parts
+            for memo_id in segment.ids[rows].tolist()
+        ]
+        dimension = next((s.dimension for s in segments if s.dimension), None)
+        # Tombstone-only segments have no dimension, so shape every slice alike
+        vectors = np.concatenate(
+            [
+                np.asarray(segment.vectors[rows]).reshape(len(rows), dimension or 0)
+                for segment, rows in parts
+            ]
+        )
+        live = set(memo_ids)
+        tombstones = sorted(
+            {memo_id for segment in segments for memo_id in segment.deleted} - live
+        )
+        codebooks = self._codebooks()
+
+        with self._file_lock():
+            names = self._read_manifest()
+            merged = [segment.path.name for segment in segments]
+            position = names.index(merged[0]) if merged[0] in names else -1
+            if position < 0 or names[position : position + len(merged)] != merged:
+                # Another worker merged these first
+                return False
+            name = segment_name(segments[0].first, segments[-1].last)
+            Segment.write_columns(
+                self.folder / name,
+                dimension,
+                user_ids,
+                memo_ids,
+                vectors,
+                metadata,
+                tombstones if position else [],
+                quantization=self.quantization,
+                pq_subspaces=self.pq_subspaces,
+                pq_codebooks=codebooks,
+            )
+            self._write_manifest(
+                names[:position] + [name] + names[position + len(merged) :]
+            )
+            for segment in segments:
+                os.remove(segment.path)
+            self._refresh()
+        logging.info(
+            "merged vector segments",
+            extra={"segments": len(segments), "vectors": len(memo_ids)},
+        )
+        return True
+
+    def _import_npz(self):
+        """Move per-user ``.npz`` files of the previous layout into a segment"""
+        with self._file_lock():
+            paths = sorted(self.folder.glob("*.npz"))
+            if not paths:
+                return
+            rows = []
+            for path in paths:
+                with np.load(path) as data:
+                    user_id = str(data["user_id"])
+                    metadata = json.loads(str(data["metadata"]))
+                    rows.extend(
+                        zip(
+                            [user_id] * len(metadata),
+                            data["ids"].tolist(),
+                            data["vectors"],
+                            metadata,
+                        )
+                    )
+            dimension = len(rows[0][2]) if rows else None
+            self._append(
+                dimension,
+                rows,
+                quantization=self.quantization,
+                pq_subspaces=self.pq_subspaces,
+            )
+            for path in paths:
+                os.remove(path)
+        logging.info(
+            "imported npz vectors into a segment", extra={"vectors": len(rows)}
+        )
+
+    def _store_vector(self, vector: list[float], memo_id: str, metadata: dict):
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        if norm > 0:
+            array = array / norm
+        self._write([(metadata["user_id"], memo_id, array, metadata)])
+
+    def _approximate_scores(
+        self, segment: Segment, start: int, stop: int, query: np.ndarray
+    ) -> Optional[np.ndarray]:
+        if self.quantization == "pq" and segment.pq_codes is not None:
+            return product_scores(segment.pq_codes[start:stop], segment.pq_codebooks, query)
+        if self.quantization in ("int8", "pq") and segment.int8_codes is not None:
+            return scalar_scores(segment.int8_codes[start:stop], segment.int8_scale, query)
+        return None
+
+    def _search(
+        self, query_vector: list[float], user_id: str, limit: int
+    ) -> list[dict]:
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        with self._lock:
+            self._refresh()
+            segments = list(zip(self._segments, self._shadows))
+
+        candidates: list[tuple[float, Segment, int]] = []
+        for segment, shadow in segments:
+            if user_id not in segment.users:
+                continue
+            start, stop = segment.users[user_id]
+            approximate = self._approximate_scores(segment, start, stop, query)
+            scores = segment.vectors[start:stop] @ query if approximate is None else approximate
+            if len(shadow):
+                scores[np.isin(segment.ids[start:stop], shadow)] = -np.inf
+            shortlist = limit if approximate is None else max(limit, self.rerank_candidates)
+            k = min(shortlist, len(scores))
+            rows = np.argpartition(scores, -k)[-k:]
+            rows = rows[scores[rows] > -np.inf]
+            if approximate is not None:
+                # Exact scores for the shortlist touch only its float32 rows
+                scores = np.full(stop - start, -np.inf, dtype=np.float32)
+                rows = np.sort(rows)
+                scores[rows] = segment.vectors[start + rows] @ query
+            for row in rows:
+                candidates.append((float(scores[row]), segment, start + int(row)))
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        # Clamped since rounding can push a perfect match just above 1
+        return [
+            {
+                "id": segment.memo_id(row),
+                "score": min(max(score, 0.0), 1.0),
+                "metadata": segment.metadata(row),
+            }
+            for score, segment, row in candidates[:limit]
+        ]
+
+    async def store_vector(self, vector: list[float], memo_id: str, metadata: dict):
+        """Store vector in database"""
+        await run_io(self._store_vector, vector, memo_id, metadata)
+
+    async def search(
+        self, query_vector: list[float], user_id: str, limit: int = 3
+    ) -> list[dict]:
+        """Search with one matrix-vector product per segment and a partial sort"""
+        return await run_io(self._search, query_vector, user_id, limit)
+
+    async def delete_vector(self, memo_id: str, user_id: Optional[str] = None):
+        """Delete vector from database"""
+        await run_io(self._write, [], [memo_id])
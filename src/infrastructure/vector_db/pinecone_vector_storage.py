@@ -1,9 +1,14 @@
+from typing import Optional
+
 from pinecone import Pinecone
 
+from src.infrastructure.db.executor import run_io
 from src.infrastructure.vector_db.base import VectorStorage
 
 
 class PineconeVectorStorage(VectorStorage):
+    """Pinecone index access; its SDK is blocking, so calls run on the I/O pool"""
+
     def __init__(self, api_key: str, host: str, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self.pc = Pinecone(api_key=api_key)
@@ -11,19 +16,21 @@ class PineconeVectorStorage(VectorStorage):
 
     async def store_vector(self, vector: list[float], memo_id: str, metadata: dict):
         """Store vector in database"""
-        self.index.upsert(
-            vectors=[{"id": memo_id, "values": vector, "metadata": metadata}]
+        await run_io(
+            self.index.upsert,
+            vectors=[{"id": memo_id, "values": vector, "metadata": metadata}],
         )
 
-    async def delete_vector(self, memo_id: str):
+    async def delete_vector(self, memo_id: str, user_id: Optional[str] = None):
         """Delete vector from database"""
-        self.index.delete(ids=[memo_id])
+        await run_io(self.index.delete, ids=[memo_id])
 
     async def search(
         self, query_vector: list[float], user_id: str, limit: int = 3
     ) -> list[dict]:
         """Search for similar vectors"""
-        response = self.index.query(
+        response = await run_io(
+            self.index.query,
             vector=query_vector,
             top_k=limit,
             include_metadata=True,
@@ -34,3 +41,7 @@ class PineconeVectorStorage(VectorStorage):
             {"id": match.id, "score": match.score, "metadata": match.metadata}
             for match in response.matches
         ]
+
+    def close(self):
+        """Shut down the index client's connection and thread pools"""
+        self.index._vector_api.api_client.close()
@@ -0,0 +1,91 @@
+"""Compressed codes for unit-length embeddings.
+
+Scalar quantization stores each dimension as int8 against a per-dimension
+scale (4x smaller than float32). Product quantization splits a vector into
+``subspaces`` chunks and stores, per chunk, the index of the nearest of 256
+k-means centroids (``4 * dimension / subspaces`` times smaller). Both only
+rank candidates; exact scores come from the float32 rows.
+"""
+
+import numpy as np
+
+CENTROIDS = 256
+
+
+def scalar_quantize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return int8 codes and the per-dimension scale that decodes them"""
+    scale = np.abs(vectors).max(axis=0) / 127
+    scale[scale == 0] = 1
+    codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+    return codes, scale.astype(np.float32)
+
+
+def scalar_scores(
+    codes: np.ndarray, scale: np.ndarray, query: np.ndarray, batch: int = 256
+) -> np.ndarray:
+    # Folding the scale into the query leaves one product per row. Widening a
+    # small batch at a time keeps the float32 copy in cache for BLAS.
+    query = query * scale
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), batch):
+        scores[start : start + batch] = codes[start : start + batch].astype(np.float32) @ query
+    return scores
+
+
+def train_product_quantizer(
+    vectors: np.ndarray,
+    subspaces: int,
+    iterations: int = 10,
+    sample: int = 20_000,
+    seed: int = 0,
+) -> np.ndarray:
+    """k-means codebooks of shape ``(subspaces, 256, dimension / subspaces)``"""
+    count, dimension = vectors.shape
+    if dimension % subspaces:
+        raise ValueError(f"{dimension} dimensions do not split into {subspaces} subspaces")
+    if count < CENTROIDS:
+        raise ValueError(f"Product quantization needs at least {CENTROIDS} vectors")
+
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(count, size=min(sample, count), replace=False)
+    chunks = np.asarray(vectors[np.sort(rows)], dtype=np.float32).reshape(
+        len(rows), subspaces, dimension // subspaces
+    )
+    codebooks = np.empty((subspaces, CENTROIDS, dimension // subspaces), np.float32)
+    for s in range(subspaces):
+        data = chunks[:, s]
+        centroids = data[rng.choice(len(data), CENTROIDS, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _nearest(data, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, data)
+            counts = np.bincount(assignment, minlength=CENTROIDS)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        codebooks[s] = centroids
+    return codebooks
+
+
+def _nearest(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # argmin |x - c|^2 == argmax (x . c - |c|^2 / 2)
+    return np.argmax(data @ centroids.T - 0.5 * (centroids**2).sum(axis=1), axis=1)
+
+
+def product_encode(
+    vectors: np.ndarray, codebooks: np.ndarray, batch: int = 4096
+) -> np.ndarray:
+    subspaces, _, width = codebooks.shape
+    codes = np.empty((len(vectors), subspaces), dtype=np.uint8)
+    for start in range(0, len(vectors), batch):
+        chunk = np.asarray(vectors[start : start + batch], dtype=np.float32)
+        chunk = chunk.reshape(len(chunk), subspaces, width)
+        for s in range(subspaces):
+            codes[start : start + len(chunk), s] = _nearest(chunk[:, s], codebooks[s])
+    return codes
+
+
+def product_scores(codes: np.ndarray, codebooks: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Asymmetric distance: look up each code's partial dot product with ``query``"""
+    subspaces, _, width = codebooks.shape
+    table = np.einsum("scw,sw->sc", codebooks, query.reshape(subspaces, width))
+    return table[np.arange(subspaces), codes].sum(axis=1)
@@ -0,0 +1,279 @@
+"""Immutable vector segment files read zero-copy through ``mmap``.
+
+A segment file is laid out as::
+
+    prelude   magic + offsets of the sections below (fixed size)
+    header    JSON: dimension, row count, id width, user -> [start, stop)
+              row ranges and the memo IDs this segment deletes
+    ids       fixed-width byte strings, one per row
+    vectors   float32 rows, 64-byte aligned
+    metadata  JSON list with one dict per row, parsed on first use
+    int8      optional: per-dimension scale, then int8 codes per row
+    pq        optional: product-quantization codebooks, then uint8 codes
+
+Version 1 files have neither optional section and a shorter prelude.
+
+Rows of one user are contiguous, so a user's vectors are a single slice of
+the mapped matrix. Files are named ``seg-<first>-<last>.vec`` after the
+range of write sequence numbers they cover; a merged segment covers the
+range of the segments it replaced.
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.infrastructure.vector_db.quantization import (CENTROIDS,
+                                                       product_encode,
+                                                       scalar_quantize,
+                                                       train_product_quantizer)
+
+MAGIC_V1 = b"MEMOSEG1"
+MAGIC = b"MEMOSEG2"
+PRELUDE_V1 = struct.Struct("<8s5Q")
+# Adds the offsets of the int8 and product-quantization sections, 0 if absent
+PRELUDE = struct.Struct("<8s7Q")
+ALIGN = 64
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def segment_name(first: int, last: int) -> str:
+    return f"seg-{first:012d}-{last:012d}.vec"
+
+
+def parse_segment_name(path: Path) -> Optional[tuple[int, int]]:
+    parts = path.stem.split("-")
+    if len(parts) != 3 or parts[0] != "seg" or path.suffix != ".vec":
+        return None
+    return int(parts[1]), int(parts[2])
+
+
+class Segment:
+    def __init__(self, path: Path):
+        self.path = path
+        self.first, self.last = parse_segment_name(path)
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            f.seek(0)
+            if magic == MAGIC:
+                prelude = PRELUDE.unpack(f.read(PRELUDE.size))
+            elif magic == MAGIC_V1:
+                prelude = PRELUDE_V1.unpack(f.read(PRELUDE_V1.size)) + (0, 0)
+            else:
+                raise ValueError(f"{path} is not a vector segment")
+            (
+                _,
+                header_len,
+                ids_offset,
+                vectors_offset,
+                metadata_offset,
+                metadata_len,
+                int8_offset,
+                pq_offset,
+            ) = prelude
+            header = json.loads(f.read(header_len))
+
+        self.dimension: Optional[int] = header["dimension"]
+        self.rows: int = header["rows"]
+        self.users: dict[str, tuple[int, int]] = {
+            user_id: (start, stop) for user_id, (start, stop) in header["users"].items()
+        }
+        self.deleted: list[str] = header["deleted"]
+        if self.rows:
+            self.ids = np.memmap(
+                path,
+                dtype=f"S{header['id_width']}",
+                mode="r",
+                offset=ids_offset,
+                shape=(self.rows,),
+            )
+            self.vectors = np.memmap(
+                path,
+                dtype=np.float32,
+                mode="r",
+                offset=vectors_offset,
+                shape=(self.rows, self.dimension),
+            )
+        else:
+            self.ids = np.empty(0, dtype="S1")
+            self.vectors = np.empty((0, self.dimension or 0), dtype=np.float32)
+        self._metadata_span = (metadata_offset, metadata_len)
+        self._metadata: Optional[list[dict]] = None
+
+        self.int8_scale: Optional[np.ndarray] = None
+        self.int8_codes: Optional[np.ndarray] = None
+        if int8_offset:
+            self.int8_scale = np.memmap(
+                path, np.float32, "r", offset=int8_offset, shape=(self.dimension,)
+            )
+            self.int8_codes = np.memmap(
+                path,
+                np.int8,
+                "r",
+                offset=_aligned(int8_offset + 4 * self.dimension),
+                shape=(self.rows, self.dimension),
+            )
+        self.pq_codebooks: Optional[np.ndarray] = None
+        self.pq_codes: Optional[np.ndarray] = None
+        if pq_offset:
+            subspaces = header["pq_subspaces"]
+            shape = (subspaces, CENTROIDS, self.dimension // subspaces)
+            self.pq_codebooks = np.memmap(
+                path, np.float32, "r", offset=pq_offset, shape=shape
+            )
+            self.pq_codes = np.memmap(
+                path,
+                np.uint8,
+                "r",
+                offset=_aligned(pq_offset + 4 * self.dimension * CENTROIDS),
+                shape=(self.rows, subspaces),
+            )
+
+    def memo_id(self, row: int) -> str:
+        return self.ids[row].decode()
+
+    def metadata(self, row: int) -> dict:
+        if self._metadata is None:
+            offset, length = self._metadata_span
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                self._metadata = json.loads(f.read(length))
+        return self._metadata[row]
+
+    @classmethod
+    def write(
+        cls,
+        path: Path,
+        dimension: Optional[int],
+        rows: list[tuple[str, str, np.ndarray, dict]],
+        deleted: list[str] = (),
+        quantization: str = "none",
+        pq_subspaces: int = 96,
+        pq_codebooks: Optional[np.ndarray] = None,
+    ) -> "Segment":
+        """Write ``(user_id, memo_id, vector, metadata)`` rows atomically.
+
+        ``quantization`` is ``"int8"`` to add scalar codes or ``"pq"`` to add
+        product-quantization codes too. PQ encodes with ``pq_codebooks`` when
+        given, otherwise trains codebooks, which is skipped for segments too
+        small to train or whose dimension ``pq_subspaces`` does not divide.
+        """
+        return cls.write_columns(
+            path,
+            dimension,
+            [row[0] for row in rows],
+            [row[1] for row in rows],
+            np.array([row[2] for row in rows], dtype=np.float32).reshape(
+                len(rows), dimension or 0
+            ),
+            [row[3] for row in rows],
+            deleted,
+            quantization,
+            pq_subspaces,
+            pq_codebooks,
+        )
+
+    @classmethod
+    def write_columns(
+        cls,
+        path: Path,
+        dimension: Optional[int],
+        user_ids: list[str],
+        memo_ids: list[str],
+        vectors: np.ndarray,
+        metadata: list[dict],
+        deleted: list[str] = (),
+        quantization: str = "none",
+        pq_subspaces: int = 96,
+        pq_codebooks: Optional[np.ndarray] = None,
+    ) -> "Segment":
+        """Like :meth:`write`, with the rows given column by column"""
+        order = sorted(range(len(user_ids)), key=user_ids.__getitem__)
+        user_ids = [user_ids[i] for i in order]
+        memo_ids = [memo_ids[i] for i in order]
+        metadata = [metadata[i] for i in order]
+        matrix = np.ascontiguousarray(vectors[order], dtype=np.float32)
+        int8 = pq = None
+        if quantization in ("int8", "pq") and user_ids:
+            int8 = scalar_quantize(matrix)
+            if quantization == "pq":
+                if pq_codebooks is not None:
+                    codebooks = np.asarray(pq_codebooks, dtype=np.float32)
+                elif len(user_ids) >= CENTROIDS and dimension % pq_subspaces == 0:
+                    codebooks = train_product_quantizer(matrix, pq_subspaces)
+                else:
+                    codebooks = None
+                if codebooks is not None:
+                    pq = codebooks, product_encode(matrix, codebooks)
+        users: dict[str, list[int]] = {}
+        for position, user_id in enumerate(user_ids):
+            users.setdefault(user_id, [position, position])[1] = position + 1
+
+        encoded_ids = [memo_id.encode() for memo_id in memo_ids]
+        id_width = max(map(len, encoded_ids), default=1)
+        header = json.dumps(
+            {
+                "dimension": dimension,
+                "rows": len(user_ids),
+                "id_width": id_width,
+                "users": users,
+                "deleted": list(deleted),
+                "pq_subspaces": len(pq[0]) if pq else None,
+            }
+        ).encode()
+        metadata = json.dumps(metadata).encode()
+
+        ids_offset = _aligned(PRELUDE.size + len(header))
+        vectors_offset = _aligned(ids_offset + id_width * len(user_ids))
+        metadata_offset = vectors_offset + matrix.nbytes
+        int8_offset = pq_offset = 0
+        end = metadata_offset + len(metadata)
+        if int8:
+            int8_offset = _aligned(end)
+            end = _aligned(int8_offset + 4 * dimension) + dimension * len(user_ids)
+        if pq:
+            pq_offset = _aligned(end)
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(
+                PRELUDE.pack(
+                    MAGIC,
+                    len(header),
+                    ids_offset,
+                    vectors_offset,
+                    metadata_offset,
+                    len(metadata),
+                    int8_offset,
+                    pq_offset,
+                )
+            )
+            f.write(header)
+            f.seek(ids_offset)
+            f.write(np.array(encoded_ids, dtype=f"S{id_width}").tobytes())
+            f.seek(vectors_offset)
+            f.write(matrix.tobytes())
+            f.write(metadata)
+            if int8:
+                codes, scale = int8
+                f.seek(int8_offset)
+                f.write(scale.tobytes())
+                f.seek(_aligned(int8_offset + 4 * dimension))
+                f.write(codes.tobytes())
+            if pq:
+                codebooks, codes = pq
+                f.seek(pq_offset)
+                f.write(codebooks.tobytes())
+                f.seek(_aligned(pq_offset + codebooks.nbytes))
+                f.write(codes.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return cls(path)
@@ -8,3 +8,7 @@ class Vectorizer(ABC):
     async def vectorize(self, text: str) -> VectorData:
         """Convert text to vector representation"""
         pass
+
+    async def vectorize_batch(self, texts: list[str]) -> list[VectorData]:
+        """Convert several texts at once, in order"""
+        return [await self.vectorize(text) for text in texts]
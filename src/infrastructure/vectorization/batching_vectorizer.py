@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Optional
+
+from prometheus_client import Histogram
+
+from src.core.models import VectorData
+from src.infrastructure.vectorization.base import Vectorizer
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "embedding_batch_size",
+    "Number of texts sent in one embeddings request",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+EMBEDDING_BATCH_DURATION = Histogram(
+    "embedding_batch_duration_seconds",
+    "Time spent in one batched embeddings request",
+)
+
+
+class BatchingVectorizer(Vectorizer):
+    """Coalesce concurrent ``vectorize`` calls into batched requests.
+
+    The first call opens a batch; calls arriving within ``max_wait_ms`` (or
+    until ``max_batch_size`` is reached) join it, and the batch goes to the
+    wrapped vectorizer's ``vectorize_batch`` as one request. Unlike a storage
+    group commit, the next batch is collected while the previous request is
+    still in flight.
+    """
+
+    def __init__(
+        self, vectorizer: Vectorizer, max_batch_size: int = 64, max_wait_ms: float = 5
+    ):
+        self.vectorizer = vectorizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._requests: set[asyncio.Task] = set()
+
+    def _enqueue(self, item: tuple[str, asyncio.Future]):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._collector = None
+        self._queue.put_nowait(item)
+        if self._collector is None or self._collector.done():
+            self._collector = loop.create_task(self._run(self._queue))
+
+    async def _collect(self, queue: asyncio.Queue) -> list[tuple[str, asyncio.Future]]:
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue):
+        # The collector exits once the queue drains and is restarted on demand
+        while not queue.empty():
+            batch = await self._collect(queue)
+            request = asyncio.get_running_loop().create_task(self._send(batch))
+            self._requests.add(request)
+            request.add_done_callback(self._requests.discard)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future]]):
+        EMBEDDING_BATCH_SIZE.observe(len(batch))
+        try:
+            with EMBEDDING_BATCH_DURATION.time():
+                results = await self.vectorizer.vectorize_batch([text for text, _ in batch])
+        except Exception as exc:
+            logging.error(
+                "embedding batch failed",
+                extra={"batch_size": len(batch)},
+                exc_info=exc,
+            )
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def vectorize(self, text: str) -> VectorData:
+        """Queue the text for the next batch and wait for its vector"""
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue((text, future))
+        return await future
+
+    async def vectorize_batch(self, texts: list[str]) -> list[VectorData]:
+        return await self.vectorizer.vectorize_batch(texts)
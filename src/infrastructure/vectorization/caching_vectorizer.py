@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from prometheus_client import Counter
+
+from src.core.models import VectorData
+from src.infrastructure.db.executor import run_io
+from src.infrastructure.vectorization.base import Vectorizer
+
+EMBEDDING_CACHE_REQUESTS = Counter(
+    "embedding_cache_requests_total",
+    "Embedding lookups by the tier that answered them",
+    ["tier"],
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key BLOB PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+
+def embedding_key(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{text}".encode()).digest()
+
+
+class EmbeddingDiskCache:
+    """SQLite table of float32 embeddings, trimmed least recently used first.
+
+    A hit records its time only if the stored one is over ``touch_interval``
+    seconds old, so hot embeddings are read without a write each time.
+    """
+
+    def __init__(
+        self,
+        db_file: Path,
+        max_bytes: int,
+        check_every: int = 64,
+        touch_interval: float = 3600,
+    ):
+        self.db_file = db_file
+        self.max_bytes = max_bytes
+        self.check_every = check_every
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._inserts = 0
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: bytes) -> Optional[list[float]]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT vector, last_used FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] >= self.touch_interval:
+                conn.execute("UPDATE embeddings SET last_used = ? WHERE key = ?", (now, key))
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def put(self, key: bytes, vector: list[float]):
+        data = np.asarray(vector, dtype=np.float32).tobytes()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                (key, data, time.time()),
+            )
+        self._inserts += 1
+        if self._inserts % self.check_every == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used rows until the table is within ``max_bytes``"""
+        with self._connection() as conn:
+            total, count = conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0), COUNT(*) FROM embeddings"
+            ).fetchone()
+            if total <= self.max_bytes:
+                return
+            # Trim to 90% so eviction is not rerun on every following insert
+            excess = count - int(count * 0.9 * self.max_bytes / total)
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        logging.info("evicted cached embeddings", extra={"embeddings": excess})
+
+
+class CachingVectorizer(Vectorizer):
+    """Reuse embeddings of texts seen before.
+
+    Embeddings are keyed by a hash of ``(model, text)`` and looked up in an
+    in-process LRU of ``memory_entries`` vectors, then in an optional
+    ``disk_cache`` shared by all workers, before calling ``vectorizer``.
+    """
+
+    def __init__(
+        self,
+        vectorizer: Vectorizer,
+        model: str,
+        memory_entries: int = 4096,
+        disk_cache: Optional[EmbeddingDiskCache] = None,
+    ):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.memory_entries = memory_entries
+        self.disk_cache = disk_cache
+        self._memory: OrderedDict[bytes, list[float]] = OrderedDict()
+
+    def _remember(self, key: bytes, vector: list[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    async def _lookup(self, key: bytes) -> Optional[list[float]]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            EMBEDDING_CACHE_REQUESTS.labels(tier="memory").inc()
+            return vector
+
+        if self.disk_cache is not None:
+            vector = await run_io(self.disk_cache.get, key)
+            if vector is not None:
+                self._remember(key, vector)
+                EMBEDDING_CACHE_REQUESTS.labels(tier="disk").inc()
+                return vector
+
+        EMBEDDING_CACHE_REQUESTS.labels(tier="miss").inc()
+        return None
+
+    async def _store(self, key: bytes, vector: list[float]):
+        self._remember(key, vector)
+        if self.disk_cache is not None:
+            await run_io(self.disk_cache.put, key, vector)
+
+    async def vectorize(self, text: str) -> VectorData:
+        """Convert text to vector representation"""
+        key = embedding_key(self.model, text)
+        vector = await self._lookup(key)
+        if vector is not None:
+            return VectorData(vector=vector, text=text, metadata={})
+
+        vector_data = await self.vectorizer.vectorize(text)
+        await self._store(key, vector_data.vector)
+        return vector_data
+
+    async def vectorize_batch(self, texts: list[str]) -> list[VectorData]:
+        """Convert several texts, sending only the cache misses on in one batch"""
+        keys = [embedding_key(self.model, text) for text in texts]
+        vectors = [await self._lookup(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = await self.vectorizer.vectorize_batch([texts[i] for i in missing])
+            for i, vector_data in zip(missing, computed):
+                vectors[i] = vector_data.vector
+                await self._store(keys[i], vector_data.vector)
+        return [
+            VectorData(vector=vector, text=text, metadata={})
+            for vector, text in zip(vectors, texts)
+        ]
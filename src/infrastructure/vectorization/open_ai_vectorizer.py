@@ -1,28 +1,38 @@
-import logging
+from typing import Optional
 
-from openai import Client
-from openai._exceptions import RateLimitError
-from tenacity import (before_sleep_log, retry, retry_if_exception_type,
-                      stop_after_attempt, wait_exponential)
+from openai import AsyncOpenAI
 
 from src.core.models import VectorData
 from src.infrastructure.vectorization.base import Vectorizer
 
 
 class OpenAIVectorizer(Vectorizer):
-    def __init__(self, api_key: str, *args, **kwargs) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        *args,
+        model: str = "text-embedding-ada-002",
+        client: Optional[AsyncOpenAI] = None,
+        **kwargs,
+    ) -> None:
         super().__init__(*args, **kwargs)
-        self.client = Client(api_key=api_key)
+        self.client = client or AsyncOpenAI(api_key=api_key)
+        self.model = model
 
-    @retry(
-        wait=wait_exponential(min=3, max=10),
-        stop=stop_after_attempt(3),
-        retry=retry_if_exception_type(RateLimitError),
-        before_sleep=before_sleep_log(logging.getLogger(), logging.WARNING),
-    )
     async def vectorize(self, text: str) -> VectorData:
         """Convert text to vector representation"""
-        response = self.client.embeddings.create(
-            model="text-embedding-ada-002", input=text, encoding_format="float"
+        response = await self.client.embeddings.create(
+            model=self.model, input=text, encoding_format="float"
         )
         return VectorData(vector=response.data[0].embedding, text=text, metadata={})
+
+    async def vectorize_batch(self, texts: list[str]) -> list[VectorData]:
+        """Embed all texts with a single request"""
+        response = await self.client.embeddings.create(
+            model=self.model, input=texts, encoding_format="float"
+        )
+        embeddings = sorted(response.data, key=lambda item: item.index)
+        return [
+            VectorData(vector=item.embedding, text=text, metadata={})
+            for item, text in zip(embeddings, texts)
+        ]
@@ -0,0 +1,113 @@
+import io
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from src.api.dependencies import (get_async_ingestion_service,
+                                  get_ingestion_service, get_memo_service,
+                                  get_settings)
+from src.core.models import Job, Memo
+
+NOW = datetime.now().isoformat()
+
+
+def job(status: str, memo_id=None) -> Job:
+    return Job(
+        id="42", user_id="user-1", status=status, memo_id=memo_id, created=NOW, updated=NOW
+    )
+
+
+def test_create_memo_async_returns_accepted_job(test_client):
+    ingestion_service = AsyncMock()
+    ingestion_service.submit.return_value = job("queued")
+    memo_service = AsyncMock()
+    test_client.app.dependency_overrides[get_async_ingestion_service] = lambda: ingestion_service
+    test_client.app.dependency_overrides[get_memo_service] = lambda: memo_service
+
+    response = test_client.post(
+        "/v1/memos/?user_id=user-1",
+        files={"audio": ("test.wav", io.BytesIO(b"audio"), "audio/wav")},
+        headers={"Prefer": "respond-async"},
+    )
+
+    assert response.status_code == 202
+    assert response.headers["Location"] == "/v1/jobs/42"
+    assert response.json() == {
+        "id": "42", "status": "queued", "stage": None, "memo": None, "error": None, "attempts": 0
+    }
+    audio_data, user_id, _ = ingestion_service.submit.call_args.args
+    assert (audio_data.format, user_id) == ("wav", "user-1")
+    memo_service.create_memo_from_audio.assert_not_called()
+
+
+def test_async_request_runs_inline_without_workers(test_client, test_settings):
+    test_settings.ingestion_workers = 0
+    memo_service = AsyncMock()
+    memo_service.create_memo_from_audio.return_value = Memo(
+        id="memo-1", text="Text", title="Title", user_id="user-1", date=NOW
+    )
+    test_client.app.dependency_overrides[get_settings] = lambda: test_settings
+    test_client.app.dependency_overrides[get_memo_service] = lambda: memo_service
+
+    response = test_client.post(
+        "/v1/memos/?user_id=user-1",
+        files={"audio": ("test.wav", io.BytesIO(b"audio"), "audio/wav")},
+        headers={"Prefer": "respond-async"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["id"] == "memo-1"
+
+
+def test_get_job_includes_finished_memo(test_client):
+    ingestion_service = AsyncMock()
+    ingestion_service.get.return_value = job("succeeded", memo_id="7")
+    memo_service = AsyncMock()
+    memo_service.get_memo.return_value = Memo(
+        id="7", text="Text", title="Title", user_id="user-1", date=NOW
+    )
+    test_client.app.dependency_overrides[get_ingestion_service] = lambda: ingestion_service
+    test_client.app.dependency_overrides[get_memo_service] = lambda: memo_service
+
+    response = test_client.get("/v1/jobs/42?user_id=user-1&wait=10")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "succeeded"
+    assert response.json()["memo"]["text"] == "Text"
+    ingestion_service.get.assert_called_once_with("42", "user-1", 10)
+    memo_service.get_memo.assert_called_once_with("user-1", "7")
+
+
+def test_get_unknown_job(test_client):
+    ingestion_service = AsyncMock()
+    ingestion_service.get.return_value = None
+    test_client.app.dependency_overrides[get_ingestion_service] = lambda: ingestion_service
+    test_client.app.dependency_overrides[get_memo_service] = lambda: AsyncMock()
+
+    assert test_client.get("/v1/jobs/42?user_id=user-1").status_code == 404
+    assert test_client.get("/v1/jobs/42?user_id=user-1&wait=61").status_code == 422
+
+
+def test_retry_requeues_failed_job(test_client):
+    ingestion_service = AsyncMock()
+    ingestion_service.get.return_value = job("failed")
+    ingestion_service.retry.return_value = job("queued")
+    test_client.app.dependency_overrides[get_ingestion_service] = lambda: ingestion_service
+
+    response = test_client.post("/v1/jobs/42/retry?user_id=user-1")
+
+    assert response.status_code == 202
+    assert response.headers["Location"] == "/v1/jobs/42"
+    assert response.json()["status"] == "queued"
+    ingestion_service.get.assert_called_once_with("42", "user-1")
+
+
+def test_retry_rejects_unfinished_and_unknown_jobs(test_client):
+    ingestion_service = AsyncMock()
+    ingestion_service.get.return_value = job("running")
+    test_client.app.dependency_overrides[get_ingestion_service] = lambda: ingestion_service
+
+    assert test_client.post("/v1/jobs/42/retry?user_id=user-1").status_code == 409
+    ingestion_service.retry.assert_not_called()
+
+    ingestion_service.get.return_value = None
+    assert test_client.post("/v1/jobs/42/retry?user_id=user-1").status_code == 404
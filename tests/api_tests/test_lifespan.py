@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import dependencies
+from src.api.app import app
+from src.api.container import ProviderContainer
+
+
+@pytest.fixture
+def app_settings(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_FOLDER", str(tmp_path))
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setenv("INGESTION_WORKERS", "0")
+    monkeypatch.setenv("PROVIDER_WARMUP_TIMEOUT_SECONDS", "0")
+    dependencies.get_settings.cache_clear()
+    yield
+    dependencies.get_settings.cache_clear()
+
+
+def test_lifespan_builds_providers_once_and_closes_them(app_settings):
+    with TestClient(app) as client:
+        openai_client = dependencies.get_openai_client()
+        memo_store = dependencies.get_memo_store()
+        assert dependencies.get_local_vector_storage.cache_info().currsize == 1
+
+        response = client.get("/v1/memos/?user_id=user-1")
+        assert response.status_code == 200
+        assert dependencies.get_memo_store() is memo_store
+
+    assert openai_client.is_closed()
+    assert dependencies.get_memo_store.cache_info().currsize == 0
+
+
+async def test_warmup_failures_do_not_block_startup(monkeypatch, test_settings, caplog):
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def refused():
+        raise ConnectionError("refused")
+
+    def client(call):
+        return SimpleNamespace(models=SimpleNamespace(list=call))
+
+    monkeypatch.setattr(dependencies, "get_openai_client", lambda: client(slow))
+    monkeypatch.setattr(dependencies, "get_anthropic_client", lambda: client(refused))
+    test_settings.vector_backend = "local"
+    test_settings.provider_warmup_timeout_seconds = 0.1
+
+    with caplog.at_level(logging.WARNING):
+        await asyncio.wait_for(ProviderContainer(test_settings).warm(), 1)
+
+    failed = [record.provider for record in caplog.records]
+    assert failed == ["openai", "anthropic"]
+
+
+def test_ingestion_service_is_built_outside_request_overrides(app_settings):
+    overridden = object()
+    app.dependency_overrides[dependencies.get_memo_service] = lambda: overridden
+    try:
+        with TestClient(app):
+            ingestion = dependencies.get_ingestion_service()
+            assert ingestion.memo_service is not overridden
+            assert ingestion.memo_service.storage is dependencies.get_memo_store()
+    finally:
+        app.dependency_overrides.pop(dependencies.get_memo_service)
+    assert dependencies.get_ingestion_service.cache_info().currsize == 0
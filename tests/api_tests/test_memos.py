@@ -4,8 +4,13 @@ from unittest.mock import AsyncMock
 
 import pytest
 
-from src.api.dependencies import get_memo_service
-from src.core.models import Memo
+from src.api.dependencies import (get_memo_deduplicator, get_memo_service,
+                                  get_memo_store, get_vector_storage)
+from src.core.models import Memo, MemoPage
+from src.core.services.deduplication import MemoDeduplicator
+from src.infrastructure.db.sqlite_storage import SqliteStorage
+from src.infrastructure.jobs.idempotency_store import IdempotencyStore
+from src.infrastructure.jobs.job_store import JobStore
 
 
 @pytest.fixture
@@ -56,6 +61,38 @@ def test_create_memo_success(test_client, mock_memo_service):
     assert call_args[0][1] == test_user_id
 
 
+def test_repeated_upload_returns_stored_memo(test_client, mock_memo_service, tmp_path):
+    test_memo = Memo(
+        id="memo-1",
+        text="Test transcription",
+        title="Test title",
+        user_id="user-1",
+        date=datetime.now().isoformat(),
+    )
+    mock_memo_service.create_memo_from_audio.return_value = test_memo
+    mock_memo_service.get_memo.return_value = test_memo
+    deduplicator = MemoDeduplicator(IdempotencyStore(tmp_path), JobStore(tmp_path))
+    test_client.app.dependency_overrides[get_memo_service] = lambda: mock_memo_service
+    test_client.app.dependency_overrides[get_memo_deduplicator] = lambda: deduplicator
+
+    def post(content: bytes, headers: dict = None):
+        return test_client.post(
+            "/v1/memos/?user_id=user-1",
+            files={"audio": ("test.wav", io.BytesIO(content), "audio/wav")},
+            headers=headers,
+        )
+
+    assert post(b"audio").json()["id"] == "memo-1"
+    assert post(b"audio").json()["id"] == "memo-1"
+    assert mock_memo_service.create_memo_from_audio.call_count == 1
+    mock_memo_service.get_memo.assert_called_once_with("user-1", "memo-1")
+
+    # With a key, even different bytes such as a re-encoded upload are a duplicate
+    assert post(b"first", {"Idempotency-Key": "voice-1"}).status_code == 200
+    assert post(b"second", {"Idempotency-Key": "voice-1"}).status_code == 200
+    assert mock_memo_service.create_memo_from_audio.call_count == 2
+
+
 def test_create_memo_missing_user_id(test_client, mock_memo_service):
     # Override dependency
     test_client.app.dependency_overrides[get_memo_service] = lambda: mock_memo_service
@@ -256,3 +293,49 @@ def test_delete_memo_service_error(test_client, mock_memo_service):
     # Verify response
     assert response.status_code == 500
     assert "Internal server error" in response.json()["message"]
+
+
+def test_list_memos_success(test_client, mock_memo_service):
+    test_memo = Memo(
+        id="42",
+        text="Test memo content",
+        title="Test memo title",
+        user_id="test-user",
+        date=datetime.now().isoformat(),
+    )
+    mock_memo_service.list_memos.return_value = MemoPage(memos=[test_memo], next_cursor="42")
+    test_client.app.dependency_overrides[get_memo_service] = lambda: mock_memo_service
+
+    response = test_client.get("/v1/memos/?user_id=test-user&cursor=100&limit=1")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [memo["id"] for memo in data["results"]] == ["42"]
+    assert data["next_cursor"] == "42"
+    mock_memo_service.list_memos.assert_called_once_with("test-user", 1, "100")
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["", "user_id=test-user&cursor=abc", "user_id=test-user&limit=0", "user_id=test-user&limit=101"],
+    ids=["Missing user", "Invalid cursor", "Limit too small", "Limit too large"],
+)
+def test_list_memos_invalid_query(test_client, mock_memo_service, query):
+    test_client.app.dependency_overrides[get_memo_service] = lambda: mock_memo_service
+
+    response = test_client.get(f"/v1/memos/?{query}")
+
+    assert response.status_code == 422
+    mock_memo_service.list_memos.assert_not_called()
+
+
+async def test_memo_store_override_reaches_routes(test_client, test_settings):
+    storage = SqliteStorage(test_settings)
+    memo_id = await storage.store_memo(text="Text", title="Title", user_id="user-1")
+    test_client.app.dependency_overrides[get_memo_store] = lambda: storage
+    test_client.app.dependency_overrides[get_vector_storage] = lambda: AsyncMock()
+
+    response = test_client.get("/v1/memos/?user_id=user-1")
+
+    assert response.status_code == 200
+    assert [memo["id"] for memo in response.json()["results"]] == [memo_id]
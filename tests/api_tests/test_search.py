@@ -1,10 +1,16 @@
+import asyncio
+import threading
 from datetime import datetime
 from unittest.mock import AsyncMock
 
+import httpx
 import pytest
 
 from src.api.dependencies import get_search_engine
-from src.core.models import Memo, SearchResult
+from src.core.models import Memo, SearchResult, VectorData
+from src.core.services.search import SearchEngine
+from src.infrastructure.db.json_cache import JsonDbCache
+from src.infrastructure.db.local_storage import LocalStorage
 
 
 @pytest.fixture
@@ -119,3 +125,60 @@ def test_search_memos_service_error(test_client, mock_search_engine):
     data = response.json()
     assert "message" in data
     assert "error" in data["message"].lower()
+
+
+async def test_search_progresses_during_large_write(test_client, test_settings, monkeypatch):
+    storage = LocalStorage(test_settings)
+    memo_id = await storage.store_memo(text="Test content", title="Test title", user_id="test-user")
+
+    # Simulate a write of a very large database file, held until the searches finish
+    write = JsonDbCache._write
+    writing, release = threading.Event(), threading.Event()
+
+    def slow_write(self, db):
+        writing.set()
+        release.wait(10)
+        write(self, db)
+
+    monkeypatch.setattr(JsonDbCache, "_write", slow_write)
+
+    mock_text_processor = AsyncMock()
+    mock_text_processor.process.return_value = VectorData(vector=[0.1, 0.2, 0.3], text="query")
+    mock_vector_storage = AsyncMock()
+    mock_vector_storage.search.return_value = [
+        {"id": memo_id, "score": 0.95, "metadata": {"user_id": "test-user"}}
+    ]
+    search_engine = SearchEngine(
+        text_processor=mock_text_processor,
+        vector_storage=mock_vector_storage,
+        storage=storage,
+    )
+    test_client.app.dependency_overrides[get_search_engine] = lambda: search_engine
+
+    transport = httpx.ASGITransport(app=test_client.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        large_write = asyncio.create_task(
+            storage.store_memo(text="Large memo", title="Large", user_id="other-user")
+        )
+        try:
+            assert await asyncio.to_thread(writing.wait, 5)
+            # Searches blocked behind the write would never finish before it is released
+            responses = await asyncio.wait_for(
+                asyncio.gather(
+                    *(
+                        client.post(
+                            "/v1/search/",
+                            json={"query": "test query", "user_id": "test-user", "limit": 10},
+                        )
+                        for _ in range(5)
+                    )
+                ),
+                5,
+            )
+            assert not large_write.done()
+        finally:
+            release.set()
+
+        assert [r.status_code for r in responses] == [200] * 5
+        assert all(r.json()["results"][0]["id"] == memo_id for r in responses)
+        await large_write
@@ -2,6 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 
 from src.api.app import app
+from src.api.dependencies import get_memo_deduplicator
+from src.config.settings import Settings
 from src.core.models import AudioData, Memo, TranscriptionResult, VectorData
 from src.infrastructure.db.base import Storage
 from src.infrastructure.summarization.base import Summarizer
@@ -12,9 +14,22 @@ from src.infrastructure.vectorization.base import Vectorizer
 
 @pytest.fixture
 def test_client():
+    # Deduplication state would outlive the test; tests that need it override this
+    app.dependency_overrides[get_memo_deduplicator] = lambda: None
     return TestClient(app)
 
 
+@pytest.fixture
+def test_settings(tmp_path):
+    return Settings(
+        openai_api_key="secret",
+        pinecone_api_key="secret",
+        pinecone_host="secret",
+        claude_api_key="secret",
+        data_folder=tmp_path,
+    )
+
+
 @pytest.fixture
 def mock_transcriber():
     class MockTranscriber(Transcriber):
@@ -52,7 +67,7 @@ def mock_vector_storage():
 @pytest.fixture
 def mock_storage():
     class MockStorage(Storage):
-        async def store_memo(self, text: str, title: str, user_id: str) -> str:
+        async def store_memo(self, text: str, title: str, user_id: str, memo_id=None) -> str:
             return "test-memo-id"
 
         async def get_memo(self, memo_id: str) -> Memo:
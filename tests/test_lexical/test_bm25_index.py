@@ -0,0 +1,62 @@
+import pytest
+
+from src.infrastructure.lexical.bm25_index import Bm25Index, tokenize
+
+
+def test_tokenize_keeps_words_and_numbers():
+    assert tokenize("Call Ольга at 555-0199, re: Q3!") == ["call", "ольга", "at", "555", "0199", "re", "q3"]
+
+
+async def test_search_ranks_rare_terms_higher(tmp_path):
+    index = Bm25Index(tmp_path)
+    await index.add_document("user-1", "1", "meeting notes about the budget")
+    await index.add_document("user-1", "2", "the budget for Kowalski project")
+    await index.add_document("user-1", "3", "groceries: milk, eggs")
+    await index.add_document("user-2", "4", "Kowalski called")
+
+    results = await index.search("kowalski budget", "user-1")
+
+    assert [r["id"] for r in results] == ["2", "1"]
+    assert results[0]["score"] > results[1]["score"] > 0
+    assert results[0]["metadata"] == {"user_id": "user-1"}
+    assert await index.search("kowalski", "user-3") == []
+    assert await index.search("!!!", "user-1") == []
+
+
+async def test_replace_and_delete(tmp_path):
+    index = Bm25Index(tmp_path)
+    await index.add_document("user-1", "1", "old wording")
+    await index.add_document("user-1", "1", "new wording")
+    await index.add_document("user-1", "2", "other wording")
+    await index.delete_document("user-1", "2")
+
+    assert await index.search("old", "user-1") == []
+    assert [r["id"] for r in await index.search("wording", "user-1")] == ["1"]
+
+
+async def test_persists_and_syncs_between_workers(tmp_path):
+    first, second = Bm25Index(tmp_path), Bm25Index(tmp_path)
+    await first.add_documents("user-1", {"1": "invoice 4711", "2": "holiday plans"})
+    await second.delete_document("user-1", "2")
+
+    assert await second.is_indexed("user-1")
+    assert not await second.is_indexed("user-2")
+    assert [r["id"] for r in await second.search("invoice", "user-1")] == ["1"]
+    assert await first.search("holiday", "user-1") == []
+    assert [r["id"] for r in await Bm25Index(tmp_path).search("4711", "user-1")] == ["1"]
+
+
+async def test_compaction_keeps_live_documents(tmp_path):
+    index = Bm25Index(tmp_path, compaction_min_records=10)
+    await index.add_documents("user-1", {})
+    for i in range(20):
+        await index.add_document("user-1", "1", f"revision {i}")
+
+    with open(tmp_path / "lexical" / "postings.log") as log:
+        assert len(log.readlines()) < 10
+    reopened = Bm25Index(tmp_path)
+    assert await reopened.is_indexed("user-1")
+    assert [r["id"] for r in await reopened.search("revision 19", "user-1")] == ["1"]
+    assert (await reopened.search("revision", "user-1"))[0]["score"] == pytest.approx(
+        (await index.search("revision", "user-1"))[0]["score"]
+    )
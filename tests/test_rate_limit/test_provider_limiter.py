@@ -0,0 +1,123 @@
+import asyncio
+import io
+
+import httpx
+import openai
+import pytest
+
+from src.core.models import AudioData, TranscriptionResult
+from src.infrastructure.rate_limit.limited_providers import \
+    RateLimitedTranscriber
+from src.infrastructure.rate_limit.provider_limiter import (ProviderLimiter,
+                                                            TokenBucket)
+from src.infrastructure.transcription.base import Transcriber
+
+
+def rate_limit_error(retry_after: str = "0.1") -> openai.RateLimitError:
+    response = httpx.Response(
+        429,
+        headers={"retry-after": retry_after},
+        request=httpx.Request("POST", "http://openai.test/v1/embeddings"),
+    )
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def test_token_bucket_refills_continuously():
+    now = [0.0]
+    bucket = TokenBucket(per_minute=60, clock=lambda: now[0])
+
+    assert bucket.reserve(60) == 0
+    # Queued behind the spent budget at one unit per second
+    assert bucket.reserve(2) == pytest.approx(2)
+    assert bucket.utilization == pytest.approx(62 / 60)
+    now[0] = 32
+    assert bucket.reserve(1) == 0
+    assert bucket.utilization == pytest.approx(31 / 60)
+
+
+async def test_concurrency_stays_within_window():
+    limiter = ProviderLimiter("test", max_concurrency=2)
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    await asyncio.gather(*(limiter.call(call) for _ in range(6)))
+
+    assert peak == 2 and limiter.in_flight == 0
+
+
+async def test_request_budget_spaces_calls():
+    limiter = ProviderLimiter("test", requests_per_minute=600)
+    limiter.requests.reserve(limiter.requests.capacity)
+    loop = asyncio.get_running_loop()
+
+    started = loop.time()
+    await asyncio.gather(*(limiter.call(lambda: asyncio.sleep(0)) for _ in range(2)))
+
+    # 10 requests per second, and the burst is spent
+    assert loop.time() - started >= 0.19
+
+
+async def test_rate_limit_shrinks_window_pauses_and_retries():
+    limiter = ProviderLimiter("test", max_concurrency=8)
+    attempts = []
+
+    async def call():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise rate_limit_error("0.1")
+        return "ok"
+
+    assert await limiter.call(call) == "ok"
+
+    assert attempts[1] - attempts[0] >= 0.1
+    # Halved by the 429, then widened by the successful retry
+    assert limiter.window == pytest.approx(4 + 1 / 4)
+
+
+async def test_slow_calls_shrink_window_once_per_round_trip():
+    limiter = ProviderLimiter("test", max_concurrency=8, latency_target=0.01)
+
+    await asyncio.gather(*(limiter.call(lambda: asyncio.sleep(0.05)) for _ in range(4)))
+
+    assert limiter.window == 4
+
+
+async def test_client_errors_are_not_retried():
+    limiter = ProviderLimiter("test")
+    calls = 0
+    response = httpx.Response(400, request=httpx.Request("POST", "http://openai.test"))
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        raise openai.BadRequestError("Bad audio", response=response, body=None)
+
+    with pytest.raises(openai.BadRequestError):
+        await limiter.call(call)
+    assert calls == 1
+
+
+async def test_retried_transcription_rereads_audio():
+    class FlakyTranscriber(Transcriber):
+        def __init__(self):
+            self.uploads = []
+
+        async def transcribe(self, audio: AudioData) -> TranscriptionResult:
+            self.uploads.append(audio.file.read())
+            if len(self.uploads) == 1:
+                raise rate_limit_error("0")
+            return TranscriptionResult(text="Buy milk")
+
+    transcriber = FlakyTranscriber()
+    limited = RateLimitedTranscriber(transcriber, ProviderLimiter("test"))
+
+    result = await limited.transcribe(AudioData(file=io.BytesIO(b"audio"), format="ogg"))
+
+    assert result.text == "Buy milk"
+    assert transcriber.uploads == [b"audio", b"audio"]
@@ -0,0 +1,148 @@
+import asyncio
+import io
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from src.core.models import Memo
+from src.core.services.deduplication import (DuplicateInProgress,
+                                             MemoDeduplicator, request_key)
+from src.infrastructure.jobs.idempotency_store import IdempotencyStore
+from src.infrastructure.jobs.job_store import JobStore
+
+
+def memo(memo_id: str = "memo-1") -> Memo:
+    return Memo(
+        id=memo_id, text="Buy milk", title="Groceries", user_id="user-1",
+        date=datetime.now().isoformat(),
+    )
+
+
+class FakeMemos:
+    def __init__(self, delay: float = 0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.created = 0
+        self.stored: dict[str, Memo] = {}
+
+    async def create(self) -> Memo:
+        self.created += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ValueError("Transcription failed")
+        created = memo(f"memo-{self.created}")
+        self.stored[created.id] = created
+        return created
+
+    async def load(self, user_id: str, memo_id: str):
+        return self.stored.get(memo_id)
+
+
+def deduplicator(tmp_path) -> MemoDeduplicator:
+    return MemoDeduplicator(IdempotencyStore(tmp_path), JobStore(tmp_path), poll_interval=0.05)
+
+
+def test_request_key_prefers_idempotency_key():
+    audio = io.BytesIO(b"audio")
+
+    assert request_key("user-1", audio) == request_key("user-1", io.BytesIO(b"audio"))
+    assert audio.tell() == 0
+    assert request_key("user-1", audio) != request_key("user-2", audio)
+    assert request_key("user-1", audio, "abc") == request_key("user-1", io.BytesIO(b"x"), "abc")
+    assert request_key("user-1", audio, "abc") != request_key("user-1", audio)
+
+
+async def test_concurrent_duplicates_run_pipeline_once(tmp_path):
+    # Separate instances stand in for separate workers
+    first, second = deduplicator(tmp_path), deduplicator(tmp_path)
+    memos = FakeMemos(delay=0.2)
+
+    results = await asyncio.gather(
+        first.create_memo("key", "user-1", memos.create, memos.load),
+        first.create_memo("key", "user-1", memos.create, memos.load),
+        second.create_memo("key", "user-1", memos.create, memos.load),
+    )
+
+    assert memos.created == 1
+    assert {result.id for result in results} == {"memo-1"}
+
+
+async def test_failed_or_deleted_memo_can_be_created_again(tmp_path):
+    dedupe = deduplicator(tmp_path)
+    memos = FakeMemos(fail=True)
+
+    with pytest.raises(ValueError):
+        await dedupe.create_memo("key", "user-1", memos.create, memos.load)
+    memos.fail = False
+    assert (await dedupe.create_memo("key", "user-1", memos.create, memos.load)).id == "memo-2"
+
+    memos.stored.clear()
+    assert (await dedupe.create_memo("key", "user-1", memos.create, memos.load)).id == "memo-3"
+
+
+async def test_duplicate_submissions_share_a_job(tmp_path):
+    dedupe = deduplicator(tmp_path)
+    memos = FakeMemos()
+    submitted = []
+
+    async def submit():
+        job = await dedupe.job_store.create("user-1", b"audio", "ogg", "request")
+        submitted.append(job)
+        return job
+
+    first = await dedupe.submit_job("key", "user-1", "request", submit, memos.load)
+    second = await dedupe.submit_job("key", "user-1", "request", submit, memos.load)
+
+    assert first.id == second.id and len(submitted) == 1
+
+    # A synchronous duplicate waits for the job's memo
+    claimed = await dedupe.job_store.claim()
+    memos.stored["memo-9"] = memo("memo-9")
+    await dedupe.job_store.succeed(claimed, "memo-9")
+    assert (await dedupe.create_memo("key", "user-1", memos.create, memos.load)).id == "memo-9"
+    assert memos.created == 0
+
+
+async def test_synchronous_duplicate_stops_waiting_for_slow_job(tmp_path):
+    dedupe = deduplicator(tmp_path)
+    dedupe.job_wait = 0.1
+    memos = FakeMemos()
+
+    async def submit():
+        return await dedupe.job_store.create("user-1", b"audio", "ogg", "request")
+
+    job = await dedupe.submit_job("key", "user-1", "request", submit, memos.load)
+
+    with pytest.raises(DuplicateInProgress) as exc_info:
+        await dedupe.create_memo("key", "user-1", memos.create, memos.load)
+    assert exc_info.value.job.id == job.id
+    assert memos.created == 0
+
+
+async def test_async_duplicate_of_existing_memo_gets_finished_job(tmp_path):
+    dedupe = deduplicator(tmp_path)
+    memos = FakeMemos()
+    created = await dedupe.create_memo("key", "user-1", memos.create, memos.load)
+
+    job = await dedupe.submit_job("key", "user-1", "request", None, memos.load)
+
+    assert (job.status, job.memo_id) == ("succeeded", created.id)
+
+
+async def test_pending_timeout_comes_from_settings(test_settings):
+    from src.api.dependencies import get_job_store, get_memo_deduplicator
+
+    test_settings.memo_deduplication_pending_timeout_seconds = 0
+    get_memo_deduplicator.cache_clear()
+    get_job_store.cache_clear()
+    try:
+        with patch("src.api.dependencies.get_settings", return_value=test_settings):
+            store = get_memo_deduplicator().store
+    finally:
+        get_memo_deduplicator.cache_clear()
+        get_job_store.cache_clear()
+
+    assert await store.claim("key", "user-1") is None
+    # The first claim never recorded a result, so it is taken over at once
+    assert await store.claim("key", "user-1") is None
@@ -0,0 +1,242 @@
+import asyncio
+import io
+import sqlite3
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.models import AudioData, Memo, MemoCheckpoint
+from src.core.services.ingestion import IngestionService
+from src.infrastructure.jobs.job_store import JobStore, LeaseLost
+
+
+def audio(content: bytes = b"audio") -> AudioData:
+    return AudioData(file=io.BytesIO(content), format="ogg")
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def memo_service(failures: list[Exception] = ()) -> AsyncMock:
+    """Fails one attempt per item of ``failures`` after transcribing, then succeeds"""
+    failures = list(failures)
+
+    async def create_memo_from_audio(audio, user_id, checkpoint, on_checkpoint):
+        checkpoint = checkpoint.model_copy()
+        if checkpoint.transcript is None:
+            checkpoint.transcript = audio.file.read().decode()
+            await on_checkpoint("transcribed", checkpoint)
+        if failures:
+            raise failures.pop(0)
+        return Memo(
+            id="memo-1",
+            text=checkpoint.transcript,
+            title="Title",
+            user_id=user_id,
+            date=datetime.now().isoformat(),
+        )
+
+    service = AsyncMock()
+    service.create_memo_from_audio.side_effect = create_memo_from_audio
+    return service
+
+
+async def test_submitted_job_runs_in_background(tmp_path):
+    store = JobStore(tmp_path)
+    service = IngestionService(store, memo_service(), workers=2, poll_interval=0.05)
+
+    job = await service.submit(audio(b"hello"), "user-1", "request-1")
+    assert job.status == "queued"
+    assert list((tmp_path / "jobs").glob(f"{job.id}.ogg"))
+
+    service.start()
+    try:
+        finished = await service.get(job.id, "user-1", wait=5)
+    finally:
+        await service.stop()
+
+    assert (finished.status, finished.memo_id, finished.stage) == (
+        "succeeded", "memo-1", "transcribed"
+    )
+    assert finished.attempts == 1
+    call = service.memo_service.create_memo_from_audio.call_args
+    assert call.args[1] == "user-1" and call.args[0].format == "ogg"
+    assert not call.kwargs["checkpoint"].started
+    # The audio is only kept until the memo exists
+    assert not list((tmp_path / "jobs").glob(f"{job.id}.*"))
+    assert await service.get(job.id, "user-2") is None
+
+
+async def test_failed_attempt_is_retried_from_checkpoint(tmp_path):
+    store = JobStore(tmp_path, retry_base=0.01)
+    service = IngestionService(
+        store, memo_service([ProviderError(503)]), workers=1, poll_interval=0.05
+    )
+    service.start()
+    try:
+        job = await service.submit(audio(b"hello"), "user-1", "request-1")
+        finished = await service.get(job.id, "user-1", wait=5)
+    finally:
+        await service.stop()
+
+    assert (finished.status, finished.attempts) == ("succeeded", 2)
+    assert finished.error is None
+    first, second = service.memo_service.create_memo_from_audio.call_args_list
+    assert not first.kwargs["checkpoint"].started
+    # The second attempt skips transcription
+    assert second.kwargs["checkpoint"].transcript == "hello"
+
+
+async def test_job_is_dead_lettered_after_max_attempts(tmp_path):
+    store = JobStore(tmp_path, max_attempts=3, retry_base=0.01)
+    service = IngestionService(
+        store, memo_service([ValueError("Summary failed")] * 3), workers=1, poll_interval=0.05
+    )
+    service.start()
+    try:
+        job = await service.submit(audio(), "user-1", "request-1")
+        finished = await service.get(job.id, "user-1", wait=5)
+    finally:
+        await service.stop()
+
+    assert (finished.status, finished.attempts) == ("failed", 3)
+    assert finished.stage == "transcribed"
+    assert finished.error == "ValueError: Summary failed"
+    # Dead-lettered audio stays for inspection and can be queued again
+    assert list((tmp_path / "jobs").glob(f"{job.id}.ogg"))
+    assert await store.requeue(job.id)
+    assert (await store.get(job.id)).status == "queued"
+
+    # The requeued job resumes from its checkpoint rather than starting over
+    service.start()
+    try:
+        finished = await service.get(job.id, "user-1", wait=5)
+    finally:
+        await service.stop()
+    assert (finished.status, finished.attempts) == ("succeeded", 1)
+    resumed = service.memo_service.create_memo_from_audio.call_args
+    assert resumed.kwargs["checkpoint"].transcript == "audio"
+
+
+async def test_client_error_is_not_retried(tmp_path):
+    service = IngestionService(
+        JobStore(tmp_path, retry_base=0.01),
+        memo_service([ProviderError(400), ProviderError(400)]),
+        workers=1,
+        poll_interval=0.05,
+    )
+    service.start()
+    try:
+        job = await service.submit(audio(), "user-1", "request-1")
+        finished = await service.get(job.id, "user-1", wait=5)
+    finally:
+        await service.stop()
+
+    assert (finished.status, finished.attempts) == ("failed", 1)
+    assert finished.error == "ProviderError: HTTP 400"
+
+
+async def test_worker_survives_errors_and_fails_job_without_audio(tmp_path):
+    store = JobStore(tmp_path)
+    service = IngestionService(store, memo_service(), workers=1, poll_interval=0.05)
+    missing = await service.submit(audio(), "user-1", "request-1")
+    (tmp_path / "jobs" / f"{missing.id}.ogg").unlink()
+    claim = store.claim
+    calls = 0
+
+    async def flaky_claim():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return await claim()
+
+    store.claim = flaky_claim
+    service.start()
+    try:
+        job = await service.submit(audio(b"hello"), "user-1", "request-2")
+        finished = await service.get(job.id, "user-1", wait=5)
+    finally:
+        await service.stop()
+
+    assert finished.status == "succeeded"
+    dead = await store.get(missing.id)
+    assert (dead.status, dead.attempts) == ("failed", 1)
+    assert dead.error == "FileNotFoundError: audio is missing"
+
+
+async def test_expired_lease_hands_job_to_another_worker(tmp_path):
+    # The first store's leases are already expired when granted
+    crashed, other = JobStore(tmp_path, visibility_timeout=-1), JobStore(tmp_path)
+    job = await crashed.create("user-1", b"audio", "ogg", "request")
+    stale = await crashed.claim()
+    await crashed.checkpoint(stale, "transcribed", MemoCheckpoint(transcript="text"))
+
+    claimed = await other.claim()
+
+    assert claimed.job.id == job.id and claimed.job.attempts == 2
+    assert claimed.checkpoint.transcript == "text"
+    with pytest.raises(LeaseLost):
+        await crashed.succeed(stale, "memo-1")
+    await other.succeed(claimed, "memo-1")
+    assert (await other.get(job.id)).status == "succeeded"
+
+
+async def test_expired_last_attempt_is_dead_lettered(tmp_path):
+    crashed = JobStore(tmp_path, visibility_timeout=-1, max_attempts=1)
+    job = await crashed.create("user-1", b"audio", "ogg", "request")
+    await crashed.claim()
+
+    assert await JobStore(tmp_path, max_attempts=1).claim() is None
+    dead = await crashed.get(job.id)
+    assert (dead.status, dead.attempts) == ("failed", 1)
+    assert dead.error.startswith("LeaseLost")
+
+
+async def test_lease_is_renewed_during_slow_stages(tmp_path):
+    store = JobStore(tmp_path, visibility_timeout=0.3)
+    service = memo_service()
+    create = service.create_memo_from_audio.side_effect
+
+    async def slow_create(audio, user_id, checkpoint, on_checkpoint):
+        await asyncio.sleep(1)
+        return await create(audio, user_id, checkpoint, on_checkpoint)
+
+    service.create_memo_from_audio.side_effect = slow_create
+    ingestion = IngestionService(store, service, workers=1, poll_interval=0.05)
+    ingestion.start()
+    try:
+        job = await ingestion.submit(audio(), "user-1", "request-1")
+        await asyncio.sleep(0.6)
+        # Past the original lease, yet still held by the running worker
+        assert await JobStore(tmp_path).claim() is None
+        finished = await ingestion.get(job.id, "user-1", wait=5)
+    finally:
+        await ingestion.stop()
+
+    assert (finished.status, finished.attempts) == ("succeeded", 1)
+
+
+async def test_get_without_wait_returns_current_state(tmp_path):
+    service = IngestionService(JobStore(tmp_path), memo_service(), poll_interval=0.05)
+    job = await service.submit(audio(), "user-1", "request-1")
+
+    started = asyncio.get_running_loop().time()
+    assert (await service.get(job.id, "user-1")).status == "queued"
+    assert (await service.get(job.id, "user-1", wait=0.2)).status == "queued"
+    assert asyncio.get_running_loop().time() - started >= 0.2
+
+
+async def test_each_job_is_claimed_once_across_workers(tmp_path):
+    first, second = JobStore(tmp_path), JobStore(tmp_path)
+    jobs = [await first.create("user-1", b"audio", "ogg", "request") for _ in range(4)]
+
+    claimed = [await store.claim() for store in (first, second, second, first, second)]
+
+    assert [c.job.id for c in claimed[:4]] == [job.id for job in jobs]
+    assert claimed[4] is None
+    assert claimed[0].audio_path.read_bytes() == b"audio" and claimed[0].request_id == "request"
@@ -1,3 +1,4 @@
+import asyncio
 import io
 from datetime import datetime
 from unittest.mock import AsyncMock
@@ -6,9 +7,11 @@ import pytest
 from anthropic import AnthropicError
 from openai import OpenAIError
 
-from src.core.models import (AudioData, Memo, Summary, TranscriptionResult,
-                             VectorData)
+from src.core.models import (AudioData, Memo, MemoCheckpoint, Summary,
+                             TranscriptionResult, VectorData)
 from src.core.services.memo import MemoService
+from src.core.services.search_cache import SearchCache
+from src.infrastructure.db.base import Storage
 
 
 async def test_create_memo_complete_flow():
@@ -37,7 +40,8 @@ async def test_create_memo_complete_flow():
         vector=test_vector, text=test_transcription, metadata={}
     )
 
-    mock_storage = AsyncMock()
+    mock_storage = AsyncMock(spec=Storage)
+    mock_storage.new_memo_id.return_value = test_memo_id
     mock_storage.store_memo.return_value = test_memo_id
     mock_storage.get_memo.return_value = Memo(
         id=test_memo_id,
@@ -67,7 +71,7 @@ async def test_create_memo_complete_flow():
     mock_summarizer.summarize.assert_called_once_with(test_transcription)
     mock_text_processor.process.assert_called_once_with(test_transcription)
     mock_storage.store_memo.assert_called_once_with(
-        text=test_transcription, title=test_summary, user_id=test_user_id
+        text=test_transcription, title=test_summary, user_id=test_user_id, memo_id=test_memo_id
     )
     mock_vector_storage.store_vector.assert_called_once_with(
         test_vector, memo_id=test_memo_id, metadata={"user_id": test_user_id}
@@ -94,7 +98,7 @@ async def test_create_memo_transcription_error():
     # Other mocks (shouldn't be called)
     mock_summarizer = AsyncMock()
     mock_text_processor = AsyncMock()
-    mock_storage = AsyncMock()
+    mock_storage = AsyncMock(spec=Storage)
     mock_vector_storage = AsyncMock()
 
     service = MemoService(
@@ -133,7 +137,7 @@ async def test_create_memo_summarization_error():
     mock_summarizer.summarize.side_effect = AnthropicError("Summarization failed")
 
     mock_text_processor = AsyncMock()
-    mock_storage = AsyncMock()
+    mock_storage = AsyncMock(spec=Storage)
     mock_vector_storage = AsyncMock()
 
     service = MemoService(
@@ -150,12 +154,144 @@ async def test_create_memo_summarization_error():
 
     assert "Summarization failed" in str(exc_info.value)
 
-    # Verify later operations were not performed
-    mock_text_processor.process.assert_not_called()
+    # Embedding runs alongside summarization, but nothing is stored
     mock_storage.store_memo.assert_not_called()
     mock_vector_storage.store_vector.assert_not_called()
 
 
+async def test_failed_summary_cancels_embedding():
+    embedding_cancelled = asyncio.Event()
+
+    async def slow_vectorize(text):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            embedding_cancelled.set()
+            raise
+
+    mock_audio_processor = AsyncMock()
+    mock_audio_processor.process.return_value = TranscriptionResult(text="Transcript")
+    mock_summarizer = AsyncMock()
+    mock_summarizer.summarize.side_effect = AnthropicError("Summarization failed")
+    mock_text_processor = AsyncMock()
+    mock_text_processor.process.side_effect = slow_vectorize
+
+    service = MemoService(
+        audio_processor=mock_audio_processor,
+        text_processor=mock_text_processor,
+        vector_storage=AsyncMock(),
+        storage=AsyncMock(spec=Storage),
+        summarizer=mock_summarizer,
+    )
+
+    with pytest.raises(AnthropicError):
+        await asyncio.wait_for(
+            service.create_memo_from_audio(
+                AudioData(file=io.BytesIO(b"audio"), format="wav"), "user-1"
+            ),
+            1,
+        )
+    await asyncio.wait_for(embedding_cancelled.wait(), 1)
+
+
+async def test_resumed_memo_skips_completed_stages(test_settings):
+    from src.infrastructure.db.local_storage import LocalStorage
+
+    storage = LocalStorage(test_settings)
+    mock_audio_processor = AsyncMock()
+    mock_summarizer = AsyncMock()
+    mock_summarizer.summarize.return_value = Summary(text="Transcript", summary="Title")
+    mock_text_processor = AsyncMock()
+    mock_text_processor.process.side_effect = OpenAIError("Embedding failed")
+    service = MemoService(
+        audio_processor=mock_audio_processor,
+        text_processor=mock_text_processor,
+        vector_storage=AsyncMock(),
+        storage=storage,
+        summarizer=mock_summarizer,
+    )
+    checkpoints = []
+
+    async def on_checkpoint(stage, checkpoint):
+        checkpoints.append((stage, checkpoint.model_copy()))
+
+    audio = AudioData(file=io.BytesIO(b"audio"), format="wav")
+    with pytest.raises(OpenAIError):
+        await service.create_memo_from_audio(
+            audio, "user-1", MemoCheckpoint(transcript="Transcript"), on_checkpoint
+        )
+    stage, checkpoint = checkpoints[-1]
+    assert stage == "titled" and checkpoint.title == "Title"
+
+    mock_text_processor.process.side_effect = None
+    mock_text_processor.process.return_value = VectorData(vector=[0.1, 0.2], text="Transcript")
+    memo = await service.create_memo_from_audio(audio, "user-1", checkpoint, on_checkpoint)
+
+    mock_audio_processor.process.assert_not_called()
+    assert mock_summarizer.summarize.call_count == 1
+    assert [stage for stage, _ in checkpoints] == ["titled", "embedded", "stored", "indexed"]
+    # The ID chosen by the failed attempt is kept
+    assert checkpoint.memo_id == checkpoints[-1][1].memo_id == memo.id
+    assert (memo.title, memo.vector) == ("Title", [0.1, 0.2])
+
+
+async def test_resumed_memo_overwrites_memo_stored_before_crash(test_settings):
+    from src.infrastructure.db.local_storage import LocalStorage
+
+    storage = LocalStorage(test_settings)
+    checkpoint = MemoCheckpoint(
+        transcript="Transcript", title="Title", vector=[0.1, 0.2], memo_id=storage.new_memo_id()
+    )
+    # The crashed attempt stored the memo but never recorded it
+    await storage.store_memo(
+        text="Transcript", title="Title", user_id="user-1", memo_id=checkpoint.memo_id
+    )
+    vector_storage = AsyncMock()
+    service = MemoService(
+        audio_processor=AsyncMock(),
+        text_processor=AsyncMock(),
+        vector_storage=vector_storage,
+        storage=storage,
+        summarizer=AsyncMock(),
+    )
+
+    memo = await service.create_memo_from_audio(
+        AudioData(file=io.BytesIO(b"audio"), format="wav"), "user-1", checkpoint
+    )
+
+    assert memo.id == checkpoint.memo_id
+    assert [m.id for m in await storage.list_memos("user-1", 10)] == [memo.id]
+    vector_storage.store_vector.assert_awaited_once_with(
+        [0.1, 0.2], memo_id=memo.id, metadata={"user_id": "user-1"}
+    )
+
+
+async def test_resumed_memo_moves_off_an_id_taken_by_another_memo(test_settings):
+    from src.infrastructure.db.local_storage import LocalStorage
+
+    storage = LocalStorage(test_settings)
+    taken = storage.new_memo_id()
+    await storage.store_memo(text="Other", title="Other", user_id="user-1", memo_id=taken)
+    checkpoint = MemoCheckpoint(
+        transcript="Transcript", title="Title", vector=[0.1, 0.2], memo_id=taken
+    )
+    service = MemoService(
+        audio_processor=AsyncMock(),
+        text_processor=AsyncMock(),
+        vector_storage=AsyncMock(),
+        storage=storage,
+        summarizer=AsyncMock(),
+    )
+
+    memo = await service.create_memo_from_audio(
+        AudioData(file=io.BytesIO(b"audio"), format="wav"), "user-1", checkpoint
+    )
+
+    assert memo.id != taken
+    assert (await storage.get_memo("user-1", taken)).text == "Other"
+    assert (await storage.get_memo("user-1", memo.id)).text == "Transcript"
+
+
 async def test_create_memo_vectorization_error():
     test_audio = AudioData(file=io.BytesIO(b"test audio content"), format="wav")
     test_user_id = "test-user-123"
@@ -176,7 +312,7 @@ async def test_create_memo_vectorization_error():
     mock_text_processor = AsyncMock()
     mock_text_processor.process.side_effect = OpenAIError("Vectorization failed")
 
-    mock_storage = AsyncMock()
+    mock_storage = AsyncMock(spec=Storage)
     mock_vector_storage = AsyncMock()
 
     service = MemoService(
@@ -221,7 +357,7 @@ async def test_create_memo_storage_error():
         vector=test_vector, text=test_transcription, metadata={}
     )
 
-    mock_storage = AsyncMock()
+    mock_storage = AsyncMock(spec=Storage)
     mock_storage.store_memo.side_effect = Exception("Storage error")
 
     mock_vector_storage = AsyncMock()
@@ -268,7 +404,7 @@ async def test_create_memo_vector_storage_error():
         vector=test_vector, text=test_transcription, metadata={}
     )
 
-    mock_storage = AsyncMock()
+    mock_storage = AsyncMock(spec=Storage)
     mock_storage.store_memo.return_value = test_memo_id
 
     mock_vector_storage = AsyncMock()
@@ -313,7 +449,7 @@ async def test_delete_memo_success():
     mock_summarizer = AsyncMock()
 
     # Configure storage mock to return our test memo
-    mock_storage = AsyncMock()
+    mock_storage = AsyncMock(spec=Storage)
     mock_storage.delete_memo.return_value = test_memo
 
     # Create service instance
@@ -345,7 +481,7 @@ async def test_delete_memo_not_found():
     test_memo_id = "nonexistent-memo"
 
     # Configure storage mock to return None (memo not found)
-    mock_storage = AsyncMock()
+    mock_storage = AsyncMock(spec=Storage)
     mock_storage.delete_memo.return_value = None
 
     service = MemoService(
@@ -368,7 +504,7 @@ async def test_delete_memo_storage_error():
     test_memo_id = "test-memo-123"
 
     # Configure storage mock to raise an exception
-    mock_storage = AsyncMock()
+    mock_storage = AsyncMock(spec=Storage)
     mock_storage.delete_memo.side_effect = Exception("Storage error")
 
     service = MemoService(
@@ -385,3 +521,69 @@ async def test_delete_memo_storage_error():
 
     assert "Storage error" in str(exc_info.value)
     mock_storage.delete_memo.assert_called_once_with(test_user_id, test_memo_id)
+
+
+async def test_list_memos_pages_through_history(test_settings):
+    from src.infrastructure.db.local_storage import LocalStorage
+
+    storage = LocalStorage(test_settings)
+    memo_ids = [
+        await storage.store_memo(text=f"Text {i}", title="Title", user_id="user-1")
+        for i in range(5)
+    ]
+    service = MemoService(
+        audio_processor=AsyncMock(),
+        text_processor=AsyncMock(),
+        vector_storage=AsyncMock(),
+        storage=storage,
+        summarizer=AsyncMock(),
+    )
+
+    pages, cursor = [], None
+    while True:
+        page = await service.list_memos("user-1", limit=2, cursor=cursor)
+        pages.append([memo.id for memo in page.memos])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert pages == [memo_ids[4:2:-1], memo_ids[2:0:-1], memo_ids[:1]]
+
+
+async def test_writes_update_lexical_index_and_search_cache(test_settings):
+    from src.infrastructure.db.local_storage import LocalStorage
+    from src.infrastructure.lexical.bm25_index import Bm25Index
+
+    mock_audio_processor = AsyncMock()
+    mock_audio_processor.process.return_value = TranscriptionResult(
+        text="Invoice 4711 is due on Friday"
+    )
+    mock_summarizer = AsyncMock()
+    mock_summarizer.summarize.return_value = Summary(
+        text="Invoice 4711 is due on Friday", summary="Kowalski invoice"
+    )
+    mock_text_processor = AsyncMock()
+    mock_text_processor.process.return_value = VectorData(
+        vector=[0.1, 0.2, 0.3], text="Invoice 4711 is due on Friday"
+    )
+    index = Bm25Index(test_settings.data_folder)
+    cache = SearchCache()
+    service = MemoService(
+        audio_processor=mock_audio_processor,
+        text_processor=mock_text_processor,
+        vector_storage=AsyncMock(),
+        storage=LocalStorage(test_settings),
+        summarizer=mock_summarizer,
+        lexical_index=index,
+        search_cache=cache,
+    )
+
+    memo = await service.create_memo_from_audio(
+        AudioData(file=io.BytesIO(b"audio"), format="wav"), "user-1"
+    )
+    assert [r["id"] for r in await index.search("kowalski 4711", "user-1")] == [memo.id]
+    assert cache.generation("user-1") == 1
+
+    await service.delete_memo("user-1", memo.id)
+    assert await index.search("kowalski 4711", "user-1") == []
+    assert cache.generation("user-1") == 2
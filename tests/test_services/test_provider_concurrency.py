@@ -0,0 +1,120 @@
+import asyncio
+import io
+
+import httpx
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from src.core.models import AudioData
+from src.core.processors.audio import AudioProcessor
+from src.core.processors.text import TextProcessor
+from src.core.services.memo import MEMO_STAGE_DURATION, MemoService
+from src.infrastructure.db.local_storage import LocalStorage
+from src.infrastructure.summarization.claude_summarizer import ClaudeSummarizer
+from src.infrastructure.transcription.openai_transcriber import \
+    OpenAITranscriber
+from src.infrastructure.vector_db.local_vector_storage import \
+    LocalVectorStorage
+from src.infrastructure.vectorization.open_ai_vectorizer import \
+    OpenAIVectorizer
+
+# Simulated latency of every provider call
+DELAY = 0.2
+
+RESPONSES = {
+    "/v1/audio/transcriptions": {"text": "Buy milk"},
+    "/v1/embeddings": {
+        "object": "list",
+        "model": "text-embedding-ada-002",
+        "data": [{"object": "embedding", "index": 0, "embedding": [0.1, 0.2, 0.3]}],
+        "usage": {"prompt_tokens": 2, "total_tokens": 2},
+    },
+    "/v1/messages": {
+        "id": "msg_1",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-3-5-sonnet-20241022",
+        "content": [{"type": "text", "text": "Groceries"}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 2, "output_tokens": 1},
+    },
+}
+
+
+class SlowProvider:
+    """Answers after ``DELAY`` and records when each call ran"""
+
+    def __init__(self):
+        self.calls: list[tuple[str, float, float]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(DELAY)
+        finally:
+            self.in_flight -= 1
+        self.calls.append((request.url.path, started, loop.time()))
+        return httpx.Response(200, json=RESPONSES[request.url.path])
+
+    def span(self, path: str) -> tuple[float, float]:
+        return next((started, ended) for p, started, ended in self.calls if p == path)
+
+
+def memo_service(test_settings, provider: SlowProvider) -> MemoService:
+    transport = httpx.MockTransport(provider)
+    openai_client = AsyncOpenAI(
+        api_key="secret",
+        base_url="http://openai.test/v1",
+        http_client=httpx.AsyncClient(transport=transport),
+    )
+    anthropic_client = AsyncAnthropic(
+        api_key="secret",
+        base_url="http://anthropic.test",
+        http_client=httpx.AsyncClient(transport=transport),
+    )
+    return MemoService(
+        audio_processor=AudioProcessor(OpenAITranscriber(api_key="secret", client=openai_client)),
+        text_processor=TextProcessor(OpenAIVectorizer(api_key="secret", client=openai_client)),
+        vector_storage=LocalVectorStorage(test_settings.data_folder),
+        storage=LocalStorage(test_settings),
+        summarizer=ClaudeSummarizer(api_key="secret", client=anthropic_client),
+    )
+
+
+async def test_parallel_memo_creations_do_not_block_each_other(test_settings):
+    provider = SlowProvider()
+    service = memo_service(test_settings, provider)
+
+    def audio() -> AudioData:
+        return AudioData(file=io.BytesIO(b"audio"), format="wav")
+
+    memos = await asyncio.gather(
+        *(service.create_memo_from_audio(audio(), "user-1") for _ in range(10))
+    )
+
+    assert {(memo.text, memo.title) for memo in memos} == {("Buy milk", "Groceries")}
+    assert len({memo.id for memo in memos}) == 10
+    # Blocking clients would serialise the calls, one in flight at a time
+    assert provider.max_in_flight >= 10
+
+
+async def test_summary_and_embedding_overlap(test_settings):
+    provider = SlowProvider()
+    service = memo_service(test_settings, provider)
+    stages_before = MEMO_STAGE_DURATION.labels(stage="summarize")._sum.get()
+
+    await service.create_memo_from_audio(AudioData(file=io.BytesIO(b"audio"), format="wav"), "user-1")
+
+    # Both start after transcription and before either of them ends
+    _, transcribed = provider.span("/v1/audio/transcriptions")
+    summary_start, summary_end = provider.span("/v1/messages")
+    embedding_start, embedding_end = provider.span("/v1/embeddings")
+    assert transcribed <= min(summary_start, embedding_start)
+    assert max(summary_start, embedding_start) < min(summary_end, embedding_end)
+    assert MEMO_STAGE_DURATION.labels(stage="summarize")._sum.get() > stages_before
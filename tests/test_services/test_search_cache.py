@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from src.core.services.search_cache import SEARCH_CACHE_REQUESTS, SearchCache
+
+
+def requests(result: str) -> float:
+    return SEARCH_CACHE_REQUESTS.labels(result=result)._value.get()
+
+
+def test_normalized_queries_share_an_entry():
+    cache = SearchCache()
+    hits, misses = requests("hit"), requests("miss")
+    assert cache.get("user-1", 0, "Groceries  list", 3) is None
+    cache.put("user-1", 0, "Groceries  list", 3, [{"id": "1"}])
+
+    assert cache.get("user-1", 0, " groceries list", 3) == [{"id": "1"}]
+    assert cache.get("user-1", 0, "groceries list", 5) is None
+    assert cache.get("user-2", 0, "groceries list", 3) is None
+    assert (requests("hit") - hits, requests("miss") - misses) == (1, 3)
+
+
+def test_invalidate_hides_entries_and_rejects_stale_puts():
+    cache = SearchCache()
+    cache.put("user-1", 0, "query", 3, [{"id": "1"}])
+    generation = cache.generation("user-1")
+    cache.invalidate("user-1")
+
+    assert cache.get("user-1", cache.generation("user-1"), "query", 3) is None
+    # A search that started before the write must not repopulate the cache
+    cache.put("user-1", generation, "query", 3, [{"id": "1"}])
+    assert cache.get("user-1", generation, "query", 3) is None
+
+
+def test_evicts_least_recently_used_and_expired_entries():
+    cache = SearchCache(max_entries=2, ttl_seconds=10)
+    with patch("src.core.services.search_cache.time.monotonic", return_value=100):
+        cache.put("user-1", 0, "a", 3, [])
+        cache.put("user-1", 0, "b", 3, [])
+        cache.get("user-1", 0, "a", 3)
+        cache.put("user-1", 0, "c", 3, [])
+        assert cache.get("user-1", 0, "b", 3) is None
+        assert cache.get("user-1", 0, "a", 3) == []
+    with patch("src.core.services.search_cache.time.monotonic", return_value=111):
+        assert cache.get("user-1", 0, "a", 3) is None
+
+
+def test_cache_is_off_unless_configured(test_settings):
+    from src.api.dependencies import get_search_cache
+
+    get_search_cache.cache_clear()
+    try:
+        with patch("src.api.dependencies.get_settings", return_value=test_settings):
+            assert get_search_cache() is None
+            get_search_cache.cache_clear()
+            test_settings.search_cache_max_entries = 16
+            assert get_search_cache().max_entries == 16
+    finally:
+        get_search_cache.cache_clear()
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 from unittest.mock import AsyncMock
 
@@ -29,9 +30,11 @@ async def test_search_complete_flow():
     ]
 
     mock_storage = AsyncMock()
-    mock_storage.get_memo.return_value = Memo(
-        id=mock_memo_id, text="Test memo content", title="Test memo", user_id=user_id, date=test_memo_date
-    )
+    mock_storage.get_memos.return_value = {
+        mock_memo_id: Memo(
+            id=mock_memo_id, text="Test memo content", title="Test memo", user_id=user_id, date=test_memo_date
+        )
+    }
 
     engine = SearchEngine(
         text_processor=mock_text_processor,
@@ -44,7 +47,7 @@ async def test_search_complete_flow():
     # Verify the complete flow
     mock_text_processor.process.assert_called_once_with(query)
     mock_vector_storage.search.assert_called_once_with(test_vector, user_id, 10)
-    mock_storage.get_memo.assert_called_once_with(user_id, mock_memo_id)
+    mock_storage.get_memos.assert_called_once_with(user_id, [mock_memo_id])
 
     # Verify results
     assert len(results) == 1
@@ -86,7 +89,7 @@ async def test_empty_search_results():
     # Verify interactions
     mock_text_processor.process.assert_called_once_with(query)
     mock_vector_storage.search.assert_called_once_with(test_vector, user_id, 10)
-    mock_storage.get_memo.assert_not_called()
+    mock_storage.get_memos.assert_not_called()
 
     # Verify results
     assert len(results) == 0
@@ -113,21 +116,17 @@ async def test_search_with_missing_memo():
         {"id": missing_memo_id, "score": 0.85, "metadata": {"user_id": user_id}},
     ]
 
-    # Configure storage to return a memo for one ID but None for the other
+    # Configure storage to return a memo for one ID only
     mock_storage = AsyncMock()
-
-    async def get_memo_side_effect(user_id: str, memo_id: str):
-        if memo_id == existing_memo_id:
-            return Memo(
-                id=existing_memo_id,
-                text="Existing memo text",
-                title="Existing memo",
-                user_id=user_id,
-                date=datetime.now().isoformat(),
-            )
-        return None
-
-    mock_storage.get_memo.side_effect = get_memo_side_effect
+    mock_storage.get_memos.return_value = {
+        existing_memo_id: Memo(
+            id=existing_memo_id,
+            text="Existing memo text",
+            title="Existing memo",
+            user_id=user_id,
+            date=datetime.now().isoformat(),
+        )
+    }
 
     # Create search engine instance
     search_engine = SearchEngine(
@@ -142,7 +141,10 @@ async def test_search_with_missing_memo():
     # Verify interactions
     mock_text_processor.process.assert_called_once_with(query)
     mock_vector_storage.search.assert_called_once_with(test_vector, user_id, 10)
-    assert mock_storage.get_memo.call_count == 2  # Should try to fetch both memos
+    # Should fetch both memos in a single call
+    mock_storage.get_memos.assert_called_once_with(
+        user_id, [existing_memo_id, missing_memo_id]
+    )
 
     # Verify results
     assert len(results) == 1  # Should only return the existing memo
@@ -179,7 +181,7 @@ async def test_search_with_vector_storage_error():
         await search_engine.search(query, user_id, limit=10)
 
     assert "Connection error" in str(exc_info.value)
-    mock_storage.get_memo.assert_not_called()  # Should not reach the storage layer
+    mock_storage.get_memos.assert_not_called()  # Should not reach the storage layer
 
 
 async def test_search_with_text_processor_error():
@@ -206,7 +208,7 @@ async def test_search_with_text_processor_error():
 
     assert "API rate limit exceeded" in str(exc_info.value)
     mock_vector_storage.search.assert_not_called()  # Should not reach vector storage
-    mock_storage.get_memo.assert_not_called()  # Should not reach storage
+    mock_storage.get_memos.assert_not_called()  # Should not reach storage
 
 
 async def test_search_with_storage_error():
@@ -230,7 +232,7 @@ async def test_search_with_storage_error():
 
     # Configure storage to raise an error
     mock_storage = AsyncMock()
-    mock_storage.get_memo.side_effect = Exception("Database connection error")
+    mock_storage.get_memos.side_effect = Exception("Database connection error")
 
     search_engine = SearchEngine(
         text_processor=mock_text_processor,
@@ -332,9 +334,16 @@ async def test_search_minimum_score_threshold():
     ]
 
     mock_storage = AsyncMock()
-    mock_storage.get_memo.side_effect = lambda user_id, memo_id: Memo(
-        id=memo_id, text=f"Memo {memo_id}", title=f"Title {memo_id}", user_id=user_id, date=datetime.now().isoformat()
-    )
+    mock_storage.get_memos.side_effect = lambda user_id, memo_ids: {
+        memo_id: Memo(
+            id=memo_id,
+            text=f"Memo {memo_id}",
+            title=f"Title {memo_id}",
+            user_id=user_id,
+            date=datetime.now().isoformat(),
+        )
+        for memo_id in memo_ids
+    }
 
     search_engine = SearchEngine(
         text_processor=mock_text_processor,
@@ -351,6 +360,139 @@ async def test_search_minimum_score_threshold():
         ]
         assert len(results) == len(results_above_threshold)
 
-    # Verify results are returned in descending score order
+    # Verify every hit was hydrated and results keep descending score order
+    assert [r.memo.id for r in results] == ["memo-1", "memo-2", "memo-3", "memo-4"]
     scores = [r.score for r in results]
     assert scores == sorted(scores, reverse=True)
+
+
+def hybrid_engine(tmp_path, vector_storage, vector_timeout=None):
+    from src.infrastructure.lexical.bm25_index import Bm25Index
+
+    mock_text_processor = AsyncMock()
+    mock_text_processor.process.return_value = VectorData(vector=[0.1, 0.2, 0.3], text="")
+    mock_storage = AsyncMock()
+    mock_storage.list_memos.side_effect = lambda user_id, limit, before=None: (
+        [] if before else [
+            Memo(id=memo_id, text=text, title="", user_id=user_id, date="2025-01-01")
+            for memo_id, text in [("3", "budget meeting"), ("2", "Kowalski invoice 4711"), ("1", "shopping")]
+        ]
+    )
+    mock_storage.get_memos.side_effect = lambda user_id, memo_ids: {
+        memo_id: Memo(id=memo_id, text="", title="", user_id=user_id, date="2025-01-01")
+        for memo_id in memo_ids
+    }
+    return SearchEngine(
+        text_processor=mock_text_processor,
+        vector_storage=vector_storage,
+        storage=mock_storage,
+        lexical_index=Bm25Index(tmp_path),
+        vector_timeout=vector_timeout,
+    )
+
+
+async def test_hybrid_search_fuses_lexical_and_vector_rankings(tmp_path):
+    mock_vector_storage = AsyncMock()
+    mock_vector_storage.search.return_value = [
+        {"id": "1", "score": 0.9, "metadata": {"user_id": "user-1"}},
+        {"id": "2", "score": 0.8, "metadata": {"user_id": "user-1"}},
+    ]
+    engine = hybrid_engine(tmp_path, mock_vector_storage)
+
+    results = await engine.search("invoice 4711", "user-1", limit=2)
+
+    # Memo 2 is second semantically but the only exact keyword match
+    assert [r.memo.id for r in results] == ["2", "1"]
+    assert results[0].score > results[1].score
+    mock_vector_storage.search.assert_called_once_with([0.1, 0.2, 0.3], "user-1", 20)
+    # Memos written before the index existed were indexed once
+    await engine.search("budget", "user-1", limit=2)
+    engine.storage.list_memos.assert_called_once()
+
+
+async def test_hybrid_search_falls_back_to_lexical_results(tmp_path):
+    failing = AsyncMock()
+    failing.search.side_effect = PineconeException("Connection error")
+    results = await hybrid_engine(tmp_path, failing).search("kowalski", "user-1", limit=5)
+    assert [(r.memo.id, r.score) for r in results] == [("2", 1.0)]
+
+    async def slow_search(*args):
+        await asyncio.sleep(10)
+
+    slow = AsyncMock()
+    slow.search.side_effect = slow_search
+    engine = hybrid_engine(tmp_path, slow, vector_timeout=0.05)
+    results = await asyncio.wait_for(engine.search("budget", "user-1", limit=5), 1)
+    assert [r.memo.id for r in results] == ["3"]
+
+
+async def test_hybrid_search_falls_back_to_vector_results(tmp_path):
+    mock_vector_storage = AsyncMock()
+    mock_vector_storage.search.return_value = [
+        {"id": "1", "score": 0.9, "metadata": {"user_id": "user-1"}},
+    ]
+    engine = hybrid_engine(tmp_path, mock_vector_storage, vector_timeout=0.05)
+    engine.storage.list_memos.side_effect = OSError("disk unavailable")
+
+    results = await engine.search("budget", "user-1", limit=5)
+
+    assert [(r.memo.id, r.score) for r in results] == [("1", 1.0)]
+
+
+async def test_degraded_hybrid_search_is_not_cached(tmp_path):
+    from src.core.services.search_cache import SearchCache
+
+    mock_vector_storage = AsyncMock()
+    mock_vector_storage.search.side_effect = PineconeException("Connection error")
+    engine = hybrid_engine(tmp_path, mock_vector_storage)
+    engine.cache = SearchCache()
+
+    await engine.search("budget", "user-1", limit=5)
+    mock_vector_storage.search.side_effect = None
+    mock_vector_storage.search.return_value = [
+        {"id": "1", "score": 0.9, "metadata": {"user_id": "user-1"}},
+    ]
+    results = await engine.search("budget", "user-1", limit=5)
+
+    assert [r.memo.id for r in results] == ["3", "1"]
+    await engine.search("budget", "user-1", limit=5)
+    assert mock_vector_storage.search.call_count == 2
+
+
+async def test_cached_search_skips_embedding_and_rehydrates_memos():
+    from src.core.services.search_cache import SearchCache
+
+    mock_text_processor = AsyncMock()
+    mock_text_processor.process.return_value = VectorData(vector=[0.1, 0.2, 0.3], text="")
+    mock_vector_storage = AsyncMock()
+    mock_vector_storage.search.return_value = [
+        {"id": "1", "score": 0.9, "metadata": {"user_id": "user-1"}},
+        {"id": "2", "score": 0.8, "metadata": {"user_id": "user-1"}},
+    ]
+    stored = {"1", "2"}
+    mock_storage = AsyncMock()
+    mock_storage.get_memos.side_effect = lambda user_id, memo_ids: {
+        memo_id: Memo(id=memo_id, text="", title="", user_id=user_id, date="2025-01-01")
+        for memo_id in memo_ids
+        if memo_id in stored
+    }
+    cache = SearchCache()
+    engine = SearchEngine(
+        text_processor=mock_text_processor,
+        vector_storage=mock_vector_storage,
+        storage=mock_storage,
+        cache=cache,
+    )
+
+    await engine.search("Shopping list", "user-1", 2)
+    # Deleted by another worker, whose cache invalidation this one never saw
+    stored.discard("2")
+    results = await engine.search("shopping list ", "user-1", 2)
+
+    assert [r.memo.id for r in results] == ["1"]
+    mock_text_processor.process.assert_called_once()
+    mock_vector_storage.search.assert_called_once()
+
+    cache.invalidate("user-1")
+    await engine.search("shopping list", "user-1", 2)
+    assert mock_vector_storage.search.call_count == 2
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from src.infrastructure.db.compression import (DictionaryStore, TextCodec,
+                                               train_dictionary)
+from src.infrastructure.db.local_storage import LocalStorage
+from src.infrastructure.db.sqlite_storage import SqliteStorage
+
+TRANSCRIPT = "Remember to call the dentist tomorrow morning and move the team meeting to Friday. "
+
+
+def test_codec_round_trip_with_dictionary(tmp_path):
+    codec = TextCodec(DictionaryStore(tmp_path))
+    dictionary_id = codec.dictionaries.add(train_dictionary([TRANSCRIPT * 3] * 4))
+
+    plain = codec.encode(TRANSCRIPT)
+    primed = codec.encode(TRANSCRIPT, dictionary_id)
+
+    assert codec.decode(plain) == TRANSCRIPT
+    assert codec.decode(primed) == TRANSCRIPT
+    assert len(primed["text_z"]) < len(plain["text_z"])
+    # Another worker reads the dictionary back from disk
+    assert TextCodec(DictionaryStore(tmp_path)).decode(primed) == TRANSCRIPT
+
+
+def test_codec_reads_legacy_and_rejects_unknown_versions(tmp_path):
+    codec = TextCodec(DictionaryStore(tmp_path))
+
+    assert codec.decode({"text": "Legacy", "title": "Title"}) == "Legacy"
+    with pytest.raises(ValueError):
+        codec.decode({"v": 99, "text_z": ""})
+
+
+async def test_local_storage_compresses_text(test_settings):
+    test_settings.storage_compression = "zlib"
+    test_settings.storage_compression_dictionary_min_memos = 3
+    storage = LocalStorage(test_settings)
+
+    memo_ids = [
+        await storage.store_memo(text=f"{TRANSCRIPT} #{i}", title="Title", user_id="user-1")
+        for i in range(5)
+    ]
+
+    with open(test_settings.data_folder / "db.json") as f:
+        records = json.load(f)["user-1"]
+    assert all("text" not in record for record in records.values())
+    assert [records[memo_id].get("zd") for memo_id in memo_ids][:3] == [None] * 3
+    assert records[memo_ids[3]]["zd"] == records[memo_ids[4]]["zd"]
+    memos = await storage.get_memos("user-1", memo_ids)
+    assert [memos[memo_id].text for memo_id in memo_ids] == [f"{TRANSCRIPT} #{i}" for i in range(5)]
+
+
+async def test_compressed_records_stay_readable(test_settings):
+    test_settings.storage_compression = "zlib"
+    memo_id = await LocalStorage(test_settings).store_memo(text=TRANSCRIPT, title="Title", user_id="user-1")
+
+    test_settings.storage_compression = "none"
+    plain_id = await LocalStorage(test_settings).store_memo(text="Plain", title="Title", user_id="user-1")
+    storage = LocalStorage(test_settings)
+
+    assert (await storage.get_memo("user-1", memo_id)).text == TRANSCRIPT
+    assert (await storage.get_memo("user-1", plain_id)).text == "Plain"
+    assert (await SqliteStorage(test_settings).get_memo("user-1", memo_id)).text == TRANSCRIPT
@@ -0,0 +1,93 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.infrastructure.db.base import MemoIdConflict
+from src.infrastructure.db.group_commit import COMMIT_BATCH_SIZE, GroupCommitStorage
+from src.infrastructure.db.log_storage import LogStorage
+
+
+async def test_concurrent_writes_share_one_flush(test_settings):
+    inner = LogStorage(test_settings)
+    storage = GroupCommitStorage(inner, max_batch_size=100, max_wait_ms=50)
+    batches_before = COMMIT_BATCH_SIZE._sum.get()
+
+    memo_ids = await asyncio.gather(
+        *(
+            storage.store_memo(text=f"Text {i}", title="Title", user_id="user-1")
+            for i in range(10)
+        )
+    )
+
+    assert len(set(memo_ids)) == 10
+    assert COMMIT_BATCH_SIZE._sum.get() - batches_before == 10
+    memos = await storage.get_memos("user-1", memo_ids)
+    assert [memos[memo_id].text for memo_id in memo_ids] == [f"Text {i}" for i in range(10)]
+
+
+async def test_batch_is_split_at_max_size():
+    inner = AsyncMock()
+    inner.store_memos.side_effect = lambda memos: [m["text"] for m in memos]
+    storage = GroupCommitStorage(inner, max_batch_size=3, max_wait_ms=50)
+
+    memo_ids = await asyncio.gather(
+        *(storage.store_memo(text=str(i), title="Title", user_id="user-1") for i in range(7))
+    )
+
+    assert memo_ids == [str(i) for i in range(7)]
+    assert [len(call.args[0]) for call in inner.store_memos.call_args_list] == [3, 3, 1]
+
+
+async def test_failed_flush_is_raised_to_every_caller():
+    inner = AsyncMock()
+    inner.store_memos.side_effect = Exception("Disk full")
+    storage = GroupCommitStorage(inner, max_batch_size=10, max_wait_ms=20)
+
+    results = await asyncio.gather(
+        *(storage.store_memo(text=str(i), title="Title", user_id="user-1") for i in range(3)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, Exception) and "Disk full" in str(r) for r in results)
+    inner.store_memos.assert_called_once()
+
+    # The writer keeps serving after a failed flush
+    inner.store_memos.side_effect = lambda memos: ["memo-id"]
+    assert await storage.store_memo(text="1", title="Title", user_id="user-1") == "memo-id"
+
+
+@pytest.mark.parametrize("backend", ["log", "sqlite", "json"])
+async def test_store_memos_round_trip(test_settings, backend):
+    from src.api.dependencies import STORAGE_BACKENDS
+
+    storage = STORAGE_BACKENDS[backend](test_settings)
+    memos = [{"text": f"Text {i}", "title": "Title", "user_id": f"user-{i % 2}"} for i in range(4)]
+
+    memo_ids = await storage.store_memos(memos)
+
+    for memo_id, memo in zip(memo_ids, memos):
+        assert (await storage.get_memo(memo["user_id"], memo_id)).text == memo["text"]
+
+
+@pytest.mark.parametrize("backend", ["log", "sqlite", "json"])
+async def test_store_memo_with_id_is_idempotent(test_settings, backend):
+    from src.api.dependencies import STORAGE_BACKENDS
+
+    storage = GroupCommitStorage(STORAGE_BACKENDS[backend](test_settings))
+    memo_id = storage.new_memo_id()
+
+    for _ in range(2):
+        assert await storage.store_memo("First", "Title", "user-1", memo_id=memo_id) == memo_id
+    # A different memo under a taken ID fails alone, leaving its batch and the memo intact
+    results = await asyncio.gather(
+        storage.store_memo("Second", "Title", "user-1", memo_id=memo_id),
+        storage.store_memo("Other", "Title", "user-1"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], MemoIdConflict)
+    assert [(m.id, m.text) for m in await storage.list_memos("user-1", 10)] == [
+        (results[1], "Other"),
+        (memo_id, "First"),
+    ]
\ No newline at end of file
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.infrastructure.db.ids import SnowflakeIdGenerator, id_from_datetime
+
+
+class StubIdGenerator(SnowflakeIdGenerator):
+    """Hands out ``ids`` in order before falling back to snowflakes"""
+
+    def __init__(self, ids: list[str]):
+        super().__init__(worker_id=1)
+        self.ids = list(ids)
+
+    def generate(self) -> str:
+        return self.ids.pop(0) if self.ids else super().generate()
+
+
+def test_ids_increase_monotonically():
+    generator = SnowflakeIdGenerator(worker_id=7)
+
+    ids = [int(generator.generate()) for _ in range(10_000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(0 < i < 1 << 63 for i in ids)
+
+
+def test_worker_id_comes_from_settings(test_settings):
+    from src.api.dependencies import get_id_generator
+
+    test_settings.storage_worker_id = 5
+    get_id_generator.cache_clear()
+    try:
+        with patch("src.api.dependencies.get_settings", return_value=test_settings):
+            memo_id = int(get_id_generator().generate())
+    finally:
+        get_id_generator.cache_clear()
+
+    assert (memo_id >> 12) & 1023 == 5
+    with pytest.raises(ValueError):
+        SnowflakeIdGenerator(worker_id=1024)
+
+
+def test_id_from_datetime_bounds_generated_ids():
+    start = id_from_datetime(datetime.now() - timedelta(seconds=1))
+    memo_id = SnowflakeIdGenerator().generate()
+    end = id_from_datetime(datetime.now() + timedelta(seconds=1))
+
+    assert int(start) < int(memo_id) < int(end)
+
+
+@pytest.mark.parametrize("backend", ["log", "sqlite", "json"])
+async def test_list_memos_newest_first(test_settings, backend):
+    from src.api.dependencies import STORAGE_BACKENDS
+
+    storage = STORAGE_BACKENDS[backend](test_settings)
+    memo_ids = [
+        await storage.store_memo(text=f"Text {i}", title="Title", user_id="user-1")
+        for i in range(5)
+    ]
+    await storage.store_memo(text="Other", title="Title", user_id="user-2")
+    await storage.delete_memo("user-1", memo_ids[2])
+
+    first_page = await storage.list_memos("user-1", limit=2)
+    second_page = await storage.list_memos("user-1", limit=2, before=first_page[-1].id)
+
+    assert [memo.id for memo in first_page] == [memo_ids[4], memo_ids[3]]
+    assert [memo.id for memo in second_page] == [memo_ids[1], memo_ids[0]]
+    assert await storage.list_memos("user-1", limit=2, before=memo_ids[0]) == []
+    between = await storage.list_memos("user-1", limit=10, before=memo_ids[4], after=memo_ids[0])
+    assert [memo.id for memo in between] == [memo_ids[3], memo_ids[1]]
+    assert await storage.list_memos("user-3", limit=10) == []
+
+
+@pytest.mark.parametrize("backend", ["log", "sqlite", "json"])
+async def test_legacy_memos_list_by_date_after_snowflakes(test_settings, backend):
+    from src.api.dependencies import STORAGE_BACKENDS
+
+    storage = STORAGE_BACKENDS[backend](test_settings)
+    for legacy_id in ["30", "10", "20"]:
+        await storage.store_memo(text=f"Legacy {legacy_id}", title="Title", user_id="user-1", memo_id=legacy_id)
+    snowflakes = [
+        await storage.store_memo(text=f"Text {i}", title="Title", user_id="user-1")
+        for i in range(2)
+    ]
+
+    listed = [memo.id for memo in await storage.list_memos("user-1", limit=10)]
+    first_page = await storage.list_memos("user-1", limit=3)
+    second_page = await storage.list_memos("user-1", limit=3, before=first_page[-1].id)
+    between = await storage.list_memos("user-1", limit=10, before="10", after=snowflakes[0])
+
+    assert listed == [snowflakes[1], snowflakes[0], "20", "10", "30"]
+    assert [memo.id for memo in first_page] == [snowflakes[1], snowflakes[0], "20"]
+    assert [memo.id for memo in second_page] == ["10", "30"]
+    assert between == []
+    assert [memo.id for memo in await storage.list_memos("user-1", limit=10, before="20", after="30")] == ["10"]
+    assert [memo.id for memo in await storage.list_memos("user-1", limit=10, after="10")] == [
+        snowflakes[1],
+        snowflakes[0],
+        "20",
+    ]
+
+
+@pytest.mark.parametrize("backend", ["log", "sqlite", "json"])
+async def test_id_collision_is_regenerated(test_settings, backend):
+    from src.api.dependencies import STORAGE_BACKENDS
+
+    storage = STORAGE_BACKENDS[backend](test_settings, id_generator=StubIdGenerator(["5", "5"]))
+
+    first = await storage.store_memo(text="First", title="Title", user_id="user-1")
+    second = await storage.store_memo(text="Second", title="Title", user_id="user-1")
+
+    assert first == "5"
+    assert second != first
+    assert (await storage.get_memo("user-1", first)).text == "First"
+    assert (await storage.get_memo("user-1", second)).text == "Second"
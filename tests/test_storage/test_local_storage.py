@@ -0,0 +1,105 @@
+import json
+from unittest.mock import ANY, patch
+
+from src.infrastructure.db.local_storage import LocalStorage
+from src.infrastructure.db.sharding import reshard, shard_files, shard_path
+
+
+async def test_store_get_and_delete_memo(test_settings):
+    storage = LocalStorage(test_settings)
+
+    memo_id = await storage.store_memo(text="Test text", title="Test title", user_id="user-1")
+    memo = await storage.get_memo("user-1", memo_id)
+
+    assert memo.text == "Test text"
+    assert memo.title == "Test title"
+    assert (await storage.delete_memo("user-1", memo_id)).id == memo_id
+    assert await storage.get_memo("user-1", memo_id) is None
+    assert await storage.get_memo("unknown-user", memo_id) is None
+
+
+async def test_reads_are_served_from_cache(test_settings):
+    storage = LocalStorage(test_settings)
+    memo_id = await storage.store_memo(text="Test text", title="Test title", user_id="user-1")
+
+    with patch("src.infrastructure.db.json_cache.json.load", wraps=json.load) as load:
+        for _ in range(5):
+            await storage.get_memo("user-1", memo_id)
+            await storage.get_memos("user-1", [memo_id])
+
+    load.assert_not_called()
+
+
+async def test_cache_sees_writes_from_another_worker(test_settings):
+    worker_a = LocalStorage(test_settings)
+    worker_b = LocalStorage(test_settings)
+    first = await worker_a.store_memo(text="First", title="Title", user_id="user-1")
+    assert (await worker_b.get_memo("user-1", first)).text == "First"
+
+    second = await worker_a.store_memo(text="Second", title="Title", user_id="user-1")
+    await worker_a.delete_memo("user-1", first)
+
+    assert (await worker_b.get_memo("user-1", second)).text == "Second"
+    assert await worker_b.get_memo("user-1", first) is None
+
+
+async def test_listing_index_follows_writes(test_settings):
+    storage = LocalStorage(test_settings)
+    first = await storage.store_memo(text="First", title="Title", user_id="user-1")
+    _, sorted_ids = storage._shard("user-1").get_user_index("user-1")
+
+    second = await storage.store_memo(text="Second", title="Title", user_id="user-1")
+    await storage.delete_memo("user-1", first)
+
+    assert storage._shard("user-1").get_user_index("user-1")[1] is sorted_ids
+    assert sorted_ids == [int(second)]
+    assert [memo.id for memo in await storage.list_memos("user-1", 10)] == [second]
+
+
+async def test_bounded_cache_evicts_least_recently_used(test_settings):
+    test_settings.storage_cache_max_users = 2
+    storage = LocalStorage(test_settings)
+    ids = {
+        user_id: await storage.store_memo(text=user_id, title="Title", user_id=user_id)
+        for user_id in ("user-1", "user-2", "user-3")
+    }
+
+    assert list(storage._shard("user-1")._users) == ["user-2", "user-3"]
+
+    # An evicted user is reloaded from disk and becomes the most recent entry
+    assert (await storage.get_memo("user-1", ids["user-1"])).text == "user-1"
+    assert list(storage._shard("user-1")._users) == ["user-3", "user-1"]
+
+
+async def test_sharded_layout_touches_only_the_users_shard(test_settings):
+    storage = LocalStorage(test_settings)
+    reshard(test_settings.data_folder, 8)
+
+    memo_id = await storage.store_memo(text="Test text", title="Test title", user_id="user-1")
+
+    shard = shard_path(test_settings.data_folder, 8, "user-1")
+    with open(shard) as f:
+        assert json.load(f) == {"user-1": {memo_id: ANY}}
+    # The old layout is gone, so nothing can import it again
+    assert not (test_settings.data_folder / "db.json").exists()
+
+
+async def test_reshard_keeps_memos_readable(test_settings):
+    storage = LocalStorage(test_settings)
+    ids = {
+        user_id: await storage.store_memo(text=user_id, title="Title", user_id=user_id)
+        for user_id in (f"user-{i}" for i in range(20))
+    }
+
+    assert reshard(test_settings.data_folder, 4) == 20
+    for user_id, memo_id in ids.items():
+        assert (await storage.get_memo(user_id, memo_id)).text == user_id
+
+    # Rebalancing to a different shard count keeps working for new writes too
+    reshard(test_settings.data_folder, 16)
+    memo_id = await storage.store_memo(text="After", title="Title", user_id="user-1")
+    reopened = LocalStorage(test_settings)
+    assert (await reopened.get_memo("user-1", memo_id)).text == "After"
+    assert (await reopened.get_memo("user-7", ids["user-7"])).text == "user-7"
+    assert len(shard_files(test_settings.data_folder, 16)) > 1
+    assert not (test_settings.data_folder / "shards" / "4").exists()
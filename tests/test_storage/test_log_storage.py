@@ -0,0 +1,144 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from src.infrastructure.db.local_storage import LocalStorage
+from src.infrastructure.db.log_storage import LogStorage
+from src.infrastructure.db.sharding import reshard
+
+
+async def test_store_and_get_memo(test_settings):
+    storage = LogStorage(test_settings)
+
+    memo_id = await storage.store_memo(text="Test text", title="Test title", user_id="user-1")
+    memo = await storage.get_memo("user-1", memo_id)
+
+    assert memo.id == memo_id
+    assert memo.text == "Test text"
+    assert memo.title == "Test title"
+    assert memo.user_id == "user-1"
+
+
+async def test_get_memo_unknown_user(test_settings):
+    storage = LogStorage(test_settings)
+
+    assert await storage.get_memo("missing-user", "123") is None
+
+
+async def test_delete_memo_writes_tombstone(test_settings):
+    storage = LogStorage(test_settings)
+    memo_id = await storage.store_memo(text="Test text", title="Test title", user_id="user-1")
+
+    deleted = await storage.delete_memo("user-1", memo_id)
+
+    assert deleted.id == memo_id
+    assert await storage.get_memo("user-1", memo_id) is None
+    assert await storage.delete_memo("user-1", memo_id) is None
+
+    # The delete survives a restart
+    reopened = LogStorage(test_settings)
+    assert await reopened.get_memo("user-1", memo_id) is None
+
+
+async def test_imports_legacy_db_on_first_start(test_settings):
+    legacy = {
+        "user-1": {
+            "42": {"text": "Legacy text", "title": "Legacy", "date": "2025-02-01T15:31:12"}
+        }
+    }
+    with open(test_settings.data_folder / "db.json", "w") as f:
+        json.dump(legacy, f)
+
+    storage = LogStorage(test_settings)
+    memo = await storage.get_memo("user-1", "42")
+
+    assert memo.text == "Legacy text"
+    assert memo.date == "2025-02-01T15:31:12"
+
+
+async def test_imports_sharded_json_store(test_settings):
+    json_storage = LocalStorage(test_settings)
+    memo_id = await json_storage.store_memo(text="Sharded", title="Title", user_id="user-1")
+    reshard(test_settings.data_folder, 4)
+
+    storage = LogStorage(test_settings)
+
+    assert (await storage.get_memo("user-1", memo_id)).text == "Sharded"
+
+
+async def test_sees_writes_from_another_instance(test_settings):
+    writer = LogStorage(test_settings)
+    reader = LogStorage(test_settings)
+
+    memo_id = await writer.store_memo(text="Test text", title="Test title", user_id="user-1")
+
+    assert (await reader.get_memo("user-1", memo_id)).text == "Test text"
+
+
+async def test_compaction_keeps_live_records(test_settings):
+    storage = LogStorage(test_settings, compaction_min_bytes=0)
+    memo_ids = [
+        await storage.store_memo(text=f"Text {i}", title="Title", user_id="user-1")
+        for i in range(10)
+    ]
+    for memo_id in memo_ids[:8]:
+        await storage.delete_memo("user-1", memo_id)
+
+    storage.compact()
+
+    reopened = LogStorage(test_settings)
+    assert [(await reopened.get_memo("user-1", i)).text for i in memo_ids[8:]] == [
+        "Text 8",
+        "Text 9",
+    ]
+    assert await reopened.get_memo("user-1", memo_ids[0]) is None
+
+
+async def test_concurrent_compactions_keep_every_record(test_settings):
+    # Separate instances stand in for separate workers sharing the log
+    first, second = LogStorage(test_settings), LogStorage(test_settings)
+    memo_ids = [
+        await first.store_memo(text=f"Text {i}", title="Title", user_id="user-1")
+        for i in range(20)
+    ]
+    for memo_id in memo_ids[:10]:
+        await first.delete_memo("user-1", memo_id)
+
+    with ThreadPoolExecutor(3) as pool:
+        compactions = [pool.submit(first.compact), pool.submit(second.compact)]
+        written = pool.submit(
+            lambda: [second._store_memo(f"Late {i}", "Title", "user-1") for i in range(5)]
+        )
+        for compaction in compactions:
+            compaction.result()
+        late_ids = written.result()
+
+    reopened = LogStorage(test_settings)
+    memos = await reopened.get_memos("user-1", memo_ids + late_ids)
+    assert sorted(memos) == sorted(memo_ids[10:] + late_ids)
+    assert (await first.get_memo("user-1", late_ids[-1])).text == "Late 4"
+
+
+async def test_torn_tail_is_dropped(test_settings):
+    storage = LogStorage(test_settings)
+    memo_id = await storage.store_memo(text="Test text", title="Test title", user_id="user-1")
+    with open(storage.log_file, "ab") as log:
+        log.write(b'{"op": "put", "user_id": "user-1"')
+
+    reopened = LogStorage(test_settings)
+
+    assert (await reopened.get_memo("user-1", memo_id)).text == "Test text"
+    assert storage.log_file.read_bytes().endswith(b"\n")
+
+
+async def test_get_memos_skips_missing(test_settings):
+    storage = LogStorage(test_settings)
+    first = await storage.store_memo(text="First", title="Title", user_id="user-1")
+    second = await storage.store_memo(text="Second", title="Title", user_id="user-1")
+
+    memos = await storage.get_memos("user-1", [second, "missing", first])
+
+    assert {memo_id: memo.text for memo_id, memo in memos.items()} == {
+        first: "First",
+        second: "Second",
+    }
+    assert await storage.get_memos("missing-user", [first]) == {}
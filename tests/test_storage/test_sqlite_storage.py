@@ -0,0 +1,115 @@
+import json
+import sqlite3
+
+from src.infrastructure.db.local_storage import LocalStorage
+from src.infrastructure.db.sharding import reshard
+from src.infrastructure.db.sqlite_storage import SqliteStorage
+
+
+async def test_store_and_get_memo(test_settings):
+    storage = SqliteStorage(test_settings)
+
+    memo_id = await storage.store_memo(text="Test text", title="Test title", user_id="user-1")
+    memo = await storage.get_memo("user-1", memo_id)
+
+    assert memo.id == memo_id
+    assert memo.text == "Test text"
+    assert memo.title == "Test title"
+    assert memo.user_id == "user-1"
+    assert await storage.get_memo("user-2", memo_id) is None
+
+
+async def test_delete_memo(test_settings):
+    storage = SqliteStorage(test_settings)
+    memo_id = await storage.store_memo(text="Test text", title="Test title", user_id="user-1")
+
+    deleted = await storage.delete_memo("user-1", memo_id)
+
+    assert deleted.id == memo_id
+    assert deleted.text == "Test text"
+    assert await storage.get_memo("user-1", memo_id) is None
+    assert await storage.delete_memo("user-1", memo_id) is None
+
+
+async def test_uses_wal_and_indexes(test_settings):
+    storage = SqliteStorage(test_settings)
+    conn = sqlite3.connect(storage.db_file)
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM memos WHERE user_id = 'u' AND memo_id = '1'"
+    ).fetchall()
+    assert "PRIMARY KEY" in plan[0][-1]
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list(memos)")]
+    assert "memos_user_date" in indexes
+
+
+async def test_imports_legacy_db_on_first_start(test_settings):
+    legacy = {
+        "user-1": {
+            "42": {"text": "Legacy text", "title": "Legacy", "date": "2025-02-01T15:31:12"}
+        }
+    }
+    with open(test_settings.data_folder / "db.json", "w") as f:
+        json.dump(legacy, f)
+
+    storage = SqliteStorage(test_settings)
+    memo = await storage.get_memo("user-1", "42")
+
+    assert memo.text == "Legacy text"
+    assert memo.date == "2025-02-01T15:31:12"
+    # Running the migration again is a no-op
+    storage.import_json([test_settings.data_folder / "db.json"])
+    assert len(storage._connection().execute("SELECT * FROM memos").fetchall()) == 1
+
+
+async def test_imports_sharded_json_store(test_settings):
+    json_storage = LocalStorage(test_settings)
+    memo_id = await json_storage.store_memo(text="Sharded", title="Title", user_id="user-1")
+    reshard(test_settings.data_folder, 4)
+
+    storage = SqliteStorage(test_settings)
+
+    assert (await storage.get_memo("user-1", memo_id)).text == "Sharded"
+
+
+async def test_get_memos_skips_missing(test_settings):
+    storage = SqliteStorage(test_settings)
+    first = await storage.store_memo(text="First", title="Title", user_id="user-1")
+    second = await storage.store_memo(text="Second", title="Title", user_id="user-1")
+
+    memos = await storage.get_memos("user-1", [second, "missing", first])
+
+    assert {memo_id: memo.text for memo_id, memo in memos.items()} == {
+        first: "First",
+        second: "Second",
+    }
+    assert await storage.get_memos("user-2", [first]) == {}
+
+
+async def test_migrates_text_memo_ids_to_integers(test_settings):
+    test_settings.data_folder.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(test_settings.data_folder / "memos.sqlite3")
+    conn.executescript(
+        """
+        CREATE TABLE memos (
+            user_id TEXT NOT NULL,
+            memo_id TEXT NOT NULL,
+            text TEXT NOT NULL,
+            title TEXT NOT NULL,
+            date TEXT NOT NULL,
+            PRIMARY KEY (user_id, memo_id)
+        ) WITHOUT ROWID;
+        INSERT INTO memos VALUES ('user-1', '9', 'Nine', 'Title', '2025-02-01T15:31:12');
+        INSERT INTO memos VALUES ('user-1', '10', 'Ten', 'Title', '2025-02-01T15:31:13');
+        """
+    )
+    conn.close()
+
+    storage = SqliteStorage(test_settings)
+    new_id = await storage.store_memo(text="New", title="Title", user_id="user-1")
+
+    memos = await storage.list_memos("user-1", limit=10)
+    assert [memo.id for memo in memos] == [new_id, "10", "9"]
+    assert (await storage.get_memo("user-1", "9")).text == "Nine"
+    assert await storage.get_memo("user-1", "not-a-number") is None
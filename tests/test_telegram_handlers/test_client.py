@@ -0,0 +1,26 @@
+import io
+
+import httpx
+import pytest
+
+from src.clients.telegram_client.client import MemoAPIClient
+from src.core.models import AudioData
+
+
+def job(status: str, memo=None) -> dict:
+    return {"id": "42", "status": status, "memo": memo, "error": None}
+
+
+async def test_store_memo_raises_when_the_jobs_memo_is_gone():
+    responses = iter([(202, job("queued")), (200, job("succeeded"))])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status, body = next(responses)
+        return httpx.Response(status, json=body)
+
+    client = MemoAPIClient("http://api")
+    client.client = httpx.AsyncClient(base_url="http://api", transport=httpx.MockTransport(handler))
+    audio = AudioData(file=io.BytesIO(b"audio"), format="ogg")
+
+    with pytest.raises(RuntimeError, match="no longer exists"):
+        await client.store_memo(audio, "user-1")
@@ -0,0 +1,128 @@
+import threading
+from unittest.mock import patch
+
+import numpy as np
+
+from src.infrastructure.vector_db.hnsw import HnswIndex
+from src.infrastructure.vector_db.hnsw_vector_storage import HnswVectorStorage
+
+
+def random_vectors(count: int, dimension: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+
+
+def wait_for_compactions(storage: HnswVectorStorage):
+    while storage._compactions:
+        for future in list(storage._compactions.values()):
+            future.result()
+
+
+def exact_top(vectors: np.ndarray, query: np.ndarray, limit: int) -> set[int]:
+    normalised = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return set(np.argsort(normalised @ query)[::-1][:limit].tolist())
+
+
+def test_recall_against_exact_search():
+    vectors = random_vectors(500)
+    index = HnswIndex(32, m=8, ef_construction=64, seed=1)
+    for i, vector in enumerate(vectors):
+        index.add(str(i), vector, {})
+
+    hits = 0
+    for query in random_vectors(20, seed=1):
+        found = {int(label) for label, _, _ in index.search(query, 10, ef=64)}
+        hits += len(found & exact_top(vectors, query / np.linalg.norm(query), 10))
+
+    assert hits / 200 >= 0.9
+
+
+def test_deleted_nodes_are_skipped_and_dropped_on_rebuild():
+    vectors = random_vectors(50)
+    index = HnswIndex(32, m=4, ef_construction=32, seed=1)
+    for i, vector in enumerate(vectors):
+        index.add(str(i), vector, {"n": i})
+
+    assert index.remove("7")
+    assert not index.remove("7")
+    assert "7" not in [label for label, _, _ in index.search(vectors[7], 5)]
+
+    rebuilt = index.rebuilt()
+    assert len(rebuilt) == 49
+    assert rebuilt.deleted == set()
+    assert rebuilt.search(vectors[8], 1)[0][:1] == ("8",)
+    assert rebuilt.search(vectors[8], 1)[0][2] == {"n": 8}
+
+
+async def test_storage_persists_and_rebuilds(tmp_path):
+    vectors = random_vectors(30)
+    storage = HnswVectorStorage(tmp_path, m=4, ef_construction=32, rebuild_ratio=0.1, snapshot_ops=20)
+    for i, vector in enumerate(vectors):
+        await storage.store_vector(vector.tolist(), memo_id=str(i), metadata={"user_id": "user-1"})
+    await storage.store_vector(vectors[0].tolist(), memo_id="other", metadata={"user_id": "user-2"})
+    for i in range(4):
+        await storage.delete_vector(str(i))
+    wait_for_compactions(storage)
+
+    # Snapshot after 20 ops, then a rebuild once more than 10% is deleted
+    assert storage._users["user-1"].index.deleted == set()
+    assert len(storage._users["user-1"].index) == 26
+    reloaded = HnswVectorStorage(tmp_path)
+    results = await reloaded.search(vectors[10].tolist(), "user-1", limit=3, ef_search=32)
+    assert results[0]["id"] == "10"
+    assert results[0]["metadata"] == {"user_id": "user-1"}
+    assert {r["id"] for r in await reloaded.search(vectors[0].tolist(), "user-1", limit=30)}.isdisjoint(
+        {"0", "1", "2", "3"}
+    )
+    assert [r["id"] for r in await reloaded.search(vectors[0].tolist(), "user-2")] == ["other"]
+
+    await reloaded.delete_vector("10")
+    assert "10" not in [r["id"] for r in await storage.search(vectors[10].tolist(), "user-1", limit=3)]
+
+
+async def test_delete_unknown_vector_skips_rescan(tmp_path):
+    vector = random_vectors(1)[0].tolist()
+    storage = HnswVectorStorage(tmp_path)
+    other_worker = HnswVectorStorage(tmp_path)
+    await other_worker.store_vector(vector, memo_id="1", metadata={"user_id": "user-1"})
+
+    with patch.object(storage, "_load_all") as load_all:
+        await storage.delete_vector("missing")
+        await storage.delete_vector("1")
+    load_all.assert_not_called()
+    assert [r["id"] for r in await other_worker.search(vector, "user-1")] == ["1"]
+
+    # Naming the owner finds vectors other workers stored
+    await storage.delete_vector("1", user_id="user-1")
+    assert await other_worker.search(vector, "user-1") == []
+
+
+async def test_rebuild_runs_off_the_write_path(tmp_path):
+    vectors = random_vectors(12)
+    storage = HnswVectorStorage(tmp_path, m=4, ef_construction=32, rebuild_ratio=0.1)
+    for i, vector in enumerate(vectors[:10]):
+        await storage.store_vector(vector.tolist(), memo_id=str(i), metadata={"user_id": "user-1"})
+    started, release = threading.Event(), threading.Event()
+    rebuilt = HnswIndex.rebuilt
+
+    def slow_rebuild(index):
+        started.set()
+        release.wait(5)
+        return rebuilt(index)
+
+    with patch.object(HnswIndex, "rebuilt", slow_rebuild):
+        await storage.delete_vector("0")
+        await storage.delete_vector("1")
+        assert started.wait(5)
+
+        # Searches and writes go on while the graph is rebuilt
+        assert (await storage.search(vectors[5].tolist(), "user-1", limit=1))[0]["id"] == "5"
+        await storage.store_vector(vectors[10].tolist(), memo_id="10", metadata={"user_id": "user-1"})
+        await storage.delete_vector("2")
+        release.set()
+        wait_for_compactions(storage)
+
+    assert storage._users["user-1"].index.deleted == set()
+    found = {r["id"] for r in await storage.search(vectors[0].tolist(), "user-1", limit=20)}
+    assert found == {str(i) for i in range(3, 11)}
+    reloaded = HnswVectorStorage(tmp_path)
+    assert {r["id"] for r in await reloaded.search(vectors[0].tolist(), "user-1", limit=20)} == found
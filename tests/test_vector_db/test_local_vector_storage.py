@@ -0,0 +1,186 @@
+import numpy as np
+import pytest
+
+from src.infrastructure.vector_db.local_vector_storage import LocalVectorStorage
+
+
+def unit(*values: float) -> list[float]:
+    return list(np.asarray(values) / np.linalg.norm(values))
+
+
+async def test_search_returns_nearest_for_user(tmp_path):
+    storage = LocalVectorStorage(tmp_path)
+    await storage.store_vector(unit(1, 0, 0), memo_id="1", metadata={"user_id": "user-1"})
+    await storage.store_vector(unit(1, 1, 0), memo_id="2", metadata={"user_id": "user-1"})
+    await storage.store_vector(unit(0, 0, 1), memo_id="3", metadata={"user_id": "user-1"})
+    await storage.store_vector(unit(1, 0, 0), memo_id="4", metadata={"user_id": "user-2"})
+
+    results = await storage.search([2, 0.1, 0], "user-1", limit=2)
+
+    assert [r["id"] for r in results] == ["1", "2"]
+    assert results[0]["score"] == pytest.approx(0.99875, abs=1e-4)
+    assert results[0]["metadata"] == {"user_id": "user-1"}
+    assert await storage.search([1, 0, 0], "user-3") == []
+
+
+async def test_deletes_and_overwrites_shadow_older_segments(tmp_path):
+    storage = LocalVectorStorage(tmp_path, merge_threshold=100)
+    for i in range(20):
+        await storage.store_vector(unit(1, i, 0), memo_id=str(i), metadata={"user_id": "user-1"})
+
+    await storage.delete_vector("3")
+    await storage.delete_vector("missing")
+    await storage.store_vector(unit(0, 0, 1), memo_id="5", metadata={"user_id": "user-1"})
+
+    results = await storage.search(unit(1, 3, 0), "user-1", limit=20)
+    assert [r["id"] for r in results].count("5") == 1
+    assert "3" not in [r["id"] for r in results]
+    assert results[0]["id"] in {"2", "4"}
+    assert (await storage.search(unit(0, 0, 1), "user-1", limit=1))[0]["id"] == "5"
+
+
+async def test_merge_keeps_live_rows_only(tmp_path):
+    storage = LocalVectorStorage(tmp_path, merge_threshold=100)
+    for i in range(10):
+        await storage.store_vector(unit(1, i), memo_id=str(i), metadata={"user_id": f"user-{i % 2}"})
+    await storage.delete_vector("4")
+    before = await storage.search(unit(1, 4), "user-0", limit=10)
+
+    storage.merge()
+
+    assert len(storage._segments) == 1
+    assert isinstance(storage._segments[0].vectors, np.memmap)
+    assert storage._segments[0].deleted == []
+    assert await storage.search(unit(1, 4), "user-0", limit=10) == before
+    reopened = LocalVectorStorage(tmp_path)
+    assert await reopened.search(unit(1, 4), "user-0", limit=10) == before
+    assert len(await reopened.search(unit(1, 4), "user-1", limit=10)) == 5
+
+
+async def test_merges_in_background_past_threshold(tmp_path):
+    storage = LocalVectorStorage(tmp_path, merge_threshold=4)
+    for i in range(6):
+        await storage.store_vector(unit(1, i), memo_id=str(i), metadata={"user_id": "user-1"})
+
+    storage._merge.result()
+
+    assert len(list((tmp_path / "vectors").glob("seg-*.vec"))) < 6
+    assert len(await storage.search(unit(1, 0), "user-1", limit=10)) == 6
+
+
+async def test_tiered_merge_leaves_large_segments_alone(tmp_path):
+    storage = LocalVectorStorage(tmp_path, merge_threshold=1000)
+    for i in range(20):
+        await storage.store_vector(unit(1, i), memo_id=str(i), metadata={"user_id": "user-1"})
+    storage.merge()
+    base = storage._segments[0].path
+    storage.merge_threshold = 4
+
+    await storage.delete_vector("0")
+    for i in range(20, 23):
+        await storage.store_vector(unit(1, i), memo_id=str(i), metadata={"user_id": "user-1"})
+    storage._merge.result()
+
+    assert [segment.rows for segment in storage._segments] == [20, 3]
+    assert storage._segments[0].path == base
+    # The tombstone still has to shadow the base segment
+    assert storage._segments[1].deleted == ["0"]
+    results = await storage.search(unit(1, 0), "user-1", limit=30)
+    assert sorted(int(r["id"]) for r in results) == list(range(1, 23))
+
+
+async def test_merges_reuse_product_quantizer(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((260, 8)).astype(np.float32)
+    storage = LocalVectorStorage(
+        tmp_path, merge_threshold=1000, quantization="pq", pq_subspaces=2
+    )
+    for i, vector in enumerate(vectors[:256]):
+        await storage.store_vector(vector.tolist(), memo_id=str(i), metadata={"user_id": "user-1"})
+    storage.merge()
+    codebooks = np.array(storage._segments[0].pq_codebooks)
+
+    for i, vector in enumerate(vectors[256:], start=256):
+        await storage.store_vector(vector.tolist(), memo_id=str(i), metadata={"user_id": "user-1"})
+    storage.merge(storage._segments[1:])
+
+    assert [segment.rows for segment in storage._segments] == [256, 4]
+    np.testing.assert_array_equal(storage._segments[1].pq_codebooks, codebooks)
+
+
+async def test_lists_segments_in_a_manifest(tmp_path):
+    storage = LocalVectorStorage(tmp_path, merge_threshold=100)
+    await storage.store_vector(unit(1, 0), memo_id="1", metadata={"user_id": "user-1"})
+    await storage.store_vector(unit(0, 1), memo_id="2", metadata={"user_id": "user-1"})
+    (tmp_path / "vectors" / "manifest.json").unlink()
+    # Left behind by a worker that died mid-merge
+    (tmp_path / "vectors" / "seg-000000000009-000000000009.vec.tmp").write_bytes(b"")
+
+    reopened = LocalVectorStorage(tmp_path)
+
+    assert len(reopened._segments) == 2
+    assert (tmp_path / "vectors" / "manifest.json").exists()
+    assert not (tmp_path / "vectors" / "seg-000000000009-000000000009.vec.tmp").exists()
+    assert len(await reopened.search([1, 1], "user-1", limit=5)) == 2
+
+
+async def test_imports_npz_layout(tmp_path):
+    (tmp_path / "vectors").mkdir()
+    np.savez(
+        tmp_path / "vectors" / "legacy.npz",
+        user_id=np.array("user-1"),
+        vectors=np.array([unit(1, 0), unit(0, 1)], dtype=np.float32),
+        ids=np.array(["1", "2"]),
+        metadata=np.array('[{"user_id": "user-1"}, {"user_id": "user-1"}]'),
+    )
+
+    storage = LocalVectorStorage(tmp_path)
+
+    assert [r["id"] for r in await storage.search([0, 1], "user-1", limit=1)] == ["2"]
+    assert list((tmp_path / "vectors").glob("*.npz")) == []
+
+
+async def test_vectors_persist_and_sync_between_workers(tmp_path):
+    worker_a = LocalVectorStorage(tmp_path)
+    await worker_a.store_vector(unit(1, 0), memo_id="1", metadata={"user_id": "user-1"})
+    worker_b = LocalVectorStorage(tmp_path)
+    await worker_b.store_vector(unit(0, 1), memo_id="2", metadata={"user_id": "user-1"})
+
+    assert [r["id"] for r in await worker_a.search([0, 1], "user-1", limit=1)] == ["2"]
+
+    await worker_a.delete_vector("2")
+    assert [r["id"] for r in await worker_b.search([0, 1], "user-1", limit=5)] == ["1"]
+    assert [r["id"] for r in await LocalVectorStorage(tmp_path).search([0, 1], "user-1")] == ["1"]
+
+
+async def test_rejects_mismatched_dimensions(tmp_path):
+    storage = LocalVectorStorage(tmp_path)
+    await storage.store_vector([1, 0, 0], memo_id="1", metadata={"user_id": "user-1"})
+
+    with pytest.raises(ValueError):
+        await storage.store_vector([1, 0], memo_id="2", metadata={"user_id": "user-1"})
+
+
+@pytest.mark.parametrize("quantization", ["int8", "pq"])
+async def test_quantized_search_reranks_exactly(tmp_path, quantization):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    storage = LocalVectorStorage(
+        tmp_path, merge_threshold=1000, quantization=quantization, pq_subspaces=4
+    )
+    for i, vector in enumerate(vectors):
+        await storage.store_vector(vector.tolist(), memo_id=str(i), metadata={"user_id": "user-1"})
+    await storage.delete_vector("7")
+    storage.merge()
+
+    segment = storage._segments[0]
+    assert segment.int8_codes is not None
+    assert (segment.pq_codes is not None) == (quantization == "pq")
+    exact = LocalVectorStorage(tmp_path, quantization="none")
+    query = vectors[7] + 0.5 * vectors[8]
+    results = await storage.search(query.tolist(), "user-1", limit=10)
+    expected = await exact.search(query.tolist(), "user-1", limit=10)
+    assert [r["id"] for r in results] == [r["id"] for r in expected]
+    assert [r["score"] for r in results] == pytest.approx([r["score"] for r in expected])
+    assert "7" not in [r["id"] for r in results]
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from src.infrastructure.vector_db.quantization import (product_encode,
+                                                       product_scores,
+                                                       scalar_quantize,
+                                                       scalar_scores,
+                                                       train_product_quantizer)
+
+
+def unit_vectors(count: int, dimension: int) -> np.ndarray:
+    vectors = np.random.default_rng(0).standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_scalar_scores_approximate_dot_products():
+    vectors = unit_vectors(100, 32)
+    codes, scale = scalar_quantize(vectors)
+
+    assert codes.dtype == np.int8 and scale.shape == (32,)
+    assert scalar_scores(codes, scale, vectors[0]) == pytest.approx(vectors @ vectors[0], abs=0.02)
+
+
+def test_product_scores_rank_near_vectors_first():
+    vectors = unit_vectors(1000, 32)
+    codebooks = train_product_quantizer(vectors, subspaces=8)
+    codes = product_encode(vectors, codebooks)
+
+    assert codebooks.shape == (8, 256, 4) and codes.shape == (1000, 8)
+    scores = product_scores(codes, codebooks, vectors[3])
+    assert 3 in np.argsort(scores)[-10:]
+
+
+def test_product_quantizer_rejects_unusable_input():
+    with pytest.raises(ValueError):
+        train_product_quantizer(unit_vectors(1000, 30), subspaces=8)
+    with pytest.raises(ValueError):
+        train_product_quantizer(unit_vectors(100, 32), subspaces=8)
@@ -0,0 +1,102 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.models import VectorData
+from src.infrastructure.vectorization.batching_vectorizer import (
+    EMBEDDING_BATCH_SIZE, BatchingVectorizer)
+
+
+def batch_vectorizer() -> AsyncMock:
+    vectorizer = AsyncMock()
+    vectorizer.vectorize_batch.side_effect = lambda texts: [
+        VectorData(vector=[float(len(text))], text=text) for text in texts
+    ]
+    return vectorizer
+
+
+async def test_concurrent_calls_share_one_request():
+    inner = batch_vectorizer()
+    vectorizer = BatchingVectorizer(inner, max_batch_size=100, max_wait_ms=50)
+    batched_before = EMBEDDING_BATCH_SIZE._sum.get()
+
+    results = await asyncio.gather(*(vectorizer.vectorize("x" * i) for i in range(10)))
+
+    assert [r.vector for r in results] == [[float(i)] for i in range(10)]
+    assert [r.text for r in results] == ["x" * i for i in range(10)]
+    inner.vectorize_batch.assert_called_once()
+    assert EMBEDDING_BATCH_SIZE._sum.get() - batched_before == 10
+
+
+async def test_batch_is_split_at_max_size_and_requests_overlap():
+    in_flight, peak = 0, 0
+
+    async def slow_batch(texts):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return [VectorData(vector=[0.0], text=text) for text in texts]
+
+    inner = AsyncMock()
+    inner.vectorize_batch.side_effect = slow_batch
+    vectorizer = BatchingVectorizer(inner, max_batch_size=3, max_wait_ms=10)
+
+    results = await asyncio.gather(*(vectorizer.vectorize(str(i)) for i in range(7)))
+
+    assert [r.text for r in results] == [str(i) for i in range(7)]
+    assert [len(call.args[0]) for call in inner.vectorize_batch.call_args_list] == [3, 3, 1]
+    assert peak > 1
+
+
+async def test_failed_request_is_raised_to_every_caller():
+    inner = AsyncMock()
+    inner.vectorize_batch.side_effect = Exception("Rate limited")
+    vectorizer = BatchingVectorizer(inner, max_batch_size=10, max_wait_ms=20)
+
+    results = await asyncio.gather(
+        *(vectorizer.vectorize(str(i)) for i in range(3)), return_exceptions=True
+    )
+
+    assert all(str(result) == "Rate limited" for result in results)
+    assert (await BatchingVectorizer(batch_vectorizer()).vectorize("ok")).vector == [2.0]
+
+
+async def test_cache_sends_only_misses_to_the_batch():
+    from src.infrastructure.vectorization.caching_vectorizer import \
+        CachingVectorizer
+
+    inner = batch_vectorizer()
+    vectorizer = CachingVectorizer(inner, model="model-a")
+    await vectorizer.vectorize_batch(["a", "bb"])
+
+    results = await vectorizer.vectorize_batch(["bb", "ccc", "a"])
+
+    assert [r.vector for r in results] == [[2.0], [3.0], [1.0]]
+    assert inner.vectorize_batch.call_args.args[0] == ["ccc"]
+
+
+@pytest.mark.parametrize("count", [1, 3])
+async def test_openai_batch_keeps_input_order(count):
+    from types import SimpleNamespace
+
+    from src.infrastructure.vectorization.open_ai_vectorizer import \
+        OpenAIVectorizer
+
+    async def create(**kwargs):
+        # The API may return embeddings in any order, tagged with their index
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(index=i, embedding=[float(i)])
+                for i in reversed(range(len(kwargs["input"])))
+            ]
+        )
+
+    vectorizer = OpenAIVectorizer(api_key="secret")
+    vectorizer.client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+
+    results = await vectorizer.vectorize_batch([str(i) for i in range(count)])
+
+    assert [(r.text, r.vector) for r in results] == [(str(i), [float(i)]) for i in range(count)]
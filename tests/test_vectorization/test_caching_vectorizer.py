@@ -0,0 +1,77 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.models import VectorData
+from src.infrastructure.vectorization.caching_vectorizer import (
+    CachingVectorizer, EmbeddingDiskCache, embedding_key)
+
+
+def counting_vectorizer() -> AsyncMock:
+    vectorizer = AsyncMock()
+    vectorizer.vectorize.side_effect = lambda text: VectorData(
+        vector=[float(len(text)), 0.5], text=text
+    )
+    return vectorizer
+
+
+async def test_memory_tier_reuses_embeddings():
+    vectorizer = counting_vectorizer()
+    cache = CachingVectorizer(vectorizer, model="model-a", memory_entries=2)
+
+    assert (await cache.vectorize("abc")).vector == [3.0, 0.5]
+    assert (await cache.vectorize("abc")).vector == [3.0, 0.5]
+    await cache.vectorize("de")
+    await cache.vectorize("f")
+    await cache.vectorize("abc")
+
+    assert [c.args[0] for c in vectorizer.vectorize.call_args_list] == ["abc", "de", "f", "abc"]
+
+
+async def test_disk_tier_is_shared_and_keyed_by_model(tmp_path):
+    disk = EmbeddingDiskCache(tmp_path / "embeddings.sqlite3", max_bytes=2**20)
+    first = counting_vectorizer()
+    await CachingVectorizer(first, model="model-a", disk_cache=disk).vectorize("abc")
+
+    second = counting_vectorizer()
+    worker = CachingVectorizer(
+        second,
+        model="model-a",
+        disk_cache=EmbeddingDiskCache(tmp_path / "embeddings.sqlite3", max_bytes=2**20),
+    )
+    result = await worker.vectorize("abc")
+    assert result.vector == pytest.approx([3.0, 0.5])
+    assert result.text == "abc"
+    second.vectorize.assert_not_called()
+
+    await CachingVectorizer(second, model="model-b", disk_cache=disk).vectorize("abc")
+    second.vectorize.assert_called_once_with("abc")
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    # Each two-float vector takes 8 bytes
+    disk = EmbeddingDiskCache(
+        tmp_path / "embeddings.sqlite3", max_bytes=80, check_every=1000, touch_interval=0
+    )
+    for i in range(20):
+        disk.put(embedding_key("m", str(i)), [float(i), 0.0])
+    disk.get(embedding_key("m", "0"))
+
+    disk.evict()
+
+    assert disk.get(embedding_key("m", "0")) == [0.0, 0.0]
+    assert disk.get(embedding_key("m", "1")) is None
+    assert disk.get(embedding_key("m", "19")) == [19.0, 0.0]
+
+
+def test_disk_tier_hits_skip_recent_recency_updates(tmp_path):
+    disk = EmbeddingDiskCache(tmp_path / "embeddings.sqlite3", max_bytes=2**20)
+    key = embedding_key("m", "text")
+    disk.put(key, [1.0, 0.0])
+    statements = []
+    disk._connection().set_trace_callback(statements.append)
+
+    for _ in range(5):
+        assert disk.get(key) == [1.0, 0.0]
+
+    assert not [s for s in statements if s.startswith("UPDATE")]